@@ -1,23 +1,99 @@
-from contextlib import contextmanager
+from contextlib import contextmanager, ExitStack
 from functools import partial
+import hashlib
 import inspect
 from itertools import chain, compress
+import json
+import multiprocessing.util
+import os
+from queue import Empty, Queue
 import re
 import shutil
-from subprocess import check_call, CalledProcessError, DEVNULL
+from subprocess import (check_call, CalledProcessError, DEVNULL, PIPE, Popen,
+                        TimeoutExpired)
+import tempfile
+from threading import Thread
+import time
 from types import MappingProxyType
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
 
 from coalib.bears.LocalBear import LocalBear
-from coalib.misc.ContextManagers import make_temp
 from coala_decorators.decorators import assert_right_type, enforce_signature
 from coalib.misc.Future import partialmethod
-from coalib.misc.Shell import run_shell_command
+from coalib.misc.Shell import run_shell_command, run_shell_commands
 from coalib.results.Diff import Diff
 from coalib.results.Result import Result
 from coalib.results.RESULT_SEVERITY import RESULT_SEVERITY
 from coalib.settings.FunctionMetadata import FunctionMetadata
 
 
+#: The default map of severity strings output by linters to the severities
+#: of results.
+_DEFAULT_SEVERITY_MAP = MappingProxyType({
+    "critical": RESULT_SEVERITY.MAJOR,
+    "c": RESULT_SEVERITY.MAJOR,
+    "fatal": RESULT_SEVERITY.MAJOR,
+    "fail": RESULT_SEVERITY.MAJOR,
+    "f": RESULT_SEVERITY.MAJOR,
+    "error": RESULT_SEVERITY.MAJOR,
+    "err": RESULT_SEVERITY.MAJOR,
+    "e": RESULT_SEVERITY.MAJOR,
+    "warning": RESULT_SEVERITY.NORMAL,
+    "warn": RESULT_SEVERITY.NORMAL,
+    "w": RESULT_SEVERITY.NORMAL,
+    "information": RESULT_SEVERITY.INFO,
+    "info": RESULT_SEVERITY.INFO,
+    "i": RESULT_SEVERITY.INFO,
+    "suggestion": RESULT_SEVERITY.INFO})
+
+#: The default map of the levels of SARIF results to the severities of
+#: results.
+_SARIF_SEVERITY_MAP = MappingProxyType({
+    "error": RESULT_SEVERITY.MAJOR,
+    "warning": RESULT_SEVERITY.NORMAL,
+    "note": RESULT_SEVERITY.INFO,
+    "none": RESULT_SEVERITY.INFO})
+
+#: The result properties that can be read from the issues output by a
+#: linter with the ``json`` output format.
+_JSON_FIELDS = ("file", "line", "column", "end_line", "end_column",
+                "severity", "message", "origin", "additional_info")
+
+
+def _prepare_severity_map(options):
+    """
+    Checks the ``severity_map`` inside given options dict and converts its
+    keys to lower-case in-place.
+
+    :param options:
+        The options dict that contains user/developer inputs.
+    """
+    assert_right_type(options["severity_map"], dict, "severity_map")
+
+    for key, value in options["severity_map"].items():
+        assert_right_type(key, str, "severity_map key")
+
+        try:
+            assert_right_type(value, int, "<severity_map dict-value>")
+        except TypeError:
+            raise TypeError(
+                "The value {!r} for key {!r} inside given "
+                "severity-map is no valid severity value.".format(
+                    value, key))
+
+        if value not in RESULT_SEVERITY.reverse:
+            raise TypeError(
+                "Invalid severity value {!r} for key {!r} inside "
+                "given severity-map.".format(value, key))
+
+    # Auto-convert keys to lower-case. This creates automatically a new
+    # dict which prevents runtime-modifications.
+    options["severity_map"] = {
+        key.lower(): value
+        for key, value in options["severity_map"].items()}
+
+
 def _prepare_options(options):
     """
     Prepares options for ``linter`` for a given options dict in-place.
@@ -32,11 +108,53 @@ def _prepare_options(options):
                        "use_stderr",
                        "config_suffix",
                        "executable_check_fail_info",
-                       "prerequisite_check_command"}
+                       "prerequisite_check_command",
+                       "persistent",
+                       "concurrency"}
 
     if not options["use_stdout"] and not options["use_stderr"]:
         raise ValueError("No output streams provided at all.")
 
+    if options["concurrency"] < 1:
+        raise ValueError("`concurrency` needs to be at least 1.")
+
+    if options["persistent"] and options["concurrency"] > 1:
+        raise ValueError("`concurrency` can't be used when the executable is "
+                         "run persistently.")
+
+    if options["persistent"]:
+        if "persistent_delimiter" not in options:
+            raise ValueError("`persistent_delimiter` needed when the "
+                             "executable is run persistently.")
+
+        if options["use_stderr"] or not options["use_stdout"]:
+            raise ValueError("Only stdout can be used when the executable "
+                             "is run persistently.")
+
+        options["persistent_delimiter"] = re.compile(
+            options["persistent_delimiter"])
+
+        if "persistent_arguments" in options:
+            assert_right_type(options["persistent_arguments"],
+                              tuple,
+                              "persistent_arguments")
+        else:
+            options["persistent_arguments"] = ()
+
+        if "persistent_timeout" in options:
+            assert_right_type(options["persistent_timeout"],
+                              (int, float),
+                              "persistent_timeout")
+            if options["persistent_timeout"] <= 0:
+                raise ValueError("`persistent_timeout` needs to be "
+                                 "positive.")
+        else:
+            options["persistent_timeout"] = 60
+
+        allowed_options |= {"persistent_delimiter",
+                            "persistent_arguments",
+                            "persistent_timeout"}
+
     if options["output_format"] == "corrected":
         if (
                 "diff_severity" in options and
@@ -65,34 +183,41 @@ def _prepare_options(options):
             if "severity" not in options["output_regex"].groupindex:
                 raise ValueError("Provided `severity_map` but named group "
                                  "`severity` is not used in `output_regex`.")
-            assert_right_type(options["severity_map"], dict, "severity_map")
+            _prepare_severity_map(options)
 
-            for key, value in options["severity_map"].items():
-                assert_right_type(key, str, "severity_map key")
+        if "result_message" in options:
+            assert_right_type(options["result_message"], str, "result_message")
 
-                try:
-                    assert_right_type(value, int, "<severity_map dict-value>")
-                except TypeError:
-                    raise TypeError(
-                        "The value {!r} for key {!r} inside given "
-                        "severity-map is no valid severity value.".format(
-                            value, key))
-
-                if value not in RESULT_SEVERITY.reverse:
-                    raise TypeError(
-                        "Invalid severity value {!r} for key {!r} inside "
-                        "given severity-map.".format(value, key))
-
-            # Auto-convert keys to lower-case. This creates automatically a new
-            # dict which prevents runtime-modifications.
-            options["severity_map"] = {
-                key.lower(): value
-                for key, value in options["severity_map"].items()}
+        allowed_options |= {"output_regex", "severity_map", "result_message"}
+    elif options["output_format"] in ("json", "sarif"):
+        if "severity_map" in options:
+            _prepare_severity_map(options)
 
         if "result_message" in options:
             assert_right_type(options["result_message"], str, "result_message")
 
-        allowed_options |= {"output_regex", "severity_map", "result_message"}
+        if options["output_format"] == "json":
+            if "json_mapping" in options:
+                assert_right_type(options["json_mapping"],
+                                  dict,
+                                  "json_mapping")
+                for key, value in options["json_mapping"].items():
+                    if key not in _JSON_FIELDS:
+                        raise ValueError(
+                            "Invalid key {!r} inside given json-mapping."
+                            .format(key))
+                    assert_right_type(value,
+                                      (str, tuple),
+                                      "<json_mapping dict-value>")
+
+            if "json_results_path" in options:
+                assert_right_type(options["json_results_path"],
+                                  tuple,
+                                  "json_results_path")
+
+            allowed_options |= {"json_mapping", "json_results_path"}
+
+        allowed_options |= {"severity_map", "result_message"}
     elif options["output_format"] is not None:
         raise ValueError("Invalid `output_format` specified.")
 
@@ -115,6 +240,210 @@ def _prepare_options(options):
             ", ".join(repr(s) for s in sorted(superfluous_options)))
 
 
+_WHITESPACE = re.compile(r"\s*")
+
+
+def _get_json_value(value, path):
+    """
+    Looks up a value inside decoded JSON.
+
+    >>> _get_json_value({"a": [{"b": 1}]}, ("a", 0, "b"))
+    1
+    >>> _get_json_value({"a": [{"b": 1}]}, ("a", 1, "b")) is None
+    True
+
+    :param value:
+        The decoded JSON.
+    :param path:
+        A tuple of the keys and indices leading to the value.
+    :return:
+        The value or ``None`` if there is no value at the path.
+    """
+    for key in path:
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return value
+
+
+def _uri_to_path(uri):
+    """
+    Converts a URI of a file as used by SARIF to an absolute path. Relative
+    URIs are relative to the current working directory.
+
+    >>> _uri_to_path("file:///a%20b/c.py")
+    '/a b/c.py'
+
+    :param uri:
+        The URI of the file.
+    :return:
+        The absolute path of the file.
+    """
+    uri = urlsplit(str(uri))
+    return os.path.abspath(url2pathname(uri.path))
+
+
+_persistent_processes = {}
+_persistent_processes_pid = None
+PERSISTENT_STOP_TIMEOUT = 5
+
+
+def _read_lines(stream, lines):
+    """
+    Puts the lines read from the given stream into a queue, followed by
+    ``None`` when the stream is at its end, and closes the stream.
+
+    :param stream:
+        The stream to read from.
+    :param lines:
+        The ``queue.Queue`` to put the lines into.
+    """
+    try:
+        for line in iter(stream.readline, ""):
+            lines.put(line)
+    except (OSError, ValueError):
+        pass
+    finally:
+        lines.put(None)
+        stream.close()
+
+
+def _get_persistent_process(command):
+    """
+    Returns the process running the given command persistently, starting it
+    if it is not running yet. The processes are shared by all linters of the
+    current process using the same command and are stopped on exit.
+
+    :param command:
+        A tuple with the executable and its arguments.
+    :return:
+        A tuple with the ``subprocess.Popen`` object of the running process
+        and a ``queue.Queue`` getting the lines of its stdout output, which
+        ends with ``None`` when the process closed it.
+    """
+    global _persistent_processes_pid
+
+    if _persistent_processes_pid != os.getpid():
+        # The processes started before the current process was forked belong
+        # to its parent. Unlike atexit handlers, finalizers are also run when
+        # the processes running bears exit.
+        _persistent_processes.clear()
+        _persistent_processes_pid = os.getpid()
+        multiprocessing.util.Finalize(None,
+                                      _stop_persistent_processes,
+                                      exitpriority=0)
+
+    if (command not in _persistent_processes or
+            _persistent_processes[command][0].poll() is not None):
+        process = Popen(command,
+                        stdin=PIPE,
+                        stdout=PIPE,
+                        stderr=DEVNULL,
+                        universal_newlines=True,
+                        bufsize=1)
+        # Reading in a thread allows to wait for the output with a timeout
+        # on every platform.
+        lines = Queue()
+        Thread(target=_read_lines,
+               args=(process.stdout, lines),
+               daemon=True).start()
+        _persistent_processes[command] = (process, lines)
+
+    return _persistent_processes[command]
+
+
+def _kill_persistent_process(command, process):
+    """
+    Forgets the given persistently running process and kills it if it is
+    still running.
+
+    :param command:
+        The command the process was started with.
+    :param process:
+        The ``subprocess.Popen`` object of the process.
+    """
+    if _persistent_processes.get(command, (None,))[0] is process:
+        del _persistent_processes[command]
+    if process.poll() is None:
+        process.kill()
+    process.wait()
+
+
+def _stop_persistent_processes():
+    """
+    Closes the input of all persistently running processes, which makes them
+    exit, and waits for them. Processes that don't exit within
+    ``PERSISTENT_STOP_TIMEOUT`` seconds are killed.
+    """
+    while _persistent_processes:
+        command, (process, lines) = _persistent_processes.popitem()
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(PERSISTENT_STOP_TIMEOUT)
+        except TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+_config_files = {}
+_config_dir = None
+
+
+def _get_config_file(content, suffix):
+    """
+    Returns the path of a config file with the given content. A file is
+    written only once for every content and suffix and is reused by all
+    linters until the process exits, so config files that only depend on the
+    section settings are not written again for every file.
+
+    :param content:
+        The content of the config file.
+    :param suffix:
+        The suffix of the name of the config file.
+    :return:
+        The path of the config file.
+    """
+    global _config_dir
+
+    key = (hashlib.sha1(content.encode()).hexdigest(), suffix)
+    if key in _config_files:
+        return _config_files[key]
+
+    if _config_dir is None:
+        _config_dir = tempfile.mkdtemp(prefix="coala-config-")
+        # Unlike atexit handlers, finalizers are also run when the processes
+        # running bears exit.
+        multiprocessing.util.Finalize(None,
+                                      _remove_config_files,
+                                      exitpriority=0)
+
+    config_file = os.path.join(_config_dir, key[0] + suffix)
+    # Write to another file first, so no process sees a partial config file.
+    handle, temporary = tempfile.mkstemp(dir=_config_dir)
+    with open(handle, mode="w") as fl:
+        fl.write(content)
+    os.replace(temporary, config_file)
+
+    _config_files[key] = config_file
+    return config_file
+
+
+def _remove_config_files():
+    """
+    Removes all config files created by ``_get_config_file``.
+    """
+    global _config_dir
+
+    if _config_dir is not None:
+        shutil.rmtree(_config_dir, ignore_errors=True)
+        _config_dir = None
+    _config_files.clear()
+
+
 def _create_linter(klass, options):
     class LinterMeta(type):
 
@@ -122,6 +451,10 @@ def _create_linter(klass, options):
             return "<{} linter class (wrapping {!r})>".format(
                 cls.__name__, options["executable"])
 
+    # The named groups used by the regexes the output of the linter is parsed
+    # with, see ``LinterBase._get_output_regex_groups``.
+    output_regex_groups = {}
+
     class LinterBase(LocalBear, metaclass=LinterMeta):
 
         @staticmethod
@@ -238,6 +571,37 @@ def _create_linter(klass, options):
             merged_metadata.desc = inspect.getdoc(cls)
             return merged_metadata
 
+        @staticmethod
+        def _get_output_regex_groups(output_regex):
+            """
+            Looks up which of the named groups a ``Result`` is created from
+            are used by the given regex. The groups are looked up only once
+            for every regex used by the class.
+
+            :param output_regex:
+                The regex to parse the output with.
+            :return:
+                A tuple containing the names of the position groups used and
+                whether the ``severity``, ``message``, ``origin`` and
+                ``additional_info`` groups are used.
+            """
+            if output_regex in output_regex_groups:
+                return output_regex_groups[output_regex]
+
+            output_regex = re.compile(output_regex)
+            if output_regex not in output_regex_groups:
+                groups = output_regex.groupindex
+                output_regex_groups[output_regex] = (
+                    tuple(name
+                          for name in ("line", "column",
+                                       "end_line", "end_column")
+                          if name in groups),
+                    "severity" in groups,
+                    "message" in groups,
+                    "origin" in groups,
+                    "additional_info" in groups)
+            return output_regex_groups[output_regex]
+
         def _convert_output_regex_match_to_result(self,
                                                   match,
                                                   filename,
@@ -250,7 +614,8 @@ def _create_linter(klass, options):
             :param match:
                 The regex match object.
             :param filename:
-                The name of the file this match belongs to.
+                The name of the file this match belongs to. Absolute paths
+                are used as they are.
             :param severity_map:
                 The dict to use to map the severity-match to an actual
                 ``RESULT_SEVERITY``.
@@ -259,42 +624,44 @@ def _create_linter(klass, options):
                 from the executable output via the ``message`` named regex
                 group.
             """
-            # Pre process the groups
+            if not os.path.isabs(filename):
+                filename = os.path.abspath(filename)
+            (position_groups, has_severity, has_message, has_origin,
+             has_additional_info) = self._get_output_regex_groups(match.re)
             groups = match.groupdict()
 
-            if 'severity' in groups:
+            severity = RESULT_SEVERITY.NORMAL
+            if has_severity:
                 try:
-                    groups["severity"] = severity_map[
-                        groups["severity"].lower()]
+                    severity = severity_map[groups["severity"].lower()]
                 except KeyError:
                     self.warn(
                         repr(groups["severity"]) + " not found in "
                         "severity-map. Assuming `RESULT_SEVERITY.NORMAL`.")
-                    groups["severity"] = RESULT_SEVERITY.NORMAL
-            else:
-                groups['severity'] = RESULT_SEVERITY.NORMAL
 
-            for variable in ("line", "column", "end_line", "end_column"):
-                groups[variable] = (None
-                                    if groups.get(variable, None) is None else
-                                    int(groups[variable]))
-
-            if "origin" in groups:
-                groups["origin"] = "{} ({})".format(klass.__name__,
-                                                    groups["origin"].strip())
-
-            # Construct the result.
-            return Result.from_values(
-                origin=groups.get("origin", self),
-                message=(groups.get("message", "").strip()
-                         if result_message is None else result_message),
+            positions = dict.fromkeys(("line", "column",
+                                       "end_line", "end_column"))
+            for name in position_groups:
+                if groups[name] is not None:
+                    positions[name] = int(groups[name])
+
+            if result_message is None:
+                result_message = (groups["message"].strip()
+                                  if has_message else "")
+
+            # The values are known to be valid, so the result is created
+            # without checking the signature, which is much faster for tools
+            # emitting lots of issues.
+            return Result.from_values_unchecked(
+                origin=("{} ({})".format(klass.__name__,
+                                         groups["origin"].strip())
+                        if has_origin else self),
+                message=result_message,
                 file=filename,
-                severity=groups["severity"],
-                line=groups["line"],
-                column=groups["column"],
-                end_line=groups["end_line"],
-                end_column=groups["end_column"],
-                additional_info=groups.get("additional_info", "").strip())
+                severity=severity,
+                additional_info=(groups["additional_info"].strip()
+                                 if has_additional_info else ""),
+                **positions)
 
         def process_output_corrected(self,
                                      output,
@@ -342,22 +709,7 @@ def _create_linter(klass, options):
 
         def process_output_regex(
                 self, output, filename, file, output_regex,
-                severity_map=MappingProxyType({
-                    "critical": RESULT_SEVERITY.MAJOR,
-                    "c": RESULT_SEVERITY.MAJOR,
-                    "fatal": RESULT_SEVERITY.MAJOR,
-                    "fail": RESULT_SEVERITY.MAJOR,
-                    "f": RESULT_SEVERITY.MAJOR,
-                    "error": RESULT_SEVERITY.MAJOR,
-                    "err": RESULT_SEVERITY.MAJOR,
-                    "e": RESULT_SEVERITY.MAJOR,
-                    "warning": RESULT_SEVERITY.NORMAL,
-                    "warn": RESULT_SEVERITY.NORMAL,
-                    "w": RESULT_SEVERITY.NORMAL,
-                    "information": RESULT_SEVERITY.INFO,
-                    "info": RESULT_SEVERITY.INFO,
-                    "i": RESULT_SEVERITY.INFO,
-                    "suggestion": RESULT_SEVERITY.INFO}),
+                severity_map=_DEFAULT_SEVERITY_MAP,
                 result_message=None):
             """
             Processes the executable's output using a regex.
@@ -402,12 +754,245 @@ def _create_linter(klass, options):
             if isinstance(output, str):
                 output = (output,)
 
+            # Made absolute only once instead of for every match.
+            filename = os.path.abspath(filename)
             for string in output:
                 for match in re.finditer(output_regex, string):
                     yield self._convert_output_regex_match_to_result(
                         match, filename, severity_map=severity_map,
                         result_message=result_message)
 
+        def _decode_json(self, output):
+            """
+            Decodes all JSON documents inside the executable's output. The
+            documents are decoded one after another, so a stream of
+            documents like JSON lines is supported as well.
+
+            :param output:
+                The output of the program. This can be either a single
+                string or a sequence of strings.
+            :return:
+                An iterator returning the decoded documents.
+            """
+            if isinstance(output, str):
+                output = (output,)
+
+            decoder = json.JSONDecoder()
+            for string in output:
+                position = 0
+                while True:
+                    position = _WHITESPACE.match(string, position).end()
+                    if position == len(string):
+                        break
+
+                    try:
+                        document, position = decoder.raw_decode(string,
+                                                                position)
+                    except ValueError as error:
+                        self.warn("The output of {!r} could not be decoded "
+                                  "as JSON: {}".format(self.get_executable(),
+                                                       error))
+                        break
+
+                    yield document
+
+        def _create_structured_result(self,
+                                      file,
+                                      severity,
+                                      severity_map,
+                                      result_message,
+                                      message="",
+                                      origin=None,
+                                      additional_info="",
+                                      **positions):
+            """
+            Creates a ``Result`` from the values of an issue decoded from
+            structured output.
+
+            :param file:
+                The absolute path of the file the issue belongs to.
+            :param severity:
+                The severity given for the issue or ``None``.
+            :param severity_map:
+                The dict to use to map the severity to an actual
+                ``RESULT_SEVERITY``.
+            :param result_message:
+                The static message to use for results instead of the message
+                given for the issue.
+            :param message:
+                The message given for the issue.
+            :param origin:
+                The origin given for the issue or ``None``.
+            :param additional_info:
+                Additional info given for the issue.
+            :param positions:
+                The line and column values given for the issue.
+            """
+            if severity is None:
+                severity = RESULT_SEVERITY.NORMAL
+            else:
+                try:
+                    severity = severity_map[str(severity).lower()]
+                except KeyError:
+                    self.warn(
+                        repr(severity) + " not found in severity-map. "
+                        "Assuming `RESULT_SEVERITY.NORMAL`.")
+                    severity = RESULT_SEVERITY.NORMAL
+
+            for name, value in positions.items():
+                positions[name] = None if value is None else int(value)
+
+            return Result.from_values_unchecked(
+                origin=(self if origin is None else
+                        "{} ({})".format(klass.__name__, str(origin).strip())),
+                message=(str(message).strip()
+                         if result_message is None else result_message),
+                file=file,
+                severity=severity,
+                additional_info=str(additional_info).strip(),
+                **positions)
+
+        def process_output_json(self,
+                                output,
+                                filename,
+                                file,
+                                json_mapping=MappingProxyType({}),
+                                json_results_path=(),
+                                severity_map=_DEFAULT_SEVERITY_MAP,
+                                result_message=None):
+            """
+            Processes the executable's output as JSON.
+
+            :param output:
+                The output of the program. This can be either a single
+                string or a sequence of strings, each containing one or
+                more JSON documents.
+            :param filename:
+                The filename of the file currently being processed.
+            :param file:
+                The contents of the file currently being processed.
+            :param json_mapping:
+                A dict mapping result properties to the keys of the issue
+                objects they are read from. Keys of nested objects are given
+                as a tuple of keys. Properties not given are read from the
+                key with the same name. Valid properties are ``file``,
+                ``line``, ``column``, ``end_line``, ``end_column``,
+                ``severity``, ``message``, ``origin`` and
+                ``additional_info``.
+            :param json_results_path:
+                The tuple of keys and indices leading to the list of issues
+                inside every document. By default a document has to be the
+                list of issues.
+            :param severity_map:
+                A dict used to map a severity string to an actual
+                ``coalib.results.RESULT_SEVERITY`` for a result.
+            :param result_message:
+                The static message to use for results instead of the message
+                given by the issues.
+            :return:
+                An iterator returning results.
+            """
+            file = os.path.abspath(filename)
+            paths = {field: json_mapping.get(field, field)
+                     for field in _JSON_FIELDS}
+            paths = {field: (path,) if isinstance(path, str) else path
+                     for field, path in paths.items()}
+
+            for document in self._decode_json(output):
+                issues = _get_json_value(document, json_results_path)
+                for issue in issues if isinstance(issues, list) else ():
+                    if not isinstance(issue, dict):
+                        continue
+
+                    values = {field: _get_json_value(issue, path)
+                              for field, path in paths.items()}
+
+                    # Output for several files is attributed to the files
+                    # one by one.
+                    issue_file = values.pop("file")
+                    if (issue_file is not None and
+                            os.path.abspath(str(issue_file)) != file):
+                        continue
+
+                    values = {field: value
+                              for field, value in values.items()
+                              if value is not None}
+                    yield self._create_structured_result(
+                        file,
+                        values.pop("severity", None),
+                        severity_map,
+                        result_message,
+                        **values)
+
+        def process_output_sarif(self,
+                                 output,
+                                 filename,
+                                 file,
+                                 severity_map=_SARIF_SEVERITY_MAP,
+                                 result_message=None):
+            """
+            Processes the executable's output as a SARIF log, the standard
+            format of static analysis results.
+
+            :param output:
+                The output of the program. This can be either a single
+                string or a sequence of strings.
+            :param filename:
+                The filename of the file currently being processed.
+            :param file:
+                The contents of the file currently being processed.
+            :param severity_map:
+                A dict used to map the level of a SARIF result to an actual
+                ``coalib.results.RESULT_SEVERITY`` for a result.
+            :param result_message:
+                The static message to use for results instead of the
+                messages of the SARIF results.
+            :return:
+                An iterator returning results.
+            """
+            file = os.path.abspath(filename)
+
+            for log in self._decode_json(output):
+                for run in _get_json_value(log, ("runs",)) or ():
+                    for issue in _get_json_value(run, ("results",)) or ():
+                        if not isinstance(issue, dict):
+                            continue
+
+                        location = _get_json_value(
+                            issue, ("locations", 0, "physicalLocation"))
+                        uri = _get_json_value(
+                            location, ("artifactLocation", "uri"))
+                        # Output for several files is attributed to the
+                        # files one by one.
+                        if uri is not None and _uri_to_path(uri) != file:
+                            continue
+
+                        region = _get_json_value(location, ("region",)) or {}
+                        line = region.get("startLine")
+                        column = region.get("startColumn")
+                        end_line = region.get("endLine")
+                        end_column = region.get("endColumn")
+                        if column is None or end_column is None:
+                            end_column = None
+                        else:
+                            # The end column of SARIF regions is exclusive.
+                            end_column = int(end_column) - 1
+                            if end_line in (None, line):
+                                end_column = max(end_column, int(column))
+
+                        yield self._create_structured_result(
+                            file,
+                            issue.get("level"),
+                            severity_map,
+                            result_message,
+                            message=_get_json_value(
+                                issue, ("message", "text")) or "",
+                            origin=issue.get("ruleId"),
+                            line=line,
+                            column=column,
+                            end_line=end_line,
+                            end_column=end_column)
+
         if options["output_format"] is None:
             # Check if user supplied a `process_output` override.
             if not callable(getattr(klass, "process_output", None)):
@@ -435,9 +1020,7 @@ def _create_linter(klass, options):
                 process_output = partialmethod(
                     process_output_corrected, **process_output_args)
 
-            else:
-                assert options["output_format"] == "regex"
-
+            elif options["output_format"] == "regex":
                 process_output_args = {
                     key: options[key]
                     for key in ("output_regex", "severity_map",
@@ -447,12 +1030,34 @@ def _create_linter(klass, options):
                 process_output = partialmethod(
                     process_output_regex, **process_output_args)
 
+            elif options["output_format"] == "json":
+                process_output_args = {
+                    key: options[key]
+                    for key in ("json_mapping", "json_results_path",
+                                "severity_map", "result_message")
+                    if key in options}
+
+                process_output = partialmethod(
+                    process_output_json, **process_output_args)
+
+            else:
+                assert options["output_format"] == "sarif"
+
+                process_output_args = {
+                    key: options[key]
+                    for key in ("severity_map", "result_message")
+                    if key in options}
+
+                process_output = partialmethod(
+                    process_output_sarif, **process_output_args)
+
         @classmethod
         @contextmanager
         def _create_config(cls, filename, file, **kwargs):
             """
             Provides a context-manager that creates the config file if the
-            user provides one and cleans it up when done with linting.
+            user provides one. Config files with the same content are only
+            created once and are cleaned up when the process exits.
 
             :param filename:
                 The filename of the file.
@@ -467,13 +1072,24 @@ def _create_linter(klass, options):
             if content is None:
                 yield None
             else:
-                with make_temp(
-                        suffix=options["config_suffix"]) as config_file:
-                    with open(config_file, mode="w") as fl:
-                        fl.write(content)
-                    yield config_file
+                yield _get_config_file(content, options["config_suffix"])
 
-        def run(self, filename, file, **kwargs):
+        def _create_arguments(self, filename, file, config_file, kwargs):
+            # Retrieve the **kwargs for `create_arguments()`.
+            create_arguments_kwargs = FunctionMetadata.filter_parameters(
+                self._get_create_arguments_metadata(), kwargs)
+
+            return self.create_arguments(filename, file, config_file,
+                                         **create_arguments_kwargs)
+
+        @staticmethod
+        def _select_output(output):
+            output = tuple(compress(
+                output,
+                (options["use_stdout"], options["use_stderr"])))
+            return output[0] if len(output) == 1 else output
+
+        def _execute(self, filename, file, kwargs):
             # Get the **kwargs params to forward to `generate_config()`
             # (from `_create_config()`).
             generate_config_kwargs = FunctionMetadata.filter_parameters(
@@ -483,38 +1099,154 @@ def _create_linter(klass, options):
                     filename,
                     file,
                     **generate_config_kwargs) as config_file:
-                # And now retrieve the **kwargs for `create_arguments()`.
-                create_arguments_kwargs = (
-                    FunctionMetadata.filter_parameters(
-                        self._get_create_arguments_metadata(), kwargs))
-
-                args = self.create_arguments(filename, file, config_file,
-                                             **create_arguments_kwargs)
+                args = self._create_arguments(filename, file, config_file,
+                                              kwargs)
 
                 try:
                     args = tuple(args)
                 except TypeError:
                     self.err("The given arguments "
                              "{!r} are not iterable.".format(args))
-                    return
+                    return None
+
+                if options["persistent"]:
+                    return self._communicate_persistently(args, file)
 
                 arguments = (self.get_executable(),) + args
                 self.debug("Running '{}'".format(' '.join(arguments)))
 
-                output = run_shell_command(
+                return self._select_output(run_shell_command(
                     arguments,
-                    stdin="".join(file) if options["use_stdin"] else None)
+                    stdin="".join(file) if options["use_stdin"] else None))
+
+        #: The outputs of the files passed to ``prepare_files()`` that were
+        #: not processed yet, with the filenames as keys.
+        _prepared_outputs = MappingProxyType({})
+
+        def prepare_files(self, files):
+            """
+            Runs the executable on up to ``concurrency`` of the given files
+            at the same time. The outputs are processed when ``run()`` is
+            called for the files. Does nothing if ``concurrency`` is 1.
+
+            :param files:
+                A dict with the contents of the files as string arrays and
+                the filenames as keys.
+            """
+            self._prepared_outputs = {}
+            if options["concurrency"] == 1 or len(files) < 2:
+                return
+
+            try:
+                kwargs = self.get_metadata().create_params_from_section(
+                    self.section)
+            except ValueError:
+                # Reported when the bear is run.
+                return
+
+            generate_config_kwargs = FunctionMetadata.filter_parameters(
+                self._get_generate_config_metadata(), kwargs)
+
+            with ExitStack() as stack:
+                commands = []
+                for filename, file in files.items():
+                    config_file = stack.enter_context(self._create_config(
+                        filename, file, **generate_config_kwargs))
+                    try:
+                        args = tuple(self._create_arguments(
+                            filename, file, config_file, kwargs))
+                    except TypeError:
+                        # Reported when the bear is run.
+                        continue
+
+                    arguments = (self.get_executable(),) + args
+                    self.debug("Running '{}'".format(' '.join(arguments)))
+                    commands.append(
+                        (filename,
+                         arguments,
+                         "".join(file) if options["use_stdin"] else None))
+
+                outputs = run_shell_commands(
+                    ((arguments, stdin)
+                     for filename, arguments, stdin in commands),
+                    max_concurrency=options["concurrency"])
+
+            for (filename, arguments, stdin), output in zip(commands,
+                                                            outputs):
+                # Commands that failed to start are run again by ``run()``
+                # to report the error.
+                if not isinstance(output, OSError):
+                    self._prepared_outputs[filename] = self._select_output(
+                        output)
+
+        def run(self, filename, file, **kwargs):
+            if filename in self._prepared_outputs:
+                output = self._prepared_outputs.pop(filename)
+            else:
+                output = self._execute(filename, file, kwargs)
+                if output is None:
+                    return
 
-                output = tuple(compress(
-                    output,
-                    (options["use_stdout"], options["use_stderr"])))
-                if len(output) == 1:
-                    output = output[0]
+            process_output_kwargs = FunctionMetadata.filter_parameters(
+                self._get_process_output_metadata(), kwargs)
+            return self.process_output(output, filename, file,
+                                       **process_output_kwargs)
 
-                process_output_kwargs = FunctionMetadata.filter_parameters(
-                    self._get_process_output_metadata(), kwargs)
-                return self.process_output(output, filename, file,
-                                           **process_output_kwargs)
+        def _communicate_persistently(self, args, file):
+            """
+            Sends the arguments for a file to the persistently running
+            executable and reads its output for the file.
+
+            :param args:
+                The arguments created for the file, each one is written on its
+                own line.
+            :param file:
+                The file contents, written after the arguments if
+                ``use_stdin`` is given.
+            :return:
+                The output of the executable up to the line matching
+                ``persistent_delimiter`` or ``None`` if the executable
+                exited or didn't write that line within
+                ``persistent_timeout`` seconds. The executable is killed
+                then, so it is started again for the next file.
+            """
+            command = ((self.get_executable(),) +
+                       options["persistent_arguments"])
+            process, lines = _get_persistent_process(command)
+            self.debug("Sending '{}' to '{}'".format(' '.join(args),
+                                                     ' '.join(command)))
+
+            request = "".join(arg + "\n" for arg in args)
+            if options["use_stdin"]:
+                request += "".join(file)
+
+            output = []
+            deadline = time.monotonic() + options["persistent_timeout"]
+            try:
+                process.stdin.write(request)
+                process.stdin.flush()
+                while True:
+                    line = lines.get(
+                        timeout=max(deadline - time.monotonic(), 0))
+                    if line is None:
+                        break
+                    if options["persistent_delimiter"].match(line):
+                        return "".join(output)
+                    output.append(line)
+            except OSError:
+                pass
+            except Empty:
+                _kill_persistent_process(command, process)
+                self.err("The persistently running executable {!r} did not "
+                         "finish the output for the file within {} "
+                         "seconds.".format(self.get_executable(),
+                                           options["persistent_timeout"]))
+                return None
+
+            _kill_persistent_process(command, process)
+            self.err("The persistently running executable {!r} exited "
+                     "unexpectedly.".format(self.get_executable()))
+            return None
 
         def __repr__(self):
             return "<{} linter object (wrapping {!r}) at {}>".format(
@@ -537,6 +1269,8 @@ def linter(executable: str,
            executable_check_fail_info: str="",
            prerequisite_check_command: tuple=(),
            output_format: (str, None)=None,
+           persistent: bool=False,
+           concurrency: int=1,
            **options):
     """
     Decorator that creates a ``LocalBear`` that is able to process results from
@@ -610,6 +1344,34 @@ def linter(executable: str,
     and ``use_stderr=False`` raises a ``ValueError``. By default ``use_stdout``
     is ``True`` and ``use_stderr`` is ``False``.
 
+    Tools that are slow to start, like ones running on a JVM, or that can
+    stay resident as a server, can be run persistently with
+    ``persistent=True``. The executable is then started only once with the
+    ``persistent_arguments`` and kept running. For every file the arguments
+    returned by ``create_arguments()`` are written to its stdin, each on its
+    own line, followed by the file contents if ``use_stdin`` is given. The
+    stdout output of the executable up to the next line matching
+    ``persistent_delimiter`` is processed as the output for that file:
+
+    >>> @linter("xlintd", persistent=True, persistent_delimiter="^--END--$",
+    ...         output_format="regex", output_regex="...")
+    ... class XLintBear:
+    ...     @staticmethod
+    ...     def create_arguments(filename, file, config_file):
+    ...         return (filename,)
+
+    Tools that spend most of their time waiting, like ones querying a
+    server, can be run on several files at the same time with
+    ``concurrency``. The executable is then run on up to that many of the
+    files a process is about to check at once:
+
+    >>> @linter("xlint", concurrency=4,
+    ...         output_format="regex", output_regex="...")
+    ... class XLintBear:
+    ...     @staticmethod
+    ...     def create_arguments(filename, file, config_file):
+    ...         return "--lint", filename
+
     Documentation:
     Bear description shall be provided at class level.
     If you document your additional parameters inside ``create_arguments``,
@@ -655,8 +1417,36 @@ def linter(executable: str,
           ``output_regex``.
         - ``'corrected'``: The output is the corrected of the given file. Diffs
           are then generated to supply patches for results.
+        - ``'json'``: The output consists of JSON documents containing the
+          issues found. See parameters ``json_mapping`` and
+          ``json_results_path``.
+        - ``'sarif'``: The output is a SARIF log, the standard format for the
+          results of static analysis tools.
+
+        Issues of the ``'json'`` and ``'sarif'`` formats belonging to other
+        files than the one currently processed are left out, so tools
+        checking several files at once can be used as well.
 
         Passing something else raises a ``ValueError``.
+    :param persistent:
+        Whether to keep one instance of the executable running for all files
+        instead of starting it for every file. Only ``use_stdout`` is
+        supported then.
+    :param persistent_delimiter:
+        The regex matching the line the persistently running executable
+        writes to stdout after the output for a file. Needs to be provided if
+        ``persistent`` is ``True``.
+    :param persistent_arguments:
+        A tuple of the arguments the persistently running executable is
+        started with. By default no arguments are passed.
+    :param persistent_timeout:
+        The number of seconds to wait for the output of the persistently
+        running executable for a file. If it takes longer, the executable is
+        killed and started again for the next file. Defaults to 60.
+    :param concurrency:
+        The maximum number of instances of the executable to run at the same
+        time, each one on another file. By default the executable is run on
+        one file after another. Can't be used together with ``persistent``.
     :param output_regex:
         The regex expression as a string that is used to parse the output
         generated by the underlying executable. It should use as many of the
@@ -678,9 +1468,24 @@ def linter(executable: str,
         appropriate properties.
 
         Needs to be provided if ``output_format`` is ``'regex'``.
+    :param json_mapping:
+        A dict mapping the properties of results to the keys of the issue
+        objects output by the executable they are read from, if the
+        ``'json'`` output format is given. Keys of nested objects are given
+        as a tuple of keys. Properties not given are read from the key with
+        the same name. Valid properties are ``file``, ``line``, ``column``,
+        ``end_line``, ``end_column``, ``severity``, ``message``, ``origin``
+        and ``additional_info``. Issues without a ``file`` are attributed to
+        the file currently processed.
+    :param json_results_path:
+        The tuple of keys and indices leading to the list of issues inside
+        every JSON document output by the executable, if the ``'json'``
+        output format is given. By default every document has to be a list
+        of issues.
     :param severity_map:
         A dict used to map a severity string (captured from the
-        ``output_regex`` with the named group ``severity``) to an actual
+        ``output_regex`` with the named group ``severity`` or read from
+        structured output) to an actual
         ``coalib.results.RESULT_SEVERITY`` for a result. Severity strings are
         mapped **case-insensitive**!
 
@@ -688,6 +1493,9 @@ def linter(executable: str,
         - ``RESULT_SEVERITY.NORMAL``: Mapped by ``warning`` or ``warn``.
         - ``RESULT_SEVERITY.MINOR``: Mapped by ``info``.
 
+        The ``'sarif'`` output format maps the SARIF levels ``error``,
+        ``warning``, ``note`` and ``none`` by default.
+
         A ``ValueError`` is raised when the named group ``severity`` is not
         used inside ``output_regex`` and this parameter is given.
     :param diff_severity:
@@ -697,10 +1505,10 @@ def linter(executable: str,
         defined inside ``coalib.results.RESULT_SEVERITY``.
     :param result_message:
         The message-string to use for all results. Can be used only together
-        with ``corrected`` or ``regex`` output format. When using
-        ``corrected``, the default value is ``"Inconsistency found."``, while
-        for ``regex`` this static message is disabled and the message matched
-        by ``output_regex`` is used instead.
+        with ``corrected``, ``regex``, ``json`` or ``sarif`` output format.
+        When using ``corrected``, the default value is
+        ``"Inconsistency found."``, while for the other formats this static
+        message is disabled and the message of the issues is used instead.
     :param diff_distance:
         Number of unchanged lines that are allowed in between two changed lines
         so they get yielded as one diff if ``corrected`` output-format is
@@ -723,6 +1531,8 @@ def linter(executable: str,
     options["config_suffix"] = config_suffix
     options["executable_check_fail_info"] = executable_check_fail_info
     options["prerequisite_check_command"] = prerequisite_check_command
+    options["persistent"] = persistent
+    options["concurrency"] = concurrency
 
     _prepare_options(options)
 
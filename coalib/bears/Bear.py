@@ -203,6 +203,17 @@ class Bear(Printer, LogPrinter):
             self.warn(error_string)
             raise RuntimeError(error_string)
 
+    def __getstate__(self):
+        """
+        Bears are pickled to be sent to the processes running them. Queues
+        can only be shared between processes through inheritance, so the
+        ``message_queue`` is left out and has to be attached again by the
+        receiving process.
+        """
+        state = self.__dict__.copy()
+        state["message_queue"] = None
+        return state
+
     def _print(self, output, **kwargs):
         self.debug(output)
 
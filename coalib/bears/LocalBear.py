@@ -40,6 +40,17 @@ class LocalBear(Bear):
         raise NotImplementedError("This function has to be implemented for a "
                                   "runnable bear.")
 
+    def prepare_files(self, files):
+        """
+        Is called with files the bear is about to be run on, before ``run()``
+        is called for each of them. Bears can override it to do work for
+        several files at once, like starting external tools for all of them.
+
+        :param files: A dict with the contents of the files as string arrays
+                      and the filenames as keys.
+        """
+        pass
+
     @classmethod
     def get_metadata(cls):
         return FunctionMetadata.from_function(
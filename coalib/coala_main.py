@@ -9,15 +9,59 @@ from coalib.misc.Exceptions import get_exitcode
 from coalib.output.Interactions import fail_acquire_settings
 from coalib.output.printers.LogPrinter import LogPrinter
 from coalib.output.printers.LOG_LEVEL import LOG_LEVEL
-from coalib.processes.Processing import execute_section, simplify_section_result
+from coalib.processes.Processing import (
+    execute_section, get_job_count, simplify_section_result)
+from coalib.processes.WorkerPool import WorkerPool
 from coalib.settings.ConfigurationGathering import gather_configuration
-from coalib.misc.Caching import FileCache
+from coalib.misc.Caching import BearCostCache, FileCache, ResultCache
 from coalib.misc.CachingUtilities import (
     settings_changed, update_settings_db, get_settings_hash)
+from coalib.results.ResultBaseline import ResultBaseline
+from coalib.settings.Setting import path
 
 do_nothing = lambda *args: True
 
 
+def get_baseline(section, log_printer):
+    """
+    Creates the ``ResultBaseline`` to check the results with according to the
+    ``baseline`` and ``save_baseline`` settings of the given section.
+
+    :param section:     The section to get the settings from.
+    :param log_printer: The log printer to warn to if the baseline can't be
+                        read.
+    :return:            The baseline or None if no baseline is used.
+    """
+    baseline_file = get_setting_path(section, "baseline")
+    if baseline_file:
+        try:
+            return ResultBaseline.load(baseline_file)
+        except (OSError, ValueError) as exception:
+            log_printer.warn("The baseline {!r} could not be read, all "
+                             "results are reported: {}".format(baseline_file,
+                                                               exception))
+
+    if baseline_file or get_setting_path(section, "save_baseline"):
+        return ResultBaseline()
+
+    return None
+
+
+def get_setting_path(section, key):
+    """
+    :param section: The section to get the setting from.
+    :param key:     The key of the setting.
+    :return:        The absolute path the setting holds, relative paths are
+                    relative to the configuration file the setting comes
+                    from or to the working directory. An empty string if the
+                    setting is not given.
+    """
+    if not str(section.get(key, "")).strip():
+        return ""
+
+    return path(section[key], os.getcwd() + os.sep)
+
+
 def run_coala(log_printer=None,
               print_results=do_nothing,
               acquire_settings=fail_acquire_settings,
@@ -77,31 +121,54 @@ def run_coala(log_printer=None,
                            settings_changed(log_printer, settings_hash))
 
         cache = FileCache(log_printer, os.getcwd(), flush_cache)
-        for section_name, section in sections.items():
-            if not section.is_enabled(targets):
-                continue
-
-            print_section_beginning(section)
-            section_result = execute_section(
-                section=section,
-                global_bear_list=global_bears[section_name],
-                local_bear_list=local_bears[section_name],
-                print_results=print_results,
-                cache=cache,
-                log_printer=log_printer)
-            yielded, yielded_unfixed, results[section_name] = (
-                simplify_section_result(section_result))
-
-            yielded_results = yielded_results or yielded
-            yielded_unfixed_results = (
-                yielded_unfixed_results or yielded_unfixed)
-            did_nothing = False
-
-            file_dicts[section_name] = section_result[3]
+        # Results of local bears on unchanged files are replayed from the
+        # result cache when coala is run only on changed files.
+        # The time the bears needed in previous runs is used to distribute
+        # the files evenly over the processes, it's also kept in a cache.
+        result_cache = None
+        bear_costs = None
+        if sections["default"].get("changed_files", False):
+            result_cache = ResultCache(log_printer, os.getcwd(), flush_cache)
+            bear_costs = BearCostCache(log_printer, os.getcwd(), flush_cache)
+        baseline = get_baseline(sections["default"], log_printer)
+        # The processes of the pool are started lazily by the first section
+        # executed and reused by all following ones.
+        with WorkerPool(get_job_count(sections["default"],
+                                      log_printer)) as pool:
+            for section_name, section in sections.items():
+                if not section.is_enabled(targets):
+                    continue
+
+                print_section_beginning(section)
+                section_result = execute_section(
+                    section=section,
+                    global_bear_list=global_bears[section_name],
+                    local_bear_list=local_bears[section_name],
+                    print_results=print_results,
+                    cache=cache,
+                    log_printer=log_printer,
+                    pool=pool,
+                    result_cache=result_cache,
+                    bear_costs=bear_costs,
+                    baseline=baseline)
+                yielded, yielded_unfixed, results[section_name] = (
+                    simplify_section_result(section_result))
+
+                yielded_results = yielded_results or yielded
+                yielded_unfixed_results = (
+                    yielded_unfixed_results or yielded_unfixed)
+                did_nothing = False
+
+                file_dicts[section_name] = section_result[3]
 
         update_settings_db(log_printer, settings_hash)
+        save_baseline = get_setting_path(sections["default"], "save_baseline")
+        if save_baseline:
+            baseline.write(save_baseline)
         if sections["default"].get("changed_files", False):
             cache.write()
+            result_cache.write()
+            bear_costs.write()
 
         if did_nothing:
             nothing_done(log_printer)
@@ -1,10 +1,15 @@
+import functools
+import hashlib
+import inspect
 import time
 import os
+from collections import OrderedDict
 
 from coala_decorators.decorators import enforce_signature
+from coalib.misc import Constants
 from coalib.output.printers.LogPrinter import LogPrinter
 from coalib.misc.CachingUtilities import (
-    pickle_load, pickle_dump, delete_files)
+    hash_id, pickle_load, pickle_dump, delete_files)
 
 
 class FileCache:
@@ -169,3 +174,294 @@ class FileCache:
                     for file in files
                     if (file not in self.data or
                         int(os.path.getmtime(file)) > self.data[file])}
+
+
+@functools.lru_cache(maxsize=None)
+def get_bear_version(bear_class):
+    """
+    Determines the version of a bear, so results of older versions of it
+    aren't replayed after it was upgraded. Bears have no version number, the
+    hash of the source file of the bear and the version of coala are used
+    instead.
+
+    :param bear_class: The class of the bear.
+    :return:           A string identifying the version of the bear.
+    """
+    try:
+        with open(inspect.getsourcefile(bear_class), "rb") as file:
+            source_hash = hashlib.md5(file.read()).hexdigest()
+    except (OSError, TypeError):
+        # Bears defined interactively or in compiled modules
+        source_hash = ""
+
+    return "{} {}".format(Constants.VERSION, source_hash)
+
+
+class ResultCache:
+    """
+    This object is a persistent cache for the results of local bears. The
+    results are stored per bear, bear settings and file contents so they can
+    be replayed as long as none of those change. Example/Tutorial:
+
+    >>> from pyprint.NullPrinter import NullPrinter
+    >>> from coalib.output.printers.LogPrinter import LogPrinter
+    >>> from coalib.settings.Section import Section
+    >>> log_printer = LogPrinter(NullPrinter())
+
+    To initialize the cache create an instance for the project:
+
+    >>> cache = ResultCache(log_printer, "test", flush_cache=True)
+
+    The key of an entry is created from a bear and the name and the contents
+    of a file:
+
+    >>> class SomeBear:
+    ...     section = Section("default")
+    >>> key = ResultCache.get_key(SomeBear(),
+    ...                           "a.py",
+    ...                           ["line 1\\n", "line 2\\n"])
+    >>> cache.get(key) is None
+    True
+
+    Results are added to the cache after the bear was run and retrieved on
+    the next runs:
+
+    >>> cache.add(key, ["some result"])
+    >>> cache.get(key)
+    ['some result']
+
+    The cache only holds a limited number of entries, if it is full the least
+    recently used ones are dropped:
+
+    >>> cache = ResultCache(log_printer, "test", max_entries=1)
+    >>> cache.add(key, ["some result"])
+    >>> cache.add(("other", "key"), [])
+    >>> cache.get(key) is None
+    True
+
+    Like the ``FileCache`` all operations are lazy, the cache has to be
+    written to disk for persistence in future uses:
+
+    >>> cache.write()
+    """
+
+    @enforce_signature
+    def __init__(
+            self,
+            log_printer: LogPrinter,
+            project_dir: str,
+            flush_cache: bool=False,
+            max_entries: int=10000):
+        """
+        Initialize ResultCache.
+
+        :param log_printer: A LogPrinter object to use for logging.
+        :param project_dir: The root directory of the project to be used
+                            as a key identifier.
+        :param flush_cache: Flush the cache and rebuild it.
+        :param max_entries: The maximum number of entries kept in the cache.
+        """
+        self.log_printer = log_printer
+        self.identifier = "results " + project_dir
+        self.max_entries = max_entries
+
+        self.data = pickle_load(log_printer, self.identifier, OrderedDict())
+        if flush_cache:
+            self.flush_cache()
+        self._evict()
+
+    @staticmethod
+    def get_key(bear, filename, file):
+        """
+        Creates the key of the results of the given bear for the given file.
+        The results refer to the file by its name, so files with the same
+        contents get different keys.
+
+        :param bear:     The bear instance to create the key for. Its settings
+                         and its version are part of the key.
+        :param filename: The name of the file.
+        :param file:     The contents of the file as a sequence of lines.
+        :return:         A hashable key.
+        """
+        bear_class = type(bear)
+        return ("{}.{}".format(bear_class.__module__, bear_class.__qualname__),
+                get_bear_version(bear_class),
+                hash_id(str(getattr(bear, "section", ""))),
+                filename,
+                hash_id("".join(file)))
+
+    def flush_cache(self):
+        """
+        Flushes the cache and deletes the relevant file.
+        """
+        self.data = OrderedDict()
+        delete_files(self.log_printer, [self.identifier])
+        self.log_printer.info("The result cache was successfully flushed.")
+
+    def get(self, key):
+        """
+        Retrieves the results stored for the given key and marks the entry as
+        recently used.
+
+        :param key: A key created by ``get_key``.
+        :return:    The list of results or ``None`` if the cache doesn't hold
+                    results for this key.
+        """
+        if key not in self.data:
+            return None
+
+        self.data.move_to_end(key)
+        return self.data[key]
+
+    def add(self, key, results):
+        """
+        Stores the given results, dropping the least recently used entries if
+        the cache is full.
+
+        :param key:     A key created by ``get_key``.
+        :param results: The list of results to store. The original files of
+                        their diffs are turned into tuples of lines, views on
+                        the contents of the files can't be used in other
+                        runs.
+        """
+        for result in results:
+            for diff in (getattr(result, "diffs", None) or {}).values():
+                if not isinstance(diff.original, (list, tuple)):
+                    diff.original = tuple(diff.original)
+
+        self.data[key] = results
+        self.data.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        while len(self.data) > self.max_entries:
+            self.data.popitem(last=False)
+
+    def write(self):
+        """
+        Writes the cache to disk. Using this object as a contextmanager is
+        preferred (that will automatically call this method on exit).
+        """
+        pickle_dump(self.log_printer, self.identifier, self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.write()
+
+
+class BearCostCache:
+    """
+    This object keeps track of the time bears need to check a line of code,
+    so the cost of checking a file can be estimated before it is checked.
+    Example/Tutorial:
+
+    >>> from pyprint.NullPrinter import NullPrinter
+    >>> from coalib.output.printers.LogPrinter import LogPrinter
+    >>> log_printer = LogPrinter(NullPrinter())
+    >>> cache = BearCostCache(log_printer, "test", flush_cache=True)
+
+    Bears that were never run are assumed to need ``default_cost`` seconds
+    per line:
+
+    >>> cache.get("SomeBear") == BearCostCache.default_cost
+    True
+
+    The time bears needed for a number of lines is added after they were run,
+    the costs follow the recent runs:
+
+    >>> cache.add("SomeBear", 2.0, 1000)
+    >>> cache.get("SomeBear")
+    0.002
+    >>> cache.add("SomeBear", 1.0, 1000)
+    >>> cache.get("SomeBear")
+    0.0015
+
+    The estimated cost of a file is the time all given bears need for its
+    lines:
+
+    >>> cache.estimate(["SomeBear", "OtherBear"], 100) > 0.15
+    True
+
+    Like the ``FileCache`` all operations are lazy, the cache has to be
+    written to disk for persistence in future uses:
+
+    >>> cache.write()
+    """
+
+    #: The cost in seconds per line assumed for bears that were never run.
+    default_cost = 1e-4
+
+    @enforce_signature
+    def __init__(
+            self,
+            log_printer: LogPrinter,
+            project_dir: str,
+            flush_cache: bool=False):
+        """
+        Initialize BearCostCache.
+
+        :param log_printer: A LogPrinter object to use for logging.
+        :param project_dir: The root directory of the project to be used
+                            as a key identifier.
+        :param flush_cache: Flush the cache and rebuild it.
+        """
+        self.log_printer = log_printer
+        self.identifier = "bear costs " + project_dir
+
+        self.data = pickle_load(log_printer, self.identifier, {})
+        if flush_cache:
+            self.flush_cache()
+
+    def flush_cache(self):
+        """
+        Flushes the cache and deletes the relevant file.
+        """
+        self.data = {}
+        delete_files(self.log_printer, [self.identifier])
+
+    def get(self, bear_name):
+        """
+        :param bear_name: The name of the bear.
+        :return:          The time in seconds the bear needs per line.
+        """
+        return self.data.get(bear_name, self.default_cost)
+
+    def add(self, bear_name, seconds, line_count):
+        """
+        Adds the time a bear needed to check some lines. The previous cost of
+        the bear and the one of the new run are averaged.
+
+        :param bear_name:  The name of the bear.
+        :param seconds:    The time the bear needed.
+        :param line_count: The number of lines checked in that time.
+        """
+        cost = seconds / max(line_count, 1)
+        if bear_name in self.data:
+            cost = (self.data[bear_name] + cost) / 2
+
+        self.data[bear_name] = cost
+
+    def estimate(self, bear_names, line_count):
+        """
+        Estimates the time the given bears need to check a file.
+
+        :param bear_names: The names of the bears.
+        :param line_count: The number of lines of the file.
+        :return:           The estimated time in seconds.
+        """
+        return sum(self.get(bear_name) for bear_name in bear_names) * line_count
+
+    def write(self):
+        """
+        Writes the cache to disk. Using this object as a contextmanager is
+        preferred (that will automatically call this method on exit).
+        """
+        pickle_dump(self.log_printer, self.identifier, self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.write()
@@ -0,0 +1,202 @@
+import codecs
+import mmap
+import os
+import re
+import weakref
+from array import array
+from itertools import accumulate, chain, islice
+from collections.abc import Sequence
+
+
+# Lines end like with the universal newlines mode of ``open()``.
+LINE_END_REGEX = re.compile(b"\r\n|\r|\n")
+CHUNK_SIZE = 1024 * 1024
+
+
+def _get_line_offsets(buffer):
+    """
+    Checks that the given data is encoded with UTF-8 and finds its lines. It
+    is processed in chunks, so no copy of all the data is needed.
+
+    :param buffer:              The contents of a file.
+    :return:                    An array of the offsets of the lines and of
+                                the end of the file.
+    :raises UnicodeDecodeError: If the data is not encoded with UTF-8.
+    """
+    offsets = array("Q", [0])
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    universal_newlines = buffer.find(b"\r") != -1
+    for position in range(0, len(buffer), CHUNK_SIZE):
+        chunk = buffer[position:position+CHUNK_SIZE]
+        decoder.decode(chunk)
+        if not universal_newlines:
+            # Splitting is a lot faster than searching every line ending.
+            line_ends = accumulate(
+                chain((position,),
+                      (len(line) + 1 for line in chunk.split(b"\n")[:-1])))
+            offsets.extend(islice(line_ends, 1, None))
+    decoder.decode(b"", True)
+
+    if universal_newlines:
+        offsets.extend(match.end()
+                       for match in LINE_END_REGEX.finditer(buffer))
+    if offsets[-1] != len(buffer):
+        offsets.append(len(buffer))
+    return offsets
+
+
+class MappedFile(Sequence):
+    """
+    The lines of a file that is mapped into memory instead of being read. It
+    behaves like the tuple of lines returned by ``readlines()`` of a file
+    opened in text mode with the UTF-8 encoding: its line endings are
+    converted to ``"\\n"``, slicing it or adding tuples to it gives a tuple
+    of lines and it compares equal to the tuple of its lines.
+
+    Only the positions of the lines in the file are kept in memory, every
+    line is decoded when it is accessed. This saves a lot of memory for large
+    files, but the file may not be changed while it is mapped: use
+    ``release()`` or ``release_all()`` before writing to it.
+
+    >>> import tempfile
+    >>> with tempfile.NamedTemporaryFile() as file:
+    ...     file.write("a = 1\\r\\nb = ü\\n\\nc".encode("utf-8"))
+    ...     file.flush()
+    ...     lines = MappedFile(file.name)
+    ...     lines.release()
+    16
+    >>> lines
+    ('a = 1\\n', 'b = ü\\n', '\\n', 'c')
+    >>> lines[1], len(lines), lines[-2:] == ("\\n", "c")
+    ('b = ü\\n', 4, True)
+    """
+
+    #: The files that are mapped in this process by their ``id()``, so they
+    #: can all be released before a file is changed.
+    _mapped_files = weakref.WeakValueDictionary()
+
+    def __init__(self, filename):
+        """
+        :param filename:           The name of the file to map.
+        :raises OSError:           If the file can't be read.
+        :raises UnicodeDecodeError: If the file is not encoded with UTF-8.
+        """
+        self.filename = filename
+        self._buffer = None
+        self._offsets = _get_line_offsets(self._get_buffer())
+
+    def _get_buffer(self):
+        if self._buffer is None:
+            with open(self.filename, "rb") as file:
+                try:
+                    self._buffer = mmap.mmap(file.fileno(),
+                                             0,
+                                             access=mmap.ACCESS_READ)
+                except ValueError:
+                    # Empty files can't be mapped.
+                    self._buffer = b""
+                else:
+                    MappedFile._mapped_files[id(self)] = self
+
+        return self._buffer
+
+    def release(self):
+        """
+        Copies the contents of the file into memory and unmaps it, so the file
+        can be changed without changing these lines.
+        """
+        buffer = self._get_buffer()
+        if isinstance(buffer, mmap.mmap):
+            self._buffer = buffer[:]
+            buffer.close()
+            MappedFile._mapped_files.pop(id(self), None)
+
+    @classmethod
+    def release_all(cls, filename):
+        """
+        Releases every ``MappedFile`` of this process that maps the given
+        file, so the file can be changed or removed.
+
+        >>> import tempfile
+        >>> with tempfile.NamedTemporaryFile() as file:
+        ...     file.write(b"a\\n")
+        ...     file.flush()
+        ...     lines = MappedFile(file.name), MappedFile(file.name)
+        ...     MappedFile.release_all(file.name)
+        2
+        >>> lines
+        (('a\\n',), ('a\\n',))
+
+        :param filename: The name of the file.
+        """
+        path = os.path.realpath(filename)
+        for mapped_file in list(cls._mapped_files.values()):
+            if os.path.realpath(mapped_file.filename) == path:
+                mapped_file.release()
+
+    def _get_line(self, buffer, index):
+        line = buffer[self._offsets[index]:
+                      self._offsets[index + 1]].decode("utf-8")
+        if line.endswith("\r\n"):
+            return line[:-2] + "\n"
+        if line.endswith("\r"):
+            return line[:-1] + "\n"
+        return line
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            buffer = self._get_buffer()
+            return tuple(self._get_line(buffer, i)
+                         for i in range(*index.indices(len(self))))
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+
+        return self._get_line(self._get_buffer(), index)
+
+    def __iter__(self):
+        buffer = self._get_buffer()
+        for index in range(len(self)):
+            yield self._get_line(buffer, index)
+
+    def __add__(self, other):
+        if isinstance(other, (tuple, MappedFile)):
+            return tuple(self) + tuple(other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, tuple):
+            return other + tuple(self)
+        return NotImplemented
+
+    def __eq__(self, other):
+        if isinstance(other, (tuple, MappedFile)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return repr(tuple(self))
+
+    def __getstate__(self):
+        # Other processes map the file on their own, unless it was released.
+        return {"filename": self.filename,
+                "offsets": self._offsets,
+                "buffer": (None if isinstance(self._buffer, mmap.mmap)
+                           else self._buffer)}
+
+    def __setstate__(self, state):
+        self.filename = state["filename"]
+        self._offsets = state["offsets"]
+        self._buffer = state["buffer"]
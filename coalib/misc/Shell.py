@@ -1,5 +1,7 @@
 from contextlib import contextmanager
 import functools
+from io import BytesIO, TextIOWrapper
+import locale
 import shlex
 from subprocess import PIPE, Popen, call, DEVNULL
 
@@ -105,6 +107,83 @@ def run_shell_command(command, stdin=None, **kwargs):
     return ret
 
 
+def run_shell_commands(commands, max_concurrency=4):
+    """
+    Runs several commands in shell at once and returns the read stdout and
+    stderr data of every command.
+
+    The processes are started and waited for with ``asyncio``, so up to
+    ``max_concurrency`` of them run at the same time without needing a thread
+    for each of them.
+
+    >>> run_shell_commands([(["echo", "A"], None), (["cat"], "B\\n")])
+    [('A\\n', ''), ('B\\n', '')]
+
+    See also ``run_shell_command()``.
+
+    :param commands:        An iterable of tuples containing a command and
+                            the initial input to send to its process or
+                            ``None``. A command can either be a sequence of
+                            arguments or a string that gets splitted using
+                            ``shlex.split()``.
+    :param max_concurrency: The maximum number of processes to run at the
+                            same time.
+    :return:                A list with a tuple ``(stdoutstring,
+                            stderrstring)`` for every command in the given
+                            order. If a process could not be started the
+                            ``OSError`` raised is in its place instead.
+    """
+    commands = [(shlex.split(command) if isinstance(command, str) else
+                 command,
+                 stdin)
+                for command, stdin in commands]
+
+    try:
+        import asyncio
+    except ImportError:  # pragma: no cover
+        # FIXME: Remove when dropping Python 3.3 support.
+        outputs = []
+        for command, stdin in commands:
+            try:
+                outputs.append(run_shell_command(command, stdin))
+            except OSError as exception:
+                outputs.append(exception)
+        return outputs
+
+    encoding = locale.getpreferredencoding(False)
+
+    @asyncio.coroutine
+    def run(semaphore, command, stdin):
+        yield from semaphore.acquire()
+        try:
+            process = yield from asyncio.create_subprocess_exec(
+                *command, stdin=PIPE, stdout=PIPE, stderr=PIPE)
+            output = yield from process.communicate(
+                None if stdin is None else stdin.encode(encoding))
+        except OSError as exception:
+            return exception
+        finally:
+            semaphore.release()
+
+        # Decode like ``universal_newlines`` does.
+        return tuple(TextIOWrapper(BytesIO(data), encoding=encoding).read()
+                     for data in output)
+
+    @asyncio.coroutine
+    def run_all():
+        semaphore = asyncio.Semaphore(max_concurrency)
+        return (yield from asyncio.gather(
+            *(run(semaphore, command, stdin) for command, stdin in commands)))
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(run_all())
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
 def get_shell_type():  # pragma: no cover
     """
     Finds the current shell type based on the outputs of common pre-defined
@@ -118,6 +118,12 @@ coala can also automatically fix your code:
     config_group.add_argument(
         '--flush-cache', const=True, action='store_const',
         help='rebuild the file cache')
+    config_group.add_argument(
+        '--baseline', nargs=1, metavar='FILE',
+        help='report only results that are not in the given baseline file')
+    config_group.add_argument(
+        '--save-baseline', nargs=1, metavar='FILE',
+        help='save the results of this run as a baseline to the given file')
 
     inputs_group = arg_parser.add_argument_group('Inputs')
 
@@ -138,6 +144,15 @@ coala can also automatically fix your code:
         '--limit-files', nargs='+', metavar='FILE',
         help="filter the `--files` argument's matches further")
 
+    inputs_group.add_argument(
+        '--max-file-size', nargs=1, metavar='BYTES',
+        help='leave out files larger than this, files of any size are '
+             'checked by default')
+
+    inputs_group.add_argument(
+        '--skip-generated-files', const=True, action='store_const',
+        help='leave out files marked as generated in their first comments')
+
     inputs_group.add_argument(
         '-d', '--bear-dirs', nargs='+', metavar='DIR',
         help='additional directories which may contain bears')
@@ -1,15 +1,47 @@
+import multiprocessing.queues
+import pickle
 import queue
+import time
 import traceback
+from contextlib import contextmanager
 
 from coalib.bears.BEAR_KIND import BEAR_KIND
 from coalib.bears.GlobalBear import GlobalBear
 from coalib.bears.LocalBear import LocalBear
 from coalib.misc import Constants
+from coalib.processes.IgnoreRangeIndex import (
+    IgnoreRangeIndex, yield_ignore_ranges)
 from coalib.processes.communication.LogMessage import LOG_LEVEL, LogMessage
 from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
+from coalib.processes.ControlQueue import ControlQueue
 from coalib.results.Result import Result
 
 
+#: The exceptions raised when objects can't be pickled.
+PICKLING_ERRORS = (pickle.PicklingError, TypeError, AttributeError)
+
+
+class PickledElement:
+    """
+    An element of a queue that is pickled right away. Queues of the
+    ``multiprocessing`` module pickle their elements in a background thread,
+    which drops elements that can't be pickled without telling anyone. The
+    receiver gets the original element, as the data is unpickled with the
+    element.
+    """
+
+    def __init__(self, element):
+        """
+        :param element: The element to pickle. One of the
+                        ``PICKLING_ERRORS`` is raised if it can't be
+                        pickled.
+        """
+        self.data = pickle.dumps(element)
+
+    def __reduce__(self):
+        return pickle.loads, (self.data,)
+
+
 def send_msg(message_queue, timeout, log_level, *args, delimiter=' ', end=''):
     """
     Puts message into message queue for a LogPrinter to present to the user.
@@ -248,29 +280,33 @@ def run_local_bears_on_file(message_queue,
                             timeout,
                             file_dict,
                             local_bear_list,
-                            local_result_dict,
-                            control_queue,
-                            filename):
+                            filename,
+                            cached_results=None,
+                            bear_times=None):
     """
     This method runs a list of local bears on one file.
 
-    :param message_queue:     A queue that contains messages of type
-                              errors/warnings/debug statements to be printed
-                              in the Log.
-    :param timeout:           The queue blocks at most timeout seconds for a
-                              free slot to execute the put operation on. After
-                              the timeout it returns queue Full exception.
-    :param file_dict:         Dictionary that contains contents of files.
-    :param local_bear_list:   List of local bears to run on file.
-    :param local_result_dict: A Manager.dict that will be used to store local
-                              bear results. A list of all local bear results
-                              will be stored with the filename as key.
-    :param control_queue:     If any result gets written to the result_dict a
-                              tuple containing a CONTROL_ELEMENT (to indicate
-                              what kind of event happened) and either a bear
-                              name(for global results) or a file name to
-                              indicate the result will be put to the queue.
-    :param filename:          The name of file on which to run the bears.
+    :param message_queue:   A queue that contains messages of type
+                            errors/warnings/debug statements to be printed in
+                            the Log.
+    :param timeout:         The queue blocks at most timeout seconds for a free
+                            slot to execute the put operation on. After the
+                            timeout it returns queue Full exception.
+    :param file_dict:       Dictionary that contains contents of files.
+    :param local_bear_list: List of local bears to run on file.
+    :param filename:        The name of file on which to run the bears.
+    :param cached_results:  A dict containing the results of a previous run of
+                            bears on this file with the bear names as keys.
+                            Those bears are not run again, their results are
+                            replayed instead.
+    :param bear_times:      A dict the time every bear needed is added to,
+                            with the bear names as keys and lists containing
+                            the time in seconds and the number of lines
+                            checked as values.
+    :return:                A list of tuples containing the name and the
+                            results of every local bear. Bears that failed
+                            have ``None`` as results. ``None`` if the file is
+                            not in the file dict.
     """
     if filename not in file_dict:
         send_msg(message_queue,
@@ -284,21 +320,32 @@ def run_local_bears_on_file(message_queue,
                  "The given file through the queue is not in the file "
                  "dictionary.")
 
-        return
+        return None
 
+    cached_results = cached_results or {}
     local_result_list = []
+    bear_results = []
     for bear_instance in local_bear_list:
-        result = run_local_bear(message_queue,
-                                timeout,
-                                local_result_list,
-                                file_dict,
-                                bear_instance,
-                                filename)
+        name = getattr(bear_instance, "name", None)
+        if name in cached_results:
+            result = cached_results[name]
+        else:
+            start_time = time.perf_counter()
+            result = run_local_bear(message_queue,
+                                    timeout,
+                                    local_result_list,
+                                    file_dict,
+                                    bear_instance,
+                                    filename)
+            if bear_times is not None and name is not None:
+                bear_time = bear_times.setdefault(name, [0, 0])
+                bear_time[0] += time.perf_counter() - start_time
+                bear_time[1] += len(file_dict[filename])
         if result is not None:
             local_result_list.extend(result)
+        bear_results.append((name, result))
 
-    local_result_dict[filename] = local_result_list
-    control_queue.put((CONTROL_ELEMENT.LOCAL, filename))
+    return bear_results
 
 
 def get_global_dependency_results(global_result_dict, bear_instance):
@@ -332,37 +379,109 @@ def get_global_dependency_results(global_result_dict, bear_instance):
     return dependency_results
 
 
-def get_next_global_bear(timeout,
-                         global_bear_queue,
-                         global_bear_list,
-                         global_result_dict):
+def get_picklable_results(message_queue, timeout, name, results):
     """
-    Retrieves the next global bear.
+    Checks that the results of a bear can be sent to another process.
 
-    :param timeout:            The queue blocks at most timeout seconds for a
-                               free slot to execute the put operation on. After
-                               the timeout it returns queue Full exception.
-    :param global_bear_queue:  queue (read, write) of indexes of global bear
-                               instances in the global_bear_list.
-    :param global_bear_list:   A list containing all global bears to be
-                               executed.
-    :param global_result_dict: A Manager.dict that will be used to store global
-                               results. The list of results of one global bear
-                               will be stored with the bear name as key.
-    :return:                   (bear, bearname, dependency_results)
+    :param message_queue: A queue that contains messages of type
+                          errors/warnings/debug statements to be printed in the
+                          Log.
+    :param timeout:       The queue blocks at most timeout seconds for a free
+                          slot to execute the put operation on. After the
+                          timeout it returns queue Full exception.
+    :param name:          The name of the bear.
+    :param results:       The results of the bear.
+    :return:              The results or ``None`` if they can't be pickled,
+                          like the results of a failed bear.
+    """
+    try:
+        pickle.dumps(results)
+    except PICKLING_ERRORS:
+        send_msg(message_queue,
+                 timeout,
+                 LOG_LEVEL.ERROR,
+                 "The results of the bear {} could not be sent to the main "
+                 "process. Skipping bear...".format(name))
+        send_msg(message_queue,
+                 timeout,
+                 LOG_LEVEL.DEBUG,
+                 "Traceback for error in bear {}:".format(name),
+                 traceback.format_exc(),
+                 delimiter="\n")
+        return None
+
+    return results
+
+
+def put_control_element(message_queue, timeout, control_queue, element):
     """
-    dependency_results = False
+    Puts an element with the results of bears to the control queue. It is
+    pickled right away, so results that can't be pickled are not dropped
+    silently by the queue. Those are reported and replaced by ``None``
+    instead, otherwise the main process would wait for them forever.
 
-    while dependency_results is False:
-        bear_id = global_bear_queue.get(timeout=timeout)
-        bear = global_bear_list[bear_id]
+    :param message_queue: A queue that contains messages of type
+                          errors/warnings/debug statements to be printed in the
+                          Log.
+    :param timeout:       The queue blocks at most timeout seconds for a free
+                          slot to execute the put operation on. After the
+                          timeout it returns queue Full exception.
+    :param control_queue: The queue to put the element to.
+    :param element:       A tuple containing ``CONTROL_ELEMENT.LOCAL`` and the
+                          results of a batch of files or
+                          ``CONTROL_ELEMENT.GLOBAL`` and the results of a
+                          global bear, see ``run``.
+    """
+    try:
+        pickled_element = PickledElement(element)
+    except PICKLING_ERRORS:
+        control_elem, index, results = element
+        if control_elem == CONTROL_ELEMENT.GLOBAL:
+            results = get_picklable_results(message_queue,
+                                            timeout,
+                                            index,
+                                            results)
+        else:
+            results = [
+                (filename,
+                 None if bear_results is None else
+                 [(name, get_picklable_results(message_queue,
+                                               timeout,
+                                               name,
+                                               results_of_bear))
+                  for name, results_of_bear in bear_results],
+                 file_index)
+                for filename, bear_results, file_index in results]
+        element = control_elem, index, results
+        pickled_element = PickledElement(element)
+
+    # Other queues don't pickle their elements.
+    control_queue.put(
+        pickled_element
+        if isinstance(control_queue,
+                      (ControlQueue, multiprocessing.queues.Queue))
+        else element)
+
+
+@contextmanager
+def count_busy_process(busy_processes):
+    """
+    Counts the current process as busy while the context is active.
 
-        dependency_results = (
-            get_global_dependency_results(global_result_dict, bear))
-        if dependency_results is False:
-            global_bear_queue.put(bear_id)
+    :param busy_processes: A ``multiprocessing.Value`` holding the number of
+                           busy processes or ``None``.
+    """
+    if busy_processes is None:
+        yield
+        return
 
-    return bear, dependency_results
+    with busy_processes.get_lock():
+        busy_processes.value += 1
+    try:
+        yield
+    finally:
+        with busy_processes.get_lock():
+            busy_processes.value -= 1
 
 
 def task_done(obj):
@@ -376,112 +495,224 @@ def task_done(obj):
         obj.task_done()
 
 
-def run_local_bears(filename_queue,
-                    message_queue,
-                    timeout,
-                    file_dict,
-                    local_bear_list,
-                    local_result_dict,
-                    control_queue):
+def prepare_local_bears(message_queue,
+                        timeout,
+                        local_bear_list,
+                        batch,
+                        bear_times=None):
+    """
+    Hands the files of a batch to the ``prepare_files`` method of every local
+    bear. Files for which the results of a bear are cached are left out for
+    that bear. Errors are only logged as the bears are run on every single
+    file afterwards anyway.
+
+    :param message_queue:   A queue that contains messages of type
+                            errors/warnings/debug statements to be printed in
+                            the Log.
+    :param timeout:         The queue blocks at most timeout seconds for a free
+                            slot to execute the put operation on. After the
+                            timeout it returns queue Full exception.
+    :param local_bear_list: List of local bears to prepare.
+    :param batch:           A list of tuples containing the file name, the
+                            contents of the file and the cached results of
+                            bears for the file (or ``None``).
+    :param bear_times:      A dict the time every bear needed is added to, see
+                            ``run_local_bears_on_file``.
+    """
+    for bear_instance in local_bear_list:
+        if not isinstance(bear_instance, LocalBear):
+            continue
+
+        name = bear_instance.name
+        files = {filename: file
+                 for filename, file, cached_results in batch
+                 if name not in (cached_results or {})}
+        if not files:
+            continue
+
+        start_time = time.perf_counter()
+        try:
+            bear_instance.prepare_files(files)
+        except:
+            send_msg(message_queue,
+                     timeout,
+                     LOG_LEVEL.DEBUG,
+                     "Preparing the files for the bear {} failed:".format(
+                         name),
+                     traceback.format_exc(),
+                     delimiter="\n")
+        if bear_times is not None:
+            bear_times.setdefault(name, [0, 0])[0] += (time.perf_counter() -
+                                                       start_time)
+
+
+def run_local_bears_on_batch(message_queue,
+                             timeout,
+                             local_bear_list,
+                             control_queue,
+                             batch,
+                             bear_times=None):
     """
-    Run local bears on all the files given.
+    Runs the local bears on the files of an element of the file queue.
+
+    :param message_queue:   A queue that contains messages of type
+                            errors/warnings/debug statements to be printed in
+                            the Log.
+    :param timeout:         The queue blocks at most timeout seconds for a free
+                            slot to execute the put operation on. After the
+                            timeout it returns queue Full exception.
+    :param local_bear_list: List of local bears to run.
+    :param control_queue:   A tuple containing ``CONTROL_ELEMENT.LOCAL``,
+                            ``None`` and a list of tuples will be put to this
+                            queue. The tuples contain the file name, the
+                            results of the bears on the file as returned by
+                            ``run_local_bears_on_file`` and the ignore ranges
+                            of the file as indexed by
+                            ``IgnoreRangeIndex.index_file``. The ignore ranges
+                            are only collected if the bears yielded results,
+                            they are ``None`` otherwise.
+    :param batch:           A list of tuples containing the file name, the
+                            contents of the file and the cached results of
+                            bears for the file (or ``None``).
+    :param bear_times:      A dict the time every bear needed is added to, see
+                            ``run_local_bears_on_file``.
+    """
+    prepare_local_bears(message_queue,
+                        timeout,
+                        local_bear_list,
+                        batch,
+                        bear_times)
+
+    file_results = []
+    for filename, file, cached_results in batch:
+        bear_results = run_local_bears_on_file(message_queue,
+                                               timeout,
+                                               {filename: file},
+                                               local_bear_list,
+                                               filename,
+                                               cached_results,
+                                               bear_times)
+        file_index = None
+        if any(results for name, results in bear_results or ()):
+            file_index = IgnoreRangeIndex.index_file(
+                yield_ignore_ranges({filename: file}))
+        file_results.append((filename, bear_results, file_index))
+
+    put_control_element(message_queue,
+                        timeout,
+                        control_queue,
+                        (CONTROL_ELEMENT.LOCAL, None, file_results))
 
-    :param filename_queue:    queue (read) of file names to check with
-                              local bears.
-    :param message_queue:     A queue that contains messages of type
-                              errors/warnings/debug statements to be printed
-                              in the Log.
-    :param timeout:           The queue blocks at most timeout seconds for a
-                              free slot to execute the put operation on. After
-                              the timeout it returns queue Full exception.
-    :param file_dict:         Dictionary that contains contents of files.
-    :param local_bear_list:   List of local bears to run.
-    :param local_result_dict: A Manager.dict that will be used to store local
-                              bear results. A list of all local bear results
-                              will be stored with the filename as key.
-    :param control_queue:     If any result gets written to the result_dict a
-                              tuple containing a CONTROL_ELEMENT (to indicate
-                              what kind of event happened) and either a bear
-                              name(for global results) or a file name to
-                              indicate the result will be put to the queue.
+
+def run_global_bear_task(message_queue,
+                         timeout,
+                         bear,
+                         dependency_results,
+                         control_queue):
     """
-    try:
-        while True:
-            filename = filename_queue.get(timeout=timeout)
-            run_local_bears_on_file(message_queue,
-                                    timeout,
-                                    file_dict,
-                                    local_bear_list,
-                                    local_result_dict,
-                                    control_queue,
-                                    filename)
-            task_done(filename_queue)
-    except queue.Empty:
-        return
+    Runs a global bear handed to the process.
+
+    :param message_queue:      A queue that contains messages of type
+                               errors/warnings/debug statements to be printed
+                               in the Log.
+    :param timeout:            The queue blocks at most timeout seconds for a
+                               free slot to execute the put operation on.
+                               After the timeout it returns queue Full
+                               exception.
+    :param bear:               The global bear instance to run.
+    :param dependency_results: The results of the dependencies of the bear as
+                               returned by ``get_global_dependency_results``.
+    :param control_queue:      A tuple containing ``CONTROL_ELEMENT.GLOBAL``,
+                               the bear name and the results of the bear will
+                               be put to this queue. The results are ``None``
+                               if the bear failed.
+    """
+    bearname = bear.__class__.__name__
+    if dependency_results is False:
+        send_msg(message_queue,
+                 timeout,
+                 LOG_LEVEL.WARNING,
+                 "The dependencies of the global bear {} are not "
+                 "met. Leaving it out...".format(bearname),
+                 Constants.THIS_IS_A_BUG)
+        result = None
+    else:
+        # Bears sent to another process lost their message queue
+        if isinstance(bear, GlobalBear):
+            bear.message_queue = message_queue
+        result = run_global_bear(message_queue,
+                                 timeout,
+                                 bear,
+                                 dependency_results)
+
+    put_control_element(message_queue,
+                        timeout,
+                        control_queue,
+                        (CONTROL_ELEMENT.GLOBAL, bearname, result))
 
 
 def run_global_bears(message_queue,
                      timeout,
                      global_bear_queue,
-                     global_bear_list,
-                     global_result_dict,
-                     control_queue):
+                     control_queue,
+                     block=True,
+                     busy_processes=None):
     """
     Run all global bears.
 
-    :param message_queue:      A queue that contains messages of type
-                               errors/warnings/debug statements to be printed
-                               in the Log.
-    :param timeout:            The queue blocks at most timeout seconds for a
-                               free slot to execute the put operation on. After
-                               the timeout it returns queue Full exception.
-    :param global_bear_queue:  queue (read, write) of indexes of global bear
-                               instances in the global_bear_list.
-    :param global_bear_list:   list of global bear instances
-    :param global_result_dict: A Manager.dict that will be used to store global
-                               results. The list of results of one global bear
-                               will be stored with the bear name as key.
-    :param control_queue:      If any result gets written to the result_dict a
-                               tuple containing a CONTROL_ELEMENT (to indicate
-                               what kind of event happened) and either a bear
-                               name(for global results) or a file name to
-                               indicate the result will be put to the queue.
+    :param message_queue:     A queue that contains messages of type
+                              errors/warnings/debug statements to be printed in
+                              the Log.
+    :param timeout:           The queue blocks at most timeout seconds for a
+                              free slot to execute the put operation on. After
+                              the timeout it returns queue Full exception.
+    :param global_bear_queue: queue (read) of global bears to run. Every
+                              element is a tuple containing a global bear
+                              instance and the results of its dependencies,
+                              or such a tuple pickled. The queue is read until
+                              it yields ``None``.
+    :param control_queue:     For every global bear a tuple containing
+                              ``CONTROL_ELEMENT.GLOBAL``, the bear name and the
+                              results will be put to this queue.
+    :param block:             Whether to wait for further bears if the queue is
+                              empty. If False, only the bears that are
+                              available already are run.
+    :param busy_processes:    A ``multiprocessing.Value`` counting the
+                              processes that are running bears, see
+                              ``count_busy_process``.
+    :return:                  True if the queue yielded ``None``.
     """
     try:
         while True:
-            bear, dep_results = (
-                get_next_global_bear(timeout,
-                                     global_bear_queue,
-                                     global_bear_list,
-                                     global_result_dict))
-            bearname = bear.__class__.__name__
-            result = run_global_bear(message_queue, timeout, bear, dep_results)
-            if result:
-                global_result_dict[bearname] = result
-                control_queue.put((CONTROL_ELEMENT.GLOBAL, bearname))
-            else:
-                global_result_dict[bearname] = None
+            task = global_bear_queue.get(block=block)
+            if task is None:
+                return True
+
+            with count_busy_process(busy_processes):
+                if isinstance(task, bytes):
+                    task = pickle.loads(task)
+                run_global_bear_task(message_queue,
+                                     timeout,
+                                     *task,
+                                     control_queue=control_queue)
             task_done(global_bear_queue)
     except queue.Empty:
-        return
+        return False
 
 
 def run(file_name_queue,
         local_bear_list,
-        global_bear_list,
         global_bear_queue,
-        file_dict,
-        local_result_dict,
-        global_result_dict,
         message_queue,
         control_queue,
-        timeout=0):
+        timeout=0,
+        busy_processes=None):
     """
     This is the method that is actually runs by processes.
 
     If parameters type is 'queue (read)' this means it has to implement the
-    get(timeout=TIMEOUT) method and it shall raise queue.Empty if the queue
-    is empty up until the end of the timeout. If the queue has the
+    get(block=True) method and it shall raise queue.Empty if the queue is
+    empty and block is False. If the queue has the
     (optional!) task_done() attribute, the run method will call it after
     processing each item.
 
@@ -491,56 +722,124 @@ def run(file_name_queue,
     If the queues raise any exception not specified here the user will get
     an 'unknown error' message. So beware of that.
 
-    :param file_name_queue:    queue (read) of file names to check with local
-                               bears. Each invocation of the run method needs
-                               one such queue which it checks with all the
-                               local bears. The queue could be empty.
-                               (Repeat until queue empty.)
-    :param local_bear_list:    List of local bear instances.
-    :param global_bear_list:   List of global bear instances.
-    :param global_bear_queue:  queue (read, write) of indexes of global bear
-                               instances in the global_bear_list.
-    :param file_dict:          dict of all files as {filename:file}, file as in
-                               file.readlines().
-    :param local_result_dict:  A Manager.dict that will be used to store local
-                               results. A list of all local results.
-                               will be stored with the filename as key.
-    :param global_result_dict: A Manager.dict that will be used to store global
-                               results. The list of results of one global bear
-                               will be stored with the bear name as key.
-    :param message_queue:      queue (write) for debug/warning/error
-                               messages (type LogMessage)
-    :param control_queue:      queue (write). If any result gets written to the
-                               result_dict a tuple containing a CONTROL_ELEMENT
-                               (to indicate what kind of event happened) and
-                               either a bear name (for global results) or a
-                               file name to indicate the result will be put to
-                               the queue. If the run method finished all its
-                               local bears it will put
-                               (CONTROL_ELEMENT.LOCAL_FINISHED, None) to the
-                               queue, if it finished all global ones,
-                               (CONTROL_ELEMENT.GLOBAL_FINISHED, None) will
-                               be put there.
-    :param timeout:            The queue blocks at most timeout seconds for a
-                               free slot to execute the put operation on. After
-                               the timeout it returns queue Full exception.
+    :param file_name_queue:   queue (read) of batches of files to check with
+                              local bears. Each element is a list of tuples
+                              containing the file name, the file as in
+                              file.readlines() and a dict containing the
+                              results of previous runs of bears on the file
+                              with the bear names as keys (or ``None``). Those
+                              bears are not run again on the file. The local
+                              bears are run until the queue yields ``None``,
+                              so files can be put to the queue while the
+                              process is running already.
+    :param local_bear_list:   List of local bear instances.
+    :param global_bear_queue: queue (read) of global bears. Each element is a
+                              tuple containing a global bear instance and the
+                              results of its dependencies, as returned by
+                              ``get_global_dependency_results``. So a bear may
+                              only be put there when all its dependencies are
+                              done. It is read until it yields ``None``. The
+                              bears are run as soon as they are available,
+                              before any further local bears.
+    :param message_queue:     queue (write) for debug/warning/error
+                              messages (type LogMessage)
+    :param control_queue:     queue (write). The results are put there
+                              directly in a tuple containing a CONTROL_ELEMENT
+                              (to indicate what kind of event happened), either
+                              a bear name and the list of results (for every
+                              global bear) or ``None`` and a list of tuples
+                              containing a file name, the results of the
+                              local bears on it and its ignore ranges (for
+                              every batch of files), see
+                              ``run_local_bears_on_batch``. If the run
+                              method finished all its local bears it will put
+                              (CONTROL_ELEMENT.LOCAL_FINISHED, None, times) to
+                              the queue, where times is a dict containing the
+                              time the local bears needed, see
+                              ``run_local_bears_on_file``. If it finished all
+                              global ones,
+                              (CONTROL_ELEMENT.GLOBAL_FINISHED, None, None)
+                              will be put there. Global results may be put
+                              there before local ones.
+    :param timeout:           The queue blocks at most timeout seconds for a
+                              free slot to execute the put operation on. After
+                              the timeout it returns queue Full exception.
+    :param busy_processes:    A ``multiprocessing.Value`` counting the
+                              processes that are running bears, see
+                              ``count_busy_process``.
     """
+    globals_finished = False
+    bear_times = {}
     try:
-        run_local_bears(file_name_queue,
-                        message_queue,
-                        timeout,
-                        file_dict,
-                        local_bear_list,
-                        local_result_dict,
-                        control_queue)
-        control_queue.put((CONTROL_ELEMENT.LOCAL_FINISHED, None))
+        for batch in iter(file_name_queue.get, None):
+            # Global bears don't wait for the local bears to finish. They are
+            # run first so they don't delay the end of the section.
+            globals_finished = globals_finished or run_global_bears(
+                message_queue,
+                timeout,
+                global_bear_queue,
+                control_queue,
+                block=False,
+                busy_processes=busy_processes)
+
+            with count_busy_process(busy_processes):
+                run_local_bears_on_batch(message_queue,
+                                         timeout,
+                                         local_bear_list,
+                                         control_queue,
+                                         batch,
+                                         bear_times)
+            task_done(file_name_queue)
+        control_queue.put((CONTROL_ELEMENT.LOCAL_FINISHED, None, bear_times))
+
+        if not globals_finished:
+            run_global_bears(message_queue,
+                             timeout,
+                             global_bear_queue,
+                             control_queue,
+                             busy_processes=busy_processes)
+        control_queue.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None, None))
+    except (OSError, KeyboardInterrupt):  # pragma: no cover
+        pass
 
-        run_global_bears(message_queue,
-                         timeout,
-                         global_bear_queue,
-                         global_bear_list,
-                         global_result_dict,
-                         control_queue)
-        control_queue.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
+
+def run_worker(job_queue,
+               file_name_queue,
+               global_bear_queue,
+               message_queue,
+               control_queue,
+               busy_processes=None):
+    """
+    This is the method that is run by the processes of a ``WorkerPool``. It
+    executes the ``run`` method for every job it gets until it gets ``None``.
+
+    :param job_queue:         queue (read) of pickled jobs. A job is a dict
+                              holding the local bear list and the timeout to
+                              pass to ``run``.
+    :param file_name_queue:   queue (read) of batches of files to check with
+                              local bears, shared by all processes of the
+                              pool.
+    :param global_bear_queue: queue (read) of global bears to run, shared by
+                              all processes of the pool.
+    :param message_queue:     queue (write) for debug/warning/error messages
+                              (type LogMessage). It is attached to every bear
+                              received.
+    :param control_queue:     queue (write) for control elements and results,
+                              see ``run``.
+    :param busy_processes:    A ``multiprocessing.Value`` counting the
+                              processes of the pool that are running bears.
+    """
+    try:
+        for job in iter(job_queue.get, None):
+            kwargs = pickle.loads(job)
+            for bear in kwargs["local_bear_list"]:
+                bear.message_queue = message_queue
+
+            run(file_name_queue=file_name_queue,
+                global_bear_queue=global_bear_queue,
+                message_queue=message_queue,
+                control_queue=control_queue,
+                busy_processes=busy_processes,
+                **kwargs)
     except (OSError, KeyboardInterrupt):  # pragma: no cover
         pass
@@ -0,0 +1,104 @@
+import multiprocessing
+import pickle
+import queue
+import threading
+from multiprocessing.util import Finalize, register_after_fork
+
+
+class ControlQueue:
+    """
+    A queue that many processes put elements to and one process gets them
+    from, like the results of bears that are sent to the main process. Unlike
+    a ``multiprocessing.Queue`` it exposes the connection the elements arrive
+    at as ``reader``, so the receiving process can wait for elements together
+    with other objects using ``multiprocessing.connection.wait()``.
+
+    Elements are pickled right away when they are put, so an element that
+    can't be pickled raises instead of being dropped silently. They are sent
+    by a background thread though, so putting an element doesn't block until
+    the receiver reads it. The elements put by a process are sent before it
+    exits.
+
+    >>> control_queue = ControlQueue()
+    >>> control_queue.put((1, None, None))
+    >>> control_queue.get(timeout=5)
+    (1, None, None)
+    >>> control_queue.get(timeout=0)
+    Traceback (most recent call last):
+     ...
+    queue.Empty
+    """
+
+    def __init__(self):
+        self.reader, self._writer = multiprocessing.Pipe(duplex=False)
+        self._write_lock = multiprocessing.Lock()
+        self._reset()
+        register_after_fork(self, ControlQueue._reset)
+
+    def _reset(self):
+        # Every process sends its elements with its own thread.
+        self._buffer = None
+
+    def __getstate__(self):
+        return self.reader, self._writer, self._write_lock
+
+    def __setstate__(self, state):
+        self.reader, self._writer, self._write_lock = state
+        self._reset()
+
+    def put(self, element):
+        """
+        Puts an element to the queue.
+
+        :param element: The element to put. One of the
+                        ``BearRunning.PICKLING_ERRORS`` is raised if it
+                        can't be pickled.
+        """
+        data = pickle.dumps(element)
+        if self._buffer is None:
+            self._buffer = queue.Queue()
+            thread = threading.Thread(target=ControlQueue._send,
+                                      args=(self._buffer,
+                                            self._writer,
+                                            self._write_lock),
+                                      daemon=True)
+            thread.start()
+            Finalize(self,
+                     ControlQueue._finish,
+                     args=(self._buffer, thread),
+                     exitpriority=-5)
+
+        self._buffer.put(data)
+
+    @staticmethod
+    def _send(buffer, writer, write_lock):
+        data = buffer.get()
+        while data is not None:
+            with write_lock:
+                writer.send_bytes(data)
+            data = buffer.get()
+
+    @staticmethod
+    def _finish(buffer, thread):
+        buffer.put(None)
+        thread.join()
+
+    def get(self, timeout=None):
+        """
+        Gets the next element of the queue. Only one process may get elements
+        from the queue.
+
+        :param timeout:      The maximal number of seconds to wait for an
+                             element or ``None`` to wait until one arrives.
+        :return:             The next element.
+        :raises queue.Empty: If no element arrived within the timeout.
+        """
+        if not self.reader.poll(timeout):
+            raise queue.Empty
+        return pickle.loads(self.reader.recv_bytes())
+
+    def empty(self):
+        """
+        :return: True if no element is waiting to be read.
+        """
+        return not self.reader.poll()
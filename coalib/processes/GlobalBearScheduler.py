@@ -0,0 +1,131 @@
+from pyprint.NullPrinter import NullPrinter
+
+from coalib.output.printers.LogPrinter import LogPrinter
+from coalib.processes.BearRunning import (
+    PICKLING_ERRORS, get_global_dependency_results)
+
+
+class GlobalBearScheduler:
+    """
+    Hands the global bears of a section to a ``WorkerPool`` as soon as all
+    their dependencies are done. Bears without dependencies are submitted
+    right away, the others are released one by one while the results of
+    their dependencies arrive, so independent bears never wait for each
+    other and dependent ones are run on any free process.
+
+    >>> class A:
+    ...     pass
+    >>> class B:
+    ...     get_dependencies = staticmethod(lambda: [A])
+    >>> class Pool:
+    ...     def submit_global_bear(self, bear, dependency_results):
+    ...         print(bear.__class__.__name__, dependency_results)
+    ...     def finish_global_bears(self):
+    ...         print("finished")
+    >>> scheduler = GlobalBearScheduler([A(), B()], Pool())
+    >>> scheduler.start()
+    A None
+    >>> scheduler.mark_done("A", ["result"])
+    B {'A': ['result']}
+    >>> scheduler.mark_done("B", [])
+    finished
+
+    Bears that can't be submitted to the pool are reported and count as
+    failed bears.
+    """
+
+    def __init__(self, global_bear_list, pool, log_printer=None):
+        """
+        :param global_bear_list: List of global bear instances.
+        :param pool:             The ``WorkerPool`` running the section.
+        :param log_printer:      The log printer to report bears to that
+                                 can't be submitted.
+        """
+        self.pool = pool
+        self.log_printer = log_printer or LogPrinter(NullPrinter())
+        self._finished = False
+        self.results = {}
+        self.unfinished = {bear.__class__.__name__
+                           for bear in global_bear_list}
+        self._bears = global_bear_list
+        self._pending = []
+        self._dependents = {}
+
+        for index, bear in enumerate(global_bear_list):
+            try:
+                dependencies = {dependency.__name__
+                                for dependency in bear.get_dependencies()}
+            except AttributeError:
+                # Invalid bears are reported when they are run.
+                dependencies = set()
+
+            # Missing dependencies are reported when the bear is run.
+            dependencies &= self.unfinished
+            self._pending.append(dependencies)
+            for dependency in dependencies:
+                self._dependents.setdefault(dependency, []).append(index)
+
+    def start(self):
+        """
+        Submits all bears that do not depend on other bears of the section.
+        """
+        # Failing bears release their dependents while being submitted.
+        for index in [index
+                      for index, dependencies in enumerate(self._pending)
+                      if not dependencies]:
+            self._submit(index)
+
+        self._finish_if_done()
+
+    def mark_done(self, bearname, results):
+        """
+        Stores the results of a bear and submits the bears that were waiting
+        for them. Tells the pool when all bears are done.
+
+        :param bearname: The name of the bear that is done.
+        :param results:  The results of the bear or ``None`` if it failed.
+        """
+        if bearname not in self.unfinished:
+            return
+
+        # Failing bears get a None in that dict for dependency resolution
+        self.results[bearname] = results or None
+        self.unfinished.discard(bearname)
+
+        for index in self._dependents.pop(bearname, []):
+            dependencies = self._pending[index]
+            dependencies.discard(bearname)
+            if not dependencies:
+                self._submit(index)
+
+        self._finish_if_done()
+
+    def abort(self):
+        """
+        Marks all bears that are not done as failed, e.g. if their results
+        were lost. The bears depending on them are not run.
+        """
+        for bearname in sorted(self.unfinished):
+            self.mark_done(bearname, None)
+
+    def _finish_if_done(self):
+        if not self.unfinished and not self._finished:
+            self._finished = True
+            self.pool.finish_global_bears()
+
+    def _submit(self, index):
+        bear = self._bears[index]
+        if bear.__class__.__name__ not in self.unfinished:
+            # The bear was aborted already.
+            return
+
+        try:
+            self.pool.submit_global_bear(
+                bear,
+                get_global_dependency_results(self.results, bear))
+        except PICKLING_ERRORS as exception:
+            self.log_printer.log_exception(
+                "The bear {} could not be sent to the processes running "
+                "bears. Skipping bear...".format(bear.__class__.__name__),
+                exception)
+            self.mark_done(bear.__class__.__name__, None)
@@ -0,0 +1,207 @@
+import os
+from bisect import bisect_right
+from itertools import accumulate
+
+from coalib.misc.StringConverter import StringConverter
+from coalib.parsing.Globbing import fnmatch
+from coalib.results.SourceRange import SourceRange
+
+
+def get_ignore_scope(line, keyword):
+    """
+    Retrieves the bears that are to be ignored defined in the given line.
+
+    :param line:    The line containing the ignore declaration.
+    :param keyword: The keyword that was found. Everything after the rightmost
+                    occurrence of it will be considered for the scope.
+    :return:        A list of lower cased bearnames or an empty list (-> "all")
+    """
+    toignore = line[line.rfind(keyword) + len(keyword):]
+    if toignore.startswith("all"):
+        return []
+    else:
+        return list(StringConverter(toignore, list_delimiters=', '))
+
+
+def yield_ignore_ranges(file_dict):
+    """
+    Yields tuples of affected bears and a SourceRange that shall be ignored for
+    those.
+
+    :param file_dict: The file dictionary.
+    """
+    for filename, file in file_dict.items():
+        start = None
+        bears = []
+        stop_ignoring = False
+        for line_number, line in enumerate(file, start=1):
+            # Before lowering all lines ever read, first look for the biggest
+            # common substring, case sensitive: I*gnor*e, start i*gnor*ing.
+            if 'gnor' in line:
+                line = line.lower()
+                if "start ignoring " in line:
+                    start = line_number
+                    bears = get_ignore_scope(line, "start ignoring ")
+                elif "stop ignoring" in line:
+                    stop_ignoring = True
+                    if start:
+                        yield (bears,
+                               SourceRange.from_values(
+                                   filename,
+                                   start,
+                                   1,
+                                   line_number,
+                                   len(file[line_number-1])))
+                elif "ignore " in line:
+                    yield (get_ignore_scope(line, "ignore "),
+                           SourceRange.from_values(filename,
+                                                   line_number,
+                                                   1,
+                                                   line_number+1,
+                                                   len(file[line_number])))
+        if stop_ignoring is False and start is not None:
+            yield (bears,
+                   SourceRange.from_values(filename,
+                                           start,
+                                           1,
+                                           len(file),
+                                           len(file[-1])))
+
+
+def _position_key(position):
+    # Positions without a line or column come first, like in their ordering.
+    return (-1 if position.line is None else position.line,
+            -1 if position.column is None else position.column)
+
+
+class IgnoreRangeIndex:
+    """
+    An index of the ranges of code in which the results of some bears are to
+    be ignored. The ranges are sorted by file and start position once, so
+    finding the ranges a result overlaps doesn't need to look at all ranges
+    of the project. The ranges of a file can be collected by the process
+    checking it and added with ``add_file``, or they are collected from a
+    given file dict only when a result affects the file:
+
+    >>> from coalib.results.Result import Result
+    >>> from coalib.results.SourceRange import SourceRange
+    >>> index = IgnoreRangeIndex([
+    ...     (["pep8bear"], SourceRange.from_values("a.py", 1, 1, 2, 2)),
+    ...     ([], SourceRange.from_values("a.py", 5, 1, 5, 8))])
+    >>> index.ignores(Result.from_values("PEP8Bear", "msg", "a.py", 2, 1))
+    True
+    >>> index.ignores(Result.from_values("OtherBear", "msg", "a.py", 2, 1))
+    False
+    >>> index.ignores(Result.from_values("OtherBear", "msg", "a.py", 5, 1))
+    True
+    >>> index.ignores(Result.from_values("PEP8Bear", "msg", "b.py", 2, 1))
+    False
+    >>> file_dict = {"b.py": ("# Ignore all\\n", "a = 1\\n")}
+    >>> index = IgnoreRangeIndex(file_dict=file_dict)
+    >>> index.ignores(Result.from_values("PEP8Bear", "msg", "b.py", 2, 1))
+    True
+    """
+
+    def __init__(self, ignore_ranges=(), file_dict=None):
+        """
+        :param ignore_ranges: An iterable of tuples, each containing a list of
+                              lower cased affected bearnames and a SourceRange
+                              to ignore. If any of the bearname lists is
+                              empty, it is considered an ignore range for all
+                              bears. This may be a list of globbed bear
+                              wildcards.
+        :param file_dict:     A dict containing the contents of files with the
+                              file names as keys. The ignore ranges of a file
+                              are collected from it as soon as a result
+                              affects it and it was not added to the index
+                              yet.
+        """
+        files = {}
+        for bears, range in ignore_ranges:
+            files.setdefault(range.file, []).append((bears, range))
+
+        self._files = {filename: self.index_file(ranges)
+                       for filename, ranges in files.items()}
+        self._unscanned_files = {
+            os.path.abspath(filename): filename
+            for filename in (file_dict or {})
+            if os.path.abspath(filename) not in self._files}
+        self.file_dict = file_dict
+        self._bear_matches = {}
+
+    @staticmethod
+    def index_file(ignore_ranges):
+        """
+        Indexes the ignore ranges of a single file.
+
+        :param ignore_ranges: An iterable of tuples containing a list of bear
+                              names and a SourceRange, like yielded by
+                              ``yield_ignore_ranges``.
+        :return:              A compact index of the ranges of the file that
+                              can be added to an ``IgnoreRangeIndex`` with
+                              ``add_file``.
+        """
+        ranges = sorted(((_position_key(range.start),
+                          _position_key(range.end),
+                          tuple(bears))
+                         for bears, range in ignore_ranges),
+                        key=lambda ignore_range: ignore_range[0])
+        # The largest end of all ranges starting before a given one tells
+        # when no earlier range can overlap anymore.
+        return ([start for start, end, bears in ranges],
+                list(accumulate((end for start, end, bears in ranges), max)),
+                ranges)
+
+    def add_file(self, filename, file_index):
+        """
+        Adds the ignore ranges of a file, replacing the ones known so far.
+
+        :param filename:   The name of the file.
+        :param file_index: The index of the ranges of the file as created by
+                           ``index_file``.
+        """
+        filename = os.path.abspath(filename)
+        self._unscanned_files.pop(filename, None)
+        self._files[filename] = file_index
+
+    def _get_file_index(self, filename):
+        if filename in self._unscanned_files:
+            name = self._unscanned_files.pop(filename)
+            self._files[filename] = self.index_file(
+                yield_ignore_ranges({name: self.file_dict[name]}))
+
+        return self._files.get(filename)
+
+    def _matches(self, bears, origin):
+        key = (bears, origin)
+        if key not in self._bear_matches:
+            self._bear_matches[key] = (len(bears) == 0 or
+                                       origin in bears or
+                                       fnmatch(origin, bears))
+        return self._bear_matches[key]
+
+    def ignores(self, result):
+        """
+        Determines if the result has to be ignored.
+
+        :param result: The result that needs to be checked.
+        :return:       True if the result overlaps with a range in which the
+                       results of its origin are ignored.
+        """
+        origin = result.origin.lower()
+        for code in result.affected_code:
+            file_index = self._get_file_index(code.file)
+            if file_index is None:
+                continue
+
+            starts, max_ends, ranges = file_index
+            start = _position_key(code.start)
+            # Only ranges starting before the end of the code can overlap.
+            index = bisect_right(starts, _position_key(code.end))
+            while index > 0 and max_ends[index - 1] >= start:
+                index -= 1
+                range_end, bears = ranges[index][1:]
+                if range_end >= start and self._matches(bears, origin):
+                    return True
+
+        return False
@@ -1,24 +1,24 @@
-import queue
 import threading
 
 
 class LogPrinterThread(threading.Thread):
     """
     This is the Thread object that outputs all log messages it gets from
-    its message_queue. Setting obj.running = False will stop within the next
-    0.1 seconds.
+    its message_queue. Calling obj.stop() makes it stop as soon as it printed
+    all messages put to the queue before.
     """
 
     def __init__(self, message_queue, log_printer):
         threading.Thread.__init__(self)
-        self.running = True
         self.message_queue = message_queue
         self.log_printer = log_printer
 
     def run(self):
-        while self.running:
-            try:
-                elem = self.message_queue.get(timeout=0.1)
-                self.log_printer.log_message(elem)
-            except queue.Empty:
-                pass
+        for elem in iter(self.message_queue.get, None):
+            self.log_printer.log_message(elem)
+
+    def stop(self):
+        """
+        Puts the end-of-work sentinel to the message queue.
+        """
+        self.message_queue.put(None)
@@ -1,24 +1,31 @@
 import multiprocessing
+import multiprocessing.connection
 import os
+import pickle
 import platform
 import queue
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
 
 from coalib.collecting import Dependencies
 from coalib.collecting.Collectors import collect_files
-from coalib.misc.StringConverter import StringConverter
+from coalib.misc.MappedFile import MappedFile
 from coalib.output.printers.LOG_LEVEL import LOG_LEVEL
-from coalib.processes.BearRunning import run
+from coalib.processes.BearRunning import PICKLING_ERRORS
 from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
+from coalib.processes.ControlQueue import ControlQueue
+from coalib.processes.GlobalBearScheduler import GlobalBearScheduler
+from coalib.processes.IgnoreRangeIndex import IgnoreRangeIndex
 from coalib.processes.LogPrinterThread import LogPrinterThread
+from coalib.processes.SharedFileStore import SharedFileStore, SharedFileView
+from coalib.processes.WorkerPool import WorkerPool
 from coalib.results.Result import Result
 from coalib.results.result_actions.ApplyPatchAction import ApplyPatchAction
 from coalib.results.result_actions.PrintDebugMessageAction import (
     PrintDebugMessageAction)
 from coalib.results.result_actions.ShowPatchAction import ShowPatchAction
 from coalib.results.RESULT_SEVERITY import RESULT_SEVERITY
-from coalib.results.SourceRange import SourceRange
 from coalib.settings.Setting import glob_list
 from coalib.parsing.Globbing import fnmatch
 
@@ -27,6 +34,27 @@ ACTIONS = [ApplyPatchAction,
            PrintDebugMessageAction,
            ShowPatchAction]
 
+#: Files of at least this many bytes are mapped into memory instead of being
+#: read, see ``MappedFile``.
+MAPPED_FILE_SIZE = 1024 * 1024
+
+#: The number of bytes at the start of files that are looked at to detect
+#: binary and generated files.
+SNIFF_SIZE = 8192
+
+#: The number of seconds without control elements after which the processes
+#: are checked for being idle, see ``process_queues``.
+CONTROL_ELEMENT_TIMEOUT = 5
+
+#: Files with a comment containing one of these markers at their start are
+#: generated.
+GENERATED_FILE_MARKERS = (b"@generated", b"DO NOT EDIT", b"Code generated by")
+
+#: The prefixes of the comment lines at the start of files that are searched
+#: for ``GENERATED_FILE_MARKERS``.
+HEADER_COMMENT_PREFIXES = (b"#", b"//", b"/*", b"*", b"--", b";", b"%",
+                           b"<!--")
+
 
 def get_cpu_count():
     try:
@@ -51,6 +79,97 @@ def get_running_processes(processes):
     return sum((1 if process.is_alive() else 0) for process in processes)
 
 
+def processes_lost(processes, pending_count):
+    """
+    Checks whether the processes that did not report their completion yet can
+    not do so anymore because too many of them have ended already. Processes
+    of a ``WorkerPool`` keep running after they have finished a section, so
+    only ended processes indicate that a completion report is missing.
+
+    :param processes:     The processes working on the section, including the
+                          logger thread.
+    :param pending_count: The number of processes that did not report their
+                          completion yet, including the logger thread which
+                          never does.
+    :return:              True if no more completion reports can be expected.
+    """
+    return (len(processes) - get_running_processes(processes) >=
+            pending_count - 1)
+
+
+def check_lost_global_bears(busy_processes,
+                            global_bear_scheduler,
+                            idle_timeouts,
+                            log_printer):
+    """
+    Checks if the results of global bears were lost, after no control
+    element arrived within the ``CONTROL_ELEMENT_TIMEOUT``. If the processes
+    were idle at the end of two such timeouts in a row, no results can
+    arrive anymore: the global bears that are not done are aborted, so the
+    processes are told that all global bears were submitted and finish the
+    section.
+
+    :param busy_processes:        A ``multiprocessing.Value`` counting the
+                                  processes that are running bears or
+                                  ``None``.
+    :param global_bear_scheduler: The ``GlobalBearScheduler`` of the section
+                                  or ``None``.
+    :param idle_timeouts:         The number of timeouts in a row so far at
+                                  the end of which the processes were idle.
+    :param log_printer:           The log printer to warn to.
+    :return:                      The number of timeouts in a row at the end
+                                  of which the processes were idle, including
+                                  this one.
+    """
+    if (busy_processes is None or
+            global_bear_scheduler is None or
+            not global_bear_scheduler.unfinished or
+            busy_processes.value > 0):
+        return 0
+
+    if idle_timeouts < 1:
+        return idle_timeouts + 1
+
+    log_printer.warn("The results of the global bears {} were lost. "
+                     "Skipping them...".format(
+                         ", ".join(sorted(global_bear_scheduler.unfinished))))
+    global_bear_scheduler.abort()
+    return 0
+
+
+def get_control_element(control_queue, processes, timeout=None):
+    """
+    Waits for the next element of the control queue. A ``ControlQueue`` is
+    waited on together with the given processes, so the wait ends as soon as
+    an element arrives or a process ends, without any polling delay. Other
+    queues are polled.
+
+    :param control_queue: The queue to get the element from.
+    :param processes:     The processes putting elements to the queue.
+    :param timeout:       The maximal number of seconds to wait for the
+                          processes or ``None`` to wait until an element
+                          arrives or a process ends.
+    :return:              The next element of the queue.
+    :raises queue.Empty:  If a process ended before an element arrived, if
+                          no element arrived within the timeout, or if no
+                          element arrived within 0.1 seconds for queues that
+                          can't be waited on.
+    """
+    if not isinstance(control_queue, ControlQueue):
+        return control_queue.get(timeout=0.1)
+
+    sentinels = [process.sentinel
+                 for process in processes
+                 if process.is_alive() and hasattr(process, "sentinel")]
+    # Without running processes only the elements present already can arrive
+    ready = multiprocessing.connection.wait([control_queue.reader] + sentinels,
+                                            timeout=timeout if sentinels
+                                            else 0)
+    if control_queue.reader not in ready:
+        raise queue.Empty
+    return control_queue.get()
+
+
 def create_process_group(command_array, **kwargs):
     if platform.system() == "Windows":  # pragma: no cover
         proc = subprocess.Popen(
@@ -169,20 +288,18 @@ def check_result_ignore(result, ignore_ranges):
     Determines if the result has to be ignored.
 
     :param result:        The result that needs to be checked.
-    :param ignore_ranges: A list of tuples, each containing a list of lower
-                          cased affected bearnames and a SourceRange to
-                          ignore. If any of the bearname lists is empty, it
-                          is considered an ignore range for all bears.
-                          This may be a list of globbed bear wildcards.
+    :param ignore_ranges: An ``IgnoreRangeIndex`` or a list of tuples, each
+                          containing a list of lower cased affected bearnames
+                          and a SourceRange to ignore. If any of the bearname
+                          lists is empty, it is considered an ignore range for
+                          all bears. This may be a list of globbed bear
+                          wildcards.
     :return:              True if the result has to be ignored.
     """
-    for bears, range in ignore_ranges:
-        orig = result.origin.lower()
-        if (result.overlaps(range) and
-                (len(bears) == 0 or orig in bears or fnmatch(orig, bears))):
-            return True
+    if not isinstance(ignore_ranges, IgnoreRangeIndex):
+        ignore_ranges = IgnoreRangeIndex(ignore_ranges)
 
-    return False
+    return ignore_ranges.ignores(result)
 
 
 def print_result(results,
@@ -192,7 +309,8 @@ def print_result(results,
                  section,
                  log_printer,
                  file_diff_dict,
-                 ignore_ranges):
+                 ignore_ranges,
+                 baseline=None):
     """
     Takes the results produced by each bear and gives them to the print_results
     method to present to the user.
@@ -208,18 +326,26 @@ def print_result(results,
                            to the output medium.
     :param file_diff_dict: A dictionary that contains filenames as keys and
                            diff objects as values.
-    :param ignore_ranges:  A list of SourceRanges. Results that affect code in
-                           any of those ranges will be ignored.
+    :param ignore_ranges:  The ranges in which results are ignored as an
+                           ``IgnoreRangeIndex`` or a list, see
+                           ``check_result_ignore``.
+    :param baseline:       A ``ResultBaseline`` holding the results that are
+                           not reported. All other results are recorded in
+                           it.
     :return:               Returns False if any results were yielded. Else
                            True.
     """
     min_severity_str = str(section.get('min_severity', 'INFO')).upper()
     min_severity = RESULT_SEVERITY.str_dict.get(min_severity_str, 'INFO')
+    if not isinstance(ignore_ranges, IgnoreRangeIndex):
+        ignore_ranges = IgnoreRangeIndex(ignore_ranges)
     results = list(filter(lambda result:
                           type(result) is Result and
                           result.severity >= min_severity and
                           not check_result_ignore(result, ignore_ranges),
                           results))
+    if baseline is not None:
+        results = baseline.check(results, file_dict)
 
     if bool(section.get('autoapply', 'true')):
         patched_results = autoapply_actions(results,
@@ -238,30 +364,151 @@ def print_result(results,
     return retval or len(results) > 0, patched_results
 
 
-def get_file_dict(filename_list, log_printer):
+def is_generated_file(head):
     """
-    Reads all files into a dictionary.
+    Checks if one of the ``GENERATED_FILE_MARKERS`` is in the comment lines
+    at the start of a file, before any code. Markers in the code, like in
+    strings, are not taken into account:
+
+    >>> is_generated_file(b"#!/bin/sh\\n\\n# DO NOT EDIT\\nexit 0\\n")
+    True
+    >>> is_generated_file(b"MARKER = 'DO NOT EDIT'\\n")
+    False
 
-    :param filename_list: List of names of paths to files to get contents of.
-    :param log_printer:   The logger which logs errors.
-    :return:              Reads the content of each file into a dictionary
-                          with filenames as keys.
+    :param head: The bytes at the start of the file.
+    :return:     Whether the file seems to be generated.
     """
-    file_dict = {}
-    for filename in filename_list:
+    for line in head.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith(HEADER_COMMENT_PREFIXES):
+            return False
+        if any(marker in line for marker in GENERATED_FILE_MARKERS):
+            return True
+
+    return False
+
+
+def get_skip_reason(filename, max_file_size=None, skip_generated=False):
+    """
+    Checks if a file should be left out before it is read. Only the size and
+    the start of the file are looked at, so large and binary files are
+    rejected without reading and decoding them completely:
+
+    >>> import tempfile
+    >>> with tempfile.NamedTemporaryFile() as file:
+    ...     _ = file.write(b"// Code generated by a tool. DO NOT EDIT.\\n")
+    ...     file.flush()
+    ...     get_skip_reason(file.name) is None
+    ...     get_skip_reason(file.name, skip_generated=True)
+    ...     get_skip_reason(file.name, max_file_size=10)
+    True
+    'it seems to be generated'
+    'it is larger than 10 bytes'
+
+    :param filename:       The name of the file.
+    :param max_file_size:  The maximal size of the file in bytes. If it is
+                           ``None`` or 0, files of any size are accepted.
+    :param skip_generated: Whether files with one of the
+                           ``GENERATED_FILE_MARKERS`` in the comments at
+                           their start are left out, see
+                           ``is_generated_file``.
+    :return:               A message telling why the file is left out or
+                           ``None`` if it should be read.
+    :raises OSError:       If the file can't be read.
+    """
+    if max_file_size and os.path.getsize(filename) > max_file_size:
+        return "it is larger than {} bytes".format(max_file_size)
+
+    with open(filename, "rb") as file:
+        head = file.read(SNIFF_SIZE)
+
+    if b"\0" in head:
+        return "it seems to be a binary file"
+    if skip_generated and is_generated_file(head):
+        return "it seems to be generated"
+
+    return None
+
+
+def load_files(filename_list,
+               log_printer,
+               max_file_size=None,
+               skip_generated=False):
+    """
+    Reads the given files concurrently. The contents are yielded as soon as
+    each file is read, keeping the order of the given list. Files that can't
+    be read are left out with a warning, like files rejected by
+    ``get_skip_reason``. Large files are mapped into memory as
+    ``MappedFile`` instead of being read into a tuple of lines.
+
+    :param filename_list:  List of names of paths to files to get contents
+                           of.
+    :param log_printer:    The logger which logs errors.
+    :param max_file_size:  The maximal size of the files in bytes, larger
+                           files are left out. If it is ``None`` or 0, files
+                           of any size are read.
+    :param skip_generated: Whether generated files are left out.
+    :return:               A generator yielding tuples containing the name
+                           and the lines of each file.
+    """
+    def read_file(filename):
         try:
+            skip_reason = get_skip_reason(filename,
+                                          max_file_size,
+                                          skip_generated)
+            if skip_reason is not None:
+                return None, skip_reason
+
+            if os.path.getsize(filename) >= MAPPED_FILE_SIZE:
+                return MappedFile(filename), None
+
             with open(filename, "r", encoding="utf-8") as _file:
-                file_dict[filename] = tuple(_file.readlines())
-        except UnicodeDecodeError:
-            log_printer.warn("Failed to read file '{}'. It seems to contain "
-                             "non-unicode characters. Leaving it "
-                             "out.".format(filename))
-        except OSError as exception:  # pragma: no cover
-            log_printer.log_exception("Failed to read file '{}' because of "
-                                      "an unknown error. Leaving it "
-                                      "out.".format(filename),
-                                      exception,
-                                      log_level=LOG_LEVEL.WARNING)
+                return tuple(_file.readlines()), None
+        except (UnicodeDecodeError, OSError) as exception:
+            return None, exception
+
+    with ThreadPoolExecutor(max_workers=get_cpu_count() + 4) as executor:
+        for filename, (file, exception) in zip(
+                filename_list, executor.map(read_file, filename_list)):
+            if isinstance(exception, str):
+                log_printer.warn("Leaving out file '{}' because {}.".format(
+                    filename, exception))
+            elif isinstance(exception, UnicodeDecodeError):
+                log_printer.warn("Failed to read file '{}'. It seems to "
+                                 "contain non-unicode characters. Leaving it "
+                                 "out.".format(filename))
+            elif exception is not None:
+                log_printer.log_exception("Failed to read file '{}' because "
+                                          "of an unknown error. Leaving it "
+                                          "out.".format(filename),
+                                          exception,
+                                          log_level=LOG_LEVEL.WARNING)
+            else:
+                yield filename, file
+
+
+def get_file_dict(filename_list,
+                  log_printer,
+                  max_file_size=None,
+                  skip_generated=False):
+    """
+    Reads all files into a dictionary.
+
+    :param filename_list:  List of names of paths to files to get contents
+                           of.
+    :param log_printer:    The logger which logs errors.
+    :param max_file_size:  The maximal size of the files in bytes, see
+                           ``load_files``.
+    :param skip_generated: Whether generated files are left out.
+    :return:               Reads the content of each file into a dictionary
+                           with filenames as keys.
+    """
+    file_dict = dict(load_files(filename_list,
+                                log_printer,
+                                max_file_size,
+                                skip_generated))
 
     log_printer.debug("Files that will be checked:\n" +
                       "\n".join(file_dict.keys()))
@@ -322,26 +569,114 @@ def instantiate_bears(section,
     return local_bear_list, global_bear_list
 
 
-def instantiate_processes(section,
-                          local_bear_list,
-                          global_bear_list,
-                          job_count,
-                          cache,
-                          log_printer):
+def sort_by_size(filename_list):
+    """
+    Sorts the given files by size, largest first, so that no large file is
+    checked last and delays the end of the run. Files that can't be accessed
+    are put last, files of the same size keep their order.
+
+    :param filename_list: List of file names.
+    :return:              The sorted list of file names.
+    """
+    def get_size(filename):
+        try:
+            return os.path.getsize(filename)
+        except OSError:
+            return 0
+
+    return sorted(filename_list, key=get_size, reverse=True)
+
+
+def get_cached_results(result_cache, local_bear_list, filename, file):
     """
-    Instantiate the number of processes that will run bears which will be
-    responsible for running bears in a multiprocessing environment.
+    Looks up the results of the given local bears for a file in the result
+    cache.
+
+    :param result_cache:    An instance of ``misc.Caching.ResultCache``.
+    :param local_bear_list: List of local bear instances.
+    :param filename:        The name of the file the bears are run on.
+    :param file:            The contents of the file the bears are run on.
+    :return:                A tuple containing a dict with the cached results
+                            and a dict with the cache keys of the results that
+                            are not cached. Both have the bear names as keys.
+    """
+    cached_results = {}
+    cache_keys = {}
+    for bear in local_bear_list:
+        key = result_cache.get_key(bear, filename, file)
+        results = result_cache.get(key)
+        if results is None:
+            cache_keys[bear.name] = key
+        else:
+            cached_results[bear.name] = results
+
+    return cached_results, cache_keys
+
+
+def get_picklable_bears(bear_list, log_printer):
+    """
+    Filters out the bears that can't be sent to the processes running bears,
+    like bears holding a lock. Every such bear is logged and skipped, so the
+    other bears of the section still run.
+
+    :param bear_list:   List of bear instances.
+    :param log_printer: The log printer to log the skipped bears to.
+    :return:            List of the bears that can be pickled.
+    """
+    picklable_bears = []
+    for bear in bear_list:
+        try:
+            pickle.dumps(bear)
+        except PICKLING_ERRORS as exception:
+            log_printer.log_exception(
+                "The bear {} could not be sent to the processes running "
+                "bears. Skipping bear...".format(bear.name),
+                exception)
+        else:
+            picklable_bears.append(bear)
+
+    return picklable_bears
+
+
+def prepare_section(section,
+                    local_bear_list,
+                    global_bear_list,
+                    pool,
+                    cache,
+                    log_printer,
+                    file_store,
+                    result_cache=None,
+                    bear_costs=None):
+    """
+    Collects and loads the files of the given section, instantiates its bears
+    and submits them to the given worker pool so that its processes start
+    running them. The local bears are run on every file as soon as it is
+    loaded, the contents of the files are shared with the processes through
+    the given file store.
 
     :param section:          The section the bears belong to.
     :param local_bear_list:  List of local bears belonging to the section.
     :param global_bear_list: List of global bears belonging to the section.
-    :param job_count:        Max number of processes to create.
+    :param pool:             The running ``WorkerPool`` to submit the section
+                             to.
     :param cache:            An instance of ``misc.Caching.FileCache`` to use as
                              a file cache buffer.
     :param log_printer:      The log printer to warn to.
-    :return:                 A tuple containing a list of processes,
-                             and the arguments passed to each process which are
-                             the same for each object.
+    :param file_store:       A ``SharedFileStore`` to put the contents of the
+                             files into. It has to be kept open until the
+                             processes finished the section.
+    :param result_cache:     An instance of ``misc.Caching.ResultCache`` to
+                             replay the results of local bears from. If it is
+                             given, the local bears are run on all files even
+                             if coala is run only on changed files.
+    :param bear_costs:       An instance of ``misc.Caching.BearCostCache`` to
+                             estimate the time needed to check the files with.
+    :return:                 A tuple containing the dict of the files the
+                             local bears are run on, a dict with the keys of
+                             the local results to add to the result cache,
+                             see ``get_cached_results``, and the
+                             ``GlobalBearScheduler`` handing the global bears
+                             to the pool.
     """
     filename_list = collect_files(
         glob_list(section.get('files', "")),
@@ -350,12 +685,18 @@ def instantiate_processes(section,
         limit_file_paths=glob_list(section.get('limit_files', "")))
 
     # This stores all matched files irrespective of whether coala is run
-    # only on changed files or not. Global bears require all the files
-    complete_filename_list = filename_list
+    # only on changed files or not. Global bears require all the files.
+    # Large files are loaded and checked first.
+    complete_filename_list = sort_by_size(filename_list)
 
     # Start tracking all the files
     if cache and section.get('changed_files', False):
         cache.track_files(set(complete_filename_list))
+
+    # With a result cache the results of unchanged files are replayed instead
+    # of leaving those files out.
+    if (cache and section.get('changed_files', False) and
+            result_cache is None):
         changed_files = cache.get_uncached_files(
             set(filename_list)) if cache else filename_list
 
@@ -367,105 +708,87 @@ def instantiate_processes(section,
                          "use the `--flush-cache` flag to see them.")
         filename_list = changed_files
 
+    local_bear_list[:], _ = instantiate_bears(section,
+                                              local_bear_list,
+                                              [],
+                                              None,
+                                              pool.message_queue)
+    local_bear_list[:] = get_picklable_bears(local_bear_list, log_printer)
+    pool.submit_section(local_bear_list,
+                        timeout=0.1,
+                        file_count=len(filename_list))
+
     # Note: the complete file dict is given as the file dict to bears and
     # the whole project is accessible to every bear. However, local bears are
     # run only for the changed files if caching is enabled.
-    file_dict = get_file_dict(filename_list, log_printer)
-    complete_file_dict = get_file_dict(complete_filename_list, log_printer)
-
-    manager = multiprocessing.Manager()
-    global_bear_queue = multiprocessing.Queue()
-    filename_queue = multiprocessing.Queue()
-    local_result_dict = manager.dict()
-    global_result_dict = manager.dict()
-    message_queue = multiprocessing.Queue()
-    control_queue = multiprocessing.Queue()
-
-    bear_runner_args = {"file_name_queue": filename_queue,
-                        "local_bear_list": local_bear_list,
-                        "global_bear_list": global_bear_list,
-                        "global_bear_queue": global_bear_queue,
-                        "file_dict": file_dict,
-                        "local_result_dict": local_result_dict,
-                        "global_result_dict": global_result_dict,
-                        "message_queue": message_queue,
-                        "control_queue": control_queue,
-                        "timeout": 0.1}
-
-    local_bear_list[:], global_bear_list[:] = instantiate_bears(
-        section,
-        local_bear_list,
-        global_bear_list,
-        complete_file_dict,
-        message_queue)
-
-    fill_queue(filename_queue, file_dict.keys())
-    fill_queue(global_bear_queue, range(len(global_bear_list)))
-
-    return ([multiprocessing.Process(target=run, kwargs=bear_runner_args)
-             for i in range(job_count)],
-            bear_runner_args)
-
-
-def get_ignore_scope(line, keyword):
-    """
-    Retrieves the bears that are to be ignored defined in the given line.
-
-    :param line:    The line containing the ignore declaration.
-    :param keyword: The keyword that was found. Everything after the rightmost
-                    occurrence of it will be considered for the scope.
-    :return:        A list of lower cased bearnames or an empty list (-> "all")
-    """
-    toignore = line[line.rfind(keyword) + len(keyword):]
-    if toignore.startswith("all"):
-        return []
-    else:
-        return list(StringConverter(toignore, list_delimiters=', '))
-
-
-def yield_ignore_ranges(file_dict):
-    """
-    Yields tuples of affected bears and a SourceRange that shall be ignored for
-    those.
-
-    :param file_dict: The file dictionary.
-    """
-    for filename, file in file_dict.items():
-        start = None
-        bears = []
-        stop_ignoring = False
-        for line_number, line in enumerate(file, start=1):
-            # Before lowering all lines ever read, first look for the biggest
-            # common substring, case sensitive: I*gnor*e, start i*gnor*ing.
-            if 'gnor' in line:
-                line = line.lower()
-                if "start ignoring " in line:
-                    start = line_number
-                    bears = get_ignore_scope(line, "start ignoring ")
-                elif "stop ignoring" in line:
-                    stop_ignoring = True
-                    if start:
-                        yield (bears,
-                               SourceRange.from_values(
-                                   filename,
-                                   start,
-                                   1,
-                                   line_number,
-                                   len(file[line_number-1])))
-                elif "ignore " in line:
-                    yield (get_ignore_scope(line, "ignore "),
-                           SourceRange.from_values(filename,
-                                                   line_number,
-                                                   1,
-                                                   line_number+1,
-                                                   len(file[line_number])))
-        if stop_ignoring is False and start is not None:
-            yield (bears,
-                   SourceRange.from_values(filename,
-                                           start,
-                                           1,
-                                           len(file),
-                                           len(file[-1])))
+    # Every file is read once and passed to the processes as soon as it is
+    # loaded, they only get views on the shared contents of the files.
+    local_filenames = set(filename_list)
+    file_dict = {}
+    shared_file_dict = {}
+    cache_keys = {}
+    files = load_files(
+        complete_filename_list,
+        log_printer,
+        max_file_size=get_max_file_size(section, log_printer),
+        skip_generated=bool(section.get('skip_generated_files', False)))
+    for filename, file in files:
+        # The processes map large files on their own.
+        shared_file_dict[filename] = (file if isinstance(file, MappedFile)
+                                      else file_store.add(file))
+        if filename not in local_filenames:
+            continue
+
+        file_dict[filename] = file
+        cached_results = None
+        if result_cache is not None:
+            cached_results, cache_keys[filename] = get_cached_results(
+                result_cache, local_bear_list, filename, file)
+        cost = None
+        if bear_costs is not None:
+            cost = bear_costs.estimate(
+                [bear.name for bear in local_bear_list
+                 if bear.name not in (cached_results or {})],
+                len(file))
+        pool.submit_file(filename,
+                         shared_file_dict[filename],
+                         cached_results,
+                         cost)
+
+    log_printer.debug("Files that will be checked:\n" +
+                      "\n".join(shared_file_dict.keys()))
+
+    _, global_bear_list[:] = instantiate_bears(section,
+                                               [],
+                                               global_bear_list,
+                                               shared_file_dict,
+                                               pool.message_queue)
+    global_bear_scheduler = GlobalBearScheduler(global_bear_list,
+                                                pool,
+                                                log_printer)
+    global_bear_scheduler.start()
+    pool.finish_files()
+
+    return file_dict, cache_keys, global_bear_scheduler
+
+
+def rebase_diffs(results, file_dict):
+    """
+    Makes the diffs of the given results refer to the contents of the files
+    in this process instead of views on the ``SharedFileStore`` of the
+    section, which can't be used anymore once the section is executed.
+
+    :param results:   The results to change the diffs of.
+    :param file_dict: A dict with the contents of the files in this process
+                      with the file names as keys. Diffs of other files get
+                      a copy of the lines.
+    """
+    for result in results:
+        for filename, diff in (result.diffs or {}).items():
+            if isinstance(diff.original, SharedFileView):
+                diff.original = (file_dict[filename]
+                                 if filename in file_dict
+                                 else tuple(diff.original))
 
 
 def get_file_list(results):
@@ -488,73 +811,134 @@ def process_queues(processes,
                    print_results,
                    section,
                    cache,
-                   log_printer):
+                   log_printer,
+                   result_cache=None,
+                   cache_keys=None,
+                   global_bear_scheduler=None,
+                   bear_costs=None,
+                   baseline=None,
+                   busy_processes=None):
     """
     Iterate the control queue and send the results recieved to the print_result
     method so that they can be presented to the user.
 
-    :param processes:          List of processes which can be used to run
-                               Bears.
-    :param control_queue:      Containing control elements that indicate
-                               whether there is a result available and which
-                               bear it belongs to.
-    :param local_result_dict:  Dictionary containing results respective to
-                               local bears. It is modified by the processes
-                               i.e. results are added to it by multiple
-                               processes.
-    :param global_result_dict: Dictionary containing results respective to
-                               global bears. It is modified by the processes
-                               i.e. results are added to it by multiple
-                               processes.
-    :param file_dict:          Dictionary containing file contents with
-                               filename as keys.
-    :param print_results:      Prints all given results appropriate to the
-                               output medium.
-    :param cache:              An instance of ``misc.Caching.FileCache`` to use
-                               as a file cache buffer.
-    :return:                   Return True if all bears execute succesfully and
-                               Results were delivered to the user. Else False.
+    :param processes:             List of processes which can be used to run
+                                  Bears.
+    :param control_queue:         Containing control elements that indicate
+                                  whether there is a result available and
+                                  which bear it belongs to.
+    :param local_result_dict:     Dictionary the results of the local bears
+                                  received through the control queue are
+                                  stored in, with file names as keys.
+    :param global_result_dict:    Dictionary the results of the global bears
+                                  received through the control queue are
+                                  stored in, with bear names as keys.
+    :param file_dict:             Dictionary containing file contents with
+                                  filename as keys.
+    :param print_results:         Prints all given results appropriate to the
+                                  output medium.
+    :param cache:                 An instance of ``misc.Caching.FileCache``
+                                  to use as a file cache buffer.
+    :param result_cache:          An instance of ``misc.Caching.ResultCache``
+                                  the results of local bears are added to.
+    :param cache_keys:            A dict containing the keys to add the local
+                                  results to the result cache with, see
+                                  ``get_cached_results``.
+    :param global_bear_scheduler: The ``GlobalBearScheduler`` to notify when a
+                                  global bear is done, so that the bears
+                                  depending on it are run.
+    :param bear_costs:            An instance of ``misc.Caching.BearCostCache``
+                                  the time the local bears needed is added to.
+    :param baseline:              A ``ResultBaseline`` to check the results
+                                  with, see ``print_result``.
+    :param busy_processes:        A ``multiprocessing.Value`` counting the
+                                  processes that are running bears. If no
+                                  results arrive while no process is busy,
+                                  the results of the global bears that are
+                                  not done were lost and the bears are
+                                  aborted.
+    :return:                      Return True if all bears execute succesfully
+                                  and Results were delivered to the user. Else
+                                  False.
     """
     file_diff_dict = {}
     retval = False
     # Number of processes working on local/global bears. They are count down
     # when the last queue element of that process is processed which may be
-    # *after* the process has ended!
+    # *after* the process has ended or started working on the next section!
     local_processes = len(processes)
     global_processes = len(processes)
     global_result_buffer = []
     result_files = set()
-    ignore_ranges = list(yield_ignore_ranges(file_dict))
+    # The processes collect the ignore ranges of the files the local bears
+    # yielded results for, other files are only scanned when results of
+    # global bears affect them.
+    ignore_ranges = IgnoreRangeIndex(file_dict=file_dict)
+    # The number of times in a row no element arrived while the processes
+    # were idle.
+    idle_timeouts = 0
 
     # One process is the logger thread
     while local_processes > 1:
         try:
-            control_elem, index = control_queue.get(timeout=0.1)
+            control_elem, index, results = get_control_element(
+                control_queue, processes, CONTROL_ELEMENT_TIMEOUT)
+            idle_timeouts = 0
 
             if control_elem == CONTROL_ELEMENT.LOCAL_FINISHED:
                 local_processes -= 1
+                if bear_costs is not None and results:
+                    for bear_name, (seconds, line_count) in results.items():
+                        bear_costs.add(bear_name, seconds, line_count)
             elif control_elem == CONTROL_ELEMENT.GLOBAL_FINISHED:
                 global_processes -= 1
             elif control_elem == CONTROL_ELEMENT.LOCAL:
                 assert local_processes != 0
-                result_files.update(get_file_list(local_result_dict[index]))
-                retval, res = print_result(local_result_dict[index],
-                                           file_dict,
-                                           retval,
-                                           print_results,
-                                           section,
-                                           log_printer,
-                                           file_diff_dict,
-                                           ignore_ranges)
-                local_result_dict[index] = res
+                for filename, file_results, file_index in results:
+                    if file_index is not None:
+                        ignore_ranges.add_file(filename, file_index)
+                    if file_results is None:
+                        continue
+
+                    keys = (cache_keys or {}).get(filename, {})
+                    for bear_name, bear_results in file_results:
+                        if bear_results is None:
+                            continue
+                        rebase_diffs(bear_results, file_dict)
+                        if bear_name in keys:
+                            result_cache.add(keys[bear_name], bear_results)
+
+                    file_results = list(chain.from_iterable(
+                        bear_results for _, bear_results in file_results
+                        if bear_results is not None))
+                    result_files.update(get_file_list(file_results))
+                    retval, res = print_result(file_results,
+                                               file_dict,
+                                               retval,
+                                               print_results,
+                                               section,
+                                               log_printer,
+                                               file_diff_dict,
+                                               ignore_ranges,
+                                               baseline)
+                    local_result_dict[filename] = res
             else:
                 assert control_elem == CONTROL_ELEMENT.GLOBAL
-                global_result_buffer.append(index)
+                if global_bear_scheduler is not None:
+                    global_bear_scheduler.mark_done(index, results)
+                if results:
+                    rebase_diffs(results, file_dict)
+                    global_result_dict[index] = results
+                    global_result_buffer.append(index)
         except queue.Empty:
-            if get_running_processes(processes) < 2:  # pragma: no cover
+            if processes_lost(processes, local_processes):  # pragma: no cover
                 # Recover silently, those branches are only
                 # nondeterministically covered.
                 break
+            idle_timeouts = check_lost_global_bears(busy_processes,
+                                                    global_bear_scheduler,
+                                                    idle_timeouts,
+                                                    log_printer)
 
     # Flush global result buffer
     for elem in global_result_buffer:
@@ -566,33 +950,48 @@ def process_queues(processes,
                                    section,
                                    log_printer,
                                    file_diff_dict,
-                                   ignore_ranges)
+                                   ignore_ranges,
+                                   baseline)
         global_result_dict[elem] = res
 
     # One process is the logger thread
     while global_processes > 1:
         try:
-            control_elem, index = control_queue.get(timeout=0.1)
+            control_elem, index, results = get_control_element(
+                control_queue, processes, CONTROL_ELEMENT_TIMEOUT)
+            idle_timeouts = 0
 
             if control_elem == CONTROL_ELEMENT.GLOBAL:
-                result_files.update(get_file_list(global_result_dict[index]))
-                retval, res = print_result(global_result_dict[index],
+                if global_bear_scheduler is not None:
+                    global_bear_scheduler.mark_done(index, results)
+                if not results:
+                    continue
+
+                rebase_diffs(results, file_dict)
+                result_files.update(get_file_list(results))
+                retval, res = print_result(results,
                                            file_dict,
                                            retval,
                                            print_results,
                                            section,
                                            log_printer,
                                            file_diff_dict,
-                                           ignore_ranges)
+                                           ignore_ranges,
+                                           baseline)
                 global_result_dict[index] = res
             else:
                 assert control_elem == CONTROL_ELEMENT.GLOBAL_FINISHED
                 global_processes -= 1
         except queue.Empty:
-            if get_running_processes(processes) < 2:  # pragma: no cover
+            if processes_lost(processes,
+                              global_processes):  # pragma: no cover
                 # Recover silently, those branches are only
                 # nondeterministically covered.
                 break
+            idle_timeouts = check_lost_global_bears(busy_processes,
+                                                    global_bear_scheduler,
+                                                    idle_timeouts,
+                                                    log_printer)
 
     if cache:
         cache.untrack_files(result_files)
@@ -626,23 +1025,69 @@ def simplify_section_result(section_result):
             results_for_section)
 
 
+def get_job_count(section, log_printer):
+    """
+    Parses the key ``jobs`` in the given section.
+
+    :param section:     The section where to parse from.
+    :param log_printer: The log_printer to warn to.
+    :return:            The number of processes to run bears in. Falls back to
+                        the CPU count if nothing valid is given.
+    """
+    try:
+        return int(section['jobs'])
+    except ValueError:
+        log_printer.warn("Unable to convert setting 'jobs' into a number. "
+                         "Falling back to CPU count.")
+    except IndexError:
+        pass
+
+    return get_cpu_count()
+
+
+def get_max_file_size(section, log_printer):
+    """
+    Parses the key ``max_file_size`` in the given section.
+
+    :param section:     The section where to parse from.
+    :param log_printer: The log_printer to warn to.
+    :return:            The maximal size of the files to check in bytes, 0
+                        for any size. Files of any size are checked if
+                        nothing valid is given.
+    """
+    try:
+        max_file_size = int(section['max_file_size'])
+        if max_file_size >= 0:
+            return max_file_size
+    except ValueError:
+        pass
+    except IndexError:
+        return 0
+
+    log_printer.warn("Unable to convert setting 'max_file_size' into a "
+                     "number of bytes. Checking files of any size.")
+    return 0
+
+
 def execute_section(section,
                     global_bear_list,
                     local_bear_list,
                     print_results,
                     cache,
-                    log_printer):
+                    log_printer,
+                    pool=None,
+                    result_cache=None,
+                    bear_costs=None,
+                    baseline=None):
     """
     Executes the section with the given bears.
 
     The execute_section method does the following things:
 
-    1. Prepare a Process
-       -  Load files
-       -  Create queues
-    2. Spawn up one or more Processes
-    3. Output results from the Processes
-    4. Join all processes
+    1. Prepare the section
+       -  Load files and share them with the processes of the pool
+       -  Submit the bears and files to the worker pool
+    2. Output results from the processes of the pool
 
     :param section:          The section to execute.
     :param global_bear_list: List of global bears belonging to the section.
@@ -652,55 +1097,86 @@ def execute_section(section,
     :param cache:            An instance of ``misc.Caching.FileCache`` to use as
                              a file cache buffer.
     :param log_printer:      The log_printer to warn to.
+    :param pool:             A ``WorkerPool`` to run the bears in. It is
+                             started if it isn't running yet and it is not
+                             closed, so it can be reused for further sections.
+                             If no pool is given or if the number of processes
+                             of the pool doesn't match the ``jobs`` setting of
+                             the section, a pool is created and closed for
+                             this section only.
+    :param result_cache:     An instance of ``misc.Caching.ResultCache`` to
+                             replay the results of local bears from and to add
+                             new results to.
+    :param bear_costs:       An instance of ``misc.Caching.BearCostCache`` to
+                             estimate the time needed to check the files with
+                             and to add the time the bears needed to.
+    :param baseline:         A ``ResultBaseline`` holding the results that are
+                             not reported. All other results are recorded in
+                             it.
     :return:                 Tuple containing a bool (True if results were
-                             yielded, False otherwise), a Manager.dict
-                             containing all local results(filenames are key)
-                             and a Manager.dict containing all global bear
-                             results (bear names are key) as well as the
-                             file dictionary.
+                             yielded, False otherwise), a dict containing all
+                             local results (filenames are key) and a dict
+                             containing all global bear results (bear names
+                             are key) as well as the file dictionary.
     """
     local_bear_list = Dependencies.resolve(local_bear_list)
     global_bear_list = Dependencies.resolve(global_bear_list)
 
-    try:
-        running_processes = int(section['jobs'])
-    except ValueError:
-        log_printer.warn("Unable to convert setting 'jobs' into a number. "
-                         "Falling back to CPU count.")
-        running_processes = get_cpu_count()
-    except IndexError:
-        running_processes = get_cpu_count()
-
-    processes, arg_dict = instantiate_processes(section,
-                                                local_bear_list,
-                                                global_bear_list,
-                                                running_processes,
-                                                cache,
-                                                log_printer)
-
-    logger_thread = LogPrinterThread(arg_dict["message_queue"],
-                                     log_printer)
-    # Start and join the logger thread along with the processes to run bears
-    processes.append(logger_thread)
-
-    for runner in processes:
-        runner.start()
+    running_processes = get_job_count(section, log_printer)
+    if pool is None or pool.job_count != running_processes:
+        with WorkerPool(running_processes) as section_pool:
+            return execute_section(section,
+                                   global_bear_list,
+                                   local_bear_list,
+                                   print_results,
+                                   cache,
+                                   log_printer,
+                                   pool=section_pool,
+                                   result_cache=result_cache,
+                                   bear_costs=bear_costs,
+                                   baseline=baseline)
+
+    pool.start()
+    local_result_dict = {}
+    global_result_dict = {}
+    with SharedFileStore() as file_store:
+        file_dict, cache_keys, global_bear_scheduler = prepare_section(
+            section,
+            local_bear_list,
+            global_bear_list,
+            pool,
+            cache,
+            log_printer,
+            file_store,
+            result_cache,
+            bear_costs)
+
+        logger_thread = LogPrinterThread(pool.message_queue,
+                                         log_printer)
+        logger_thread.start()
 
-    try:
-        return (process_queues(processes,
-                               arg_dict["control_queue"],
-                               arg_dict["local_result_dict"],
-                               arg_dict["global_result_dict"],
-                               arg_dict["file_dict"],
-                               print_results,
-                               section,
-                               cache,
-                               log_printer),
-                arg_dict["local_result_dict"],
-                arg_dict["global_result_dict"],
-                arg_dict["file_dict"])
-    finally:
-        logger_thread.running = False
-
-        for runner in processes:
-            runner.join()
+        try:
+            # Files patched by the actions are written once the section is
+            # done.
+            with ApplyPatchAction.batch():
+                return (process_queues(pool.processes + [logger_thread],
+                                       pool.control_queue,
+                                       local_result_dict,
+                                       global_result_dict,
+                                       file_dict,
+                                       print_results,
+                                       section,
+                                       cache,
+                                       log_printer,
+                                       result_cache,
+                                       cache_keys,
+                                       global_bear_scheduler,
+                                       bear_costs,
+                                       baseline,
+                                       pool.busy_processes),
+                        local_result_dict,
+                        global_result_dict,
+                        file_dict)
+        finally:
+            logger_thread.stop()
+            logger_thread.join()
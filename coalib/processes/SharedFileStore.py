@@ -0,0 +1,198 @@
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Sequence
+
+
+OFFSET_FORMAT = "Q"
+OFFSET_SIZE = struct.calcsize(OFFSET_FORMAT)
+
+
+class SharedFileStore:
+    """
+    A store holding the contents of files in a temporary file that is mapped
+    into memory. The contents are stored only once and are shared by all
+    processes reading them, instead of being copied into every process.
+
+    Files are added to the store with ``add()`` or ``create_file_dict()``,
+    which return read-only views on the stored files:
+
+    >>> with SharedFileStore() as store:
+    ...     file_dict = store.create_file_dict({"a.py": ("a = 1\\n", "b\\n")})
+    ...     file_dict["a.py"][0]
+    ...     file_dict["a.py"] == ("a = 1\\n", "b\\n")
+    'a = 1\\n'
+    True
+
+    Only the path of the store is pickled along with the views, the processes
+    receiving them map the same file into their memory. The contents are read
+    lazily, line by line.
+    """
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(prefix="coala_", suffix=".store")
+        self._file = os.fdopen(fd, "wb")
+        self._size = 0
+        self._buffer = None
+
+    def add(self, lines):
+        """
+        Adds a file to the store. It can be read by other processes as soon
+        as this method returns.
+
+        :param lines: The contents of the file as a sequence of lines.
+        :return:      A ``SharedFileView`` of the file.
+        """
+        content = [line.encode("utf-8") for line in lines]
+        offsets = [self._size]
+        for line in content:
+            offsets.append(offsets[-1] + len(line))
+
+        # Keep the line offsets aligned
+        padding = -offsets[-1] % OFFSET_SIZE
+        offset_position = offsets[-1] + padding
+        data = b"".join(content) + b"\0" * padding + struct.pack(
+            "{}{}".format(len(offsets), OFFSET_FORMAT), *offsets)
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+        return SharedFileView(self, offset_position, len(lines))
+
+    def create_file_dict(self, file_dict):
+        """
+        Adds the given files to the store.
+
+        :param file_dict: A dict containing the contents of the files as
+                          sequences of lines with the file names as keys.
+        :return:          A dict containing a ``SharedFileView`` of every file
+                          with the file names as keys.
+        """
+        return {filename: self.add(lines)
+                for filename, lines in file_dict.items()}
+
+    def get_buffer(self, size):
+        """
+        Retrieves the memory mapped contents of the store. As files may be
+        added after the store was mapped, it is mapped again if the current
+        mapping is too small.
+
+        :param size: The number of bytes that need to be mapped.
+        :return:     The memory mapped contents of the store.
+        """
+        if self._buffer is None or len(self._buffer) < size:
+            # Other readers may still use the old mapping, it is closed as
+            # soon as it isn't referenced anymore.
+            with open(self.path, "rb") as file:
+                self._buffer = mmap.mmap(file.fileno(),
+                                         0,
+                                         access=mmap.ACCESS_READ)
+
+        return self._buffer
+
+    def close(self):
+        """
+        Closes the store and deletes its file. Views on the store can not be
+        used anymore afterwards.
+        """
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self.path)
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self._file = None
+        self._buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SharedFileView(Sequence):
+    """
+    A read-only view on the lines of a file in a ``SharedFileStore``. It
+    behaves like the tuple of lines a file is usually represented with,
+    slicing it or adding tuples to it gives a tuple of lines and it compares
+    equal to the tuple of its lines.
+    """
+
+    def __init__(self, store, offset_position, line_count):
+        """
+        :param store:           The ``SharedFileStore`` holding the file.
+        :param offset_position: The position of the offsets of the lines in
+                                the store.
+        :param line_count:      The number of lines of the file.
+        """
+        self.store = store
+        self.offset_position = offset_position
+        self.line_count = line_count
+
+    @property
+    def _buffer(self):
+        return self.store.get_buffer(
+            self.offset_position + (self.line_count + 1) * OFFSET_SIZE)
+
+    def _offset(self, buffer, index):
+        return struct.unpack_from(OFFSET_FORMAT,
+                                  buffer,
+                                  self.offset_position + index * OFFSET_SIZE
+                                  )[0]
+
+    def __len__(self):
+        return self.line_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self[i] for i in range(*index.indices(len(self))))
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+
+        buffer = self._buffer
+        return buffer[self._offset(buffer, index):
+                      self._offset(buffer, index + 1)].decode("utf-8")
+
+    def __iter__(self):
+        buffer = self._buffer
+        for index in range(len(self)):
+            yield buffer[self._offset(buffer, index):
+                         self._offset(buffer, index + 1)].decode("utf-8")
+
+    def __add__(self, other):
+        if isinstance(other, (tuple, SharedFileView)):
+            return tuple(self) + tuple(other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, tuple):
+            return other + tuple(self)
+        return NotImplemented
+
+    def __eq__(self, other):
+        if isinstance(other, (tuple, SharedFileView)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return repr(tuple(self))
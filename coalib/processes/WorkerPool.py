@@ -0,0 +1,240 @@
+import math
+import multiprocessing
+import pickle
+
+from coalib.processes.BearRunning import run_worker
+from coalib.processes.ControlQueue import ControlQueue
+
+
+class WorkerPool:
+    """
+    A pool of processes that run bears. The processes are started once and
+    are reused for every section that is executed with the pool, which saves
+    spawning and tearing down processes for every single section.
+
+    The queues of the pool are created when it is started and are shared with
+    the processes through inheritance. Sections are submitted to the pool with
+    ``submit_section()``: the local bears of a section are sent to every
+    process as a job. The files are distributed through the ``filename_queue``
+    with ``submit_file()`` as soon as they are loaded and the global bears
+    through the ``global_bear_queue`` with ``submit_global_bear()`` as soon as
+    their dependencies are done. ``finish_files()`` and
+    ``finish_global_bears()`` tell the processes that everything of the
+    section was submitted.
+    Files are sent in batches to save the overhead of a queue round-trip per
+    file, the batch sizes follow guided self-scheduling: a batch holds a
+    share of the files that are still to be submitted, so batches get
+    smaller towards the end of a section and the processes finish at about
+    the same time. Batches are also limited by the number of lines and by
+    the estimated time needed to check them, so large files and files that
+    are expensive to check are spread over the processes. Every process reports
+    the completion of a section by putting ``CONTROL_ELEMENT.LOCAL_FINISHED``
+    and ``CONTROL_ELEMENT.GLOBAL_FINISHED`` elements into the
+    ``control_queue``, a ``ControlQueue`` the main process can wait on
+    together with the processes.
+    The results are streamed back through the ``control_queue`` as well, so
+    no shared state has to be kept between the processes. Only the number of
+    processes that are running bears is shared in ``busy_processes``, so a
+    waiting reader can tell if the processes are idle.
+
+    The processes are started with ``start()``. Using the pool as a context
+    manager makes sure they are stopped again:
+
+    >>> with WorkerPool(2) as pool:
+    ...     pool.start()
+    ...     len(pool.processes)
+    2
+    >>> pool.running
+    False
+    """
+
+    #: The maximum number of files, of lines and of the estimated time in
+    #: seconds needed to check them of a batch of files.
+    max_batch_size = 64
+    max_batch_lines = 10000
+    max_batch_cost = 0.5
+
+    def __init__(self, job_count):
+        """
+        :param job_count: The number of processes to run bears in.
+        """
+        self.job_count = job_count
+        self.processes = []
+        self._job_queues = []
+        self.busy_processes = None
+        self._files_pending = False
+        self._global_bears_pending = False
+        self._batch = []
+        self._batch_lines = 0
+        self._batch_cost = 0
+        self._remaining_files = 0
+
+    @property
+    def running(self):
+        """
+        :return: True if the processes of the pool have been started and the
+                 pool was not closed since then.
+        """
+        return len(self.processes) > 0
+
+    def start(self):
+        """
+        Creates the queues of the pool and starts its processes. Does nothing
+        if the pool is running already.
+        """
+        if self.running:
+            return
+
+        self.filename_queue = multiprocessing.Queue()
+        self.global_bear_queue = multiprocessing.Queue()
+        self.message_queue = multiprocessing.Queue()
+        self.control_queue = ControlQueue()
+        self._job_queues = [multiprocessing.Queue()
+                            for i in range(self.job_count)]
+        self.busy_processes = multiprocessing.Value("i", 0)
+
+        self.processes = [
+            multiprocessing.Process(
+                target=run_worker,
+                kwargs={"job_queue": job_queue,
+                        "file_name_queue": self.filename_queue,
+                        "global_bear_queue": self.global_bear_queue,
+                        "message_queue": self.message_queue,
+                        "control_queue": self.control_queue,
+                        "busy_processes": self.busy_processes})
+            for job_queue in self._job_queues]
+
+        for process in self.processes:
+            process.start()
+
+    def submit_section(self, local_bear_list, timeout=0, file_count=None):
+        """
+        Sends the local bears of a section to every process of the pool. The
+        processes start running the bears on the files as soon as they are
+        submitted with ``submit_file()``, the section has to be finished with
+        ``finish_files()`` and ``finish_global_bears()``.
+
+        The job is pickled only once for all processes, so the bears have to
+        be picklable, see ``Processing.get_picklable_bears``. The
+        ``message_queue`` of the bears is not transferred, the processes
+        attach the one of the pool instead.
+
+        :param local_bear_list: List of local bear instances.
+        :param timeout:         The timeout the processes use for the queues.
+        :param file_count:      The number of files that will be submitted,
+                                used to size the batches of files. If it is
+                                not known, every file is sent on its own.
+        """
+        job = pickle.dumps({"local_bear_list": local_bear_list,
+                            "timeout": timeout})
+
+        for job_queue in self._job_queues:
+            job_queue.put(job)
+        self._remaining_files = file_count or 0
+        self._files_pending = True
+        self._global_bears_pending = True
+
+    def submit_file(self, filename, file, cached_results=None, cost=None):
+        """
+        Makes the processes run the local bears of the current section on the
+        given file. The file is sent with the next batch of files.
+
+        :param filename:       The name of the file.
+        :param file:           The contents of the file. Use a view of a
+                               ``SharedFileStore`` to avoid copying them into
+                               the processes.
+        :param cached_results: A dict containing the cached results of local
+                               bears to replay, see ``BearRunning.run``.
+        :param cost:           The estimated time in seconds needed to check
+                               the file, if it is known.
+        """
+        self._batch.append((filename, file, cached_results))
+        self._batch_lines += len(file)
+        self._batch_cost += cost or 0
+        if (len(self._batch) >= self.get_batch_size() or
+                self._batch_lines >= self.max_batch_lines or
+                self._batch_cost >= self.max_batch_cost):
+            self.flush_files()
+
+    def get_batch_size(self):
+        """
+        :return: The number of files to send with the current batch, a share
+                 of the files that remain to be submitted for every process.
+        """
+        return max(1, min(self.max_batch_size,
+                          math.ceil(self._remaining_files /
+                                    (2 * self.job_count))))
+
+    def flush_files(self):
+        """
+        Sends the files submitted since the last batch to the processes.
+        """
+        if self._batch:
+            self.filename_queue.put(self._batch)
+            self._remaining_files -= len(self._batch)
+            self._batch = []
+            self._batch_lines = 0
+            self._batch_cost = 0
+
+    def submit_global_bear(self, bear, dependency_results=None):
+        """
+        Makes one of the processes run the given global bear. The bear is run
+        as soon as a process is free, so it may only be submitted when all its
+        dependencies are done.
+
+        The bear is pickled right away, so it has to be picklable. Otherwise
+        one of the ``BearRunning.PICKLING_ERRORS`` is raised, instead of the
+        queue dropping the bear silently.
+
+        :param bear:               The global bear instance.
+        :param dependency_results: The results of the dependencies of the
+                                   bear as returned by ``BearRunning.``
+                                   ``get_global_dependency_results``.
+        """
+        self.global_bear_queue.put(pickle.dumps((bear, dependency_results)))
+
+    def finish_files(self):
+        """
+        Tells the processes that all files of the current section were
+        submitted.
+        """
+        self.flush_files()
+        for process in self.processes:
+            self.filename_queue.put(None)
+        self._files_pending = False
+
+    def finish_global_bears(self):
+        """
+        Tells the processes that all global bears of the current section were
+        submitted.
+        """
+        for process in self.processes:
+            self.global_bear_queue.put(None)
+        self._global_bears_pending = False
+
+    def close(self):
+        """
+        Stops all processes of the pool and waits for them to exit.
+        """
+        if not self.running:
+            return
+
+        if self._files_pending:
+            self.finish_files()
+        if self._global_bears_pending:
+            self.finish_global_bears()
+
+        for job_queue in self._job_queues:
+            job_queue.put(None)
+
+        for process in self.processes:
+            process.join()
+
+        self.processes = []
+        self._job_queues = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,15 +1,285 @@
-import copy
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
 import difflib
+from itertools import accumulate, chain
 
 from coalib.results.LineDiff import LineDiff, ConflictError
 from coalib.results.SourceRange import SourceRange
 from coala_decorators.decorators import enforce_signature, generate_eq
 
 
+#: The change of deleted lines, it is shared by the diffs created from string
+#: arrays. Changes are never modified in place, see ``Diff._get_change``.
+_DELETED_LINE = LineDiff(delete=True)
+
+#: The maximum product of the lengths of two files or blocks that are
+#: compared with ``difflib`` right away, bigger ones are compared with the
+#: linear space algorithm by Myers first.
+MAX_MATCHER_SIZE = 250000
+
+#: The number of steps after which the comparison of big blocks with the
+#: algorithm by Myers is given up, it takes time quadratic in that number.
+MAX_SHORT_SCRIPT_STEPS = 100
+
+
+def _add_line_diffs(linediff, other):
+    """
+    :return:               A new LineDiff holding the changes of both given
+                           ones.
+    :raises ConflictError: If the changes can't be combined.
+    """
+    result = linediff.copy()
+    if other.delete is True:
+        result.delete = True
+    if other.add_after is not False:
+        if result.add_after is not False:
+            raise ConflictError("Cannot add lines after the given line since "
+                                "there are already lines.")
+        result.add_after = other.add_after
+    if other.change is not False:
+        if result.change is not False:
+            raise ConflictError("An already changed line cannot be changed.")
+        result.change = other.change
+
+    return result
+
+
+def _get_unique_lines(lines, start, end):
+    """
+    :return: A dict with the lines that occur only once in the given part of
+             the lines as keys and their indices as values.
+    """
+    indices = {}
+    for index in range(start, end):
+        line = lines[index]
+        indices[line] = None if line in indices else index
+    return {line: index
+            for line, index in indices.items()
+            if index is not None}
+
+
+def _get_anchors(a, a_start, a_end, b, b_start, b_end):
+    """
+    Finds the longest sequence of lines that are unique in both given blocks
+    and are in the same order in both of them, like patience diff does.
+
+    :return: A list of tuples with the indices of those lines in ``a`` and
+             ``b``.
+    """
+    b_unique = _get_unique_lines(b, b_start, b_end)
+    matches = sorted((a_index, b_unique[line])
+                     for line, a_index in _get_unique_lines(a,
+                                                            a_start,
+                                                            a_end).items()
+                     if line in b_unique)
+
+    # Longest increasing subsequence of the indices in b through patience
+    # sorting: ``tails`` holds the smallest last index in b of all sequences
+    # of every length.
+    tails = []
+    tail_matches = []
+    predecessors = []
+    for match_index, (a_index, b_index) in enumerate(matches):
+        length = bisect_left(tails, b_index)
+        predecessors.append(tail_matches[length-1] if length > 0 else None)
+        if length == len(tails):
+            tails.append(b_index)
+            tail_matches.append(match_index)
+        else:
+            tails[length] = b_index
+            tail_matches[length] = match_index
+
+    anchors = []
+    match_index = tail_matches[-1] if tail_matches else None
+    while match_index is not None:
+        anchors.append(matches[match_index])
+        match_index = predecessors[match_index]
+    anchors.reverse()
+    return anchors
+
+
+def _get_middle_point(a, a_start, a_end, b, b_start, b_end, max_steps=None):
+    """
+    Finds a point on a shortest edit script between the given blocks by
+    searching from both of their ends at the same time until the searches
+    overlap, like Myers' linear space diff algorithm does. This needs time
+    proportional to the product of the size of the blocks and the size of
+    the script, but only linear space.
+
+    The first and last lines of the blocks must differ, so the blocks on
+    both sides of the point are always smaller than the given ones.
+
+    :param max_steps: The number of lines to add or delete from each end
+                      after which the search is given up, or ``None`` to
+                      search until the point is found.
+    :return:          A tuple with the indices in ``a`` and ``b`` where the
+                      blocks are to be split, or ``None`` if the search was
+                      given up.
+    """
+    n = a_end - a_start
+    m = b_end - b_start
+    delta = n - m
+    max_d = (n + m + 1) // 2
+    # ``forward[k]`` is the furthest index in ``a`` (relative to
+    # ``a_start``) reached on the diagonal ``k`` searching from the start,
+    # ``backward[k]`` the same searching from the end, counted from the end.
+    offset = max_d + 1
+    forward = [-1] * (2 * offset + 1)
+    backward = [-1] * (2 * offset + 1)
+    forward[offset + 1] = 0
+    backward[offset + 1] = 0
+    if max_steps is not None:
+        max_d = min(max_d, max_steps)
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and
+                           forward[offset+k-1] < forward[offset+k+1]):
+                x = forward[offset+k+1]
+            else:
+                x = forward[offset+k-1] + 1
+            y = x - k
+            while x < n and y < m and a[a_start+x] == b[b_start+y]:
+                x += 1
+                y += 1
+            forward[offset+k] = x
+            # The backward search on the same diagonal already took ``d-1``
+            # steps when the number of steps needed in total is odd.
+            backward_k = delta - k
+            if (delta % 2 == 1 and -d < backward_k < d and
+                    x + backward[offset+backward_k] >= n):
+                return a_start + x, b_start + y
+
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and
+                           backward[offset+k-1] < backward[offset+k+1]):
+                x = backward[offset+k+1]
+            else:
+                x = backward[offset+k-1] + 1
+            y = x - k
+            while (x < n and y < m and
+                   a[a_end-x-1] == b[b_end-y-1]):
+                x += 1
+                y += 1
+            backward[offset+k] = x
+            forward_k = delta - k
+            if (delta % 2 == 0 and -d <= forward_k <= d and
+                    x + forward[offset+forward_k] >= n):
+                x = forward[offset+forward_k]
+                return a_start + x, b_start + x - forward_k
+
+    return None
+
+
+def _get_matcher_blocks(a, a_start, a_end, b, b_start, b_end, autojunk):
+    """
+    Compares the given blocks with ``difflib``.
+
+    :param autojunk: Whether ``difflib`` ignores lines that are very common
+                     in the block in ``b``, which is faster but gives worse
+                     results.
+    :return:         A list of tuples with the start and end indices of the
+                     changed blocks.
+    """
+    matcher = difflib.SequenceMatcher(None,
+                                      a[a_start:a_end],
+                                      b[b_start:b_end],
+                                      autojunk=autojunk)
+    return [(a_start + i1, a_start + i2, b_start + j1, b_start + j2)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+            if tag != "equal"]
+
+
+def _get_changed_blocks(a, b):
+    """
+    Compares two lists of lines. Small files are compared with ``difflib``.
+    For bigger ones, common lines at the start and end of blocks are
+    skipped, small blocks are compared with ``difflib`` and big ones are
+    split at a point on a shortest edit script, which is fast if only a few
+    lines differ. Otherwise they are split at the lines unique in both of
+    them like by a patience diff, which takes about linear time. Only big
+    blocks without such lines are compared with ``difflib`` ignoring common
+    lines like small files.
+
+    >>> _get_changed_blocks(["a", "b", "c", "d"], ["a", "x", "c", "d", "e"])
+    [(1, 2, 1, 2), (4, 4, 4, 5)]
+
+    :param a: The original list of lines.
+    :param b: The list of lines to compare with.
+    :return:  A sorted list of tuples with the start and end indices of the
+              blocks in ``a`` that are to be replaced by the blocks in ``b``.
+              Blocks are always separated by at least one common line.
+    """
+    if len(a) * len(b) <= MAX_MATCHER_SIZE:
+        return _get_matcher_blocks(a, 0, len(a), b, 0, len(b), True)
+
+    blocks = []
+    # The blocks split by ``_get_middle_point`` are split again the same way
+    # until they are compared, so the edit script stays as short as
+    # possible.
+    pending = [(0, len(a), 0, len(b), False)]
+    while pending:
+        a_start, a_end, b_start, b_end, split = pending.pop()
+        while (a_start < a_end and b_start < b_end and
+               a[a_start] == b[b_start]):
+            a_start += 1
+            b_start += 1
+        while (a_start < a_end and b_start < b_end and
+               a[a_end-1] == b[b_end-1]):
+            a_end -= 1
+            b_end -= 1
+
+        if a_start == a_end or b_start == b_end:
+            if a_start != a_end or b_start != b_end:
+                blocks.append((a_start, a_end, b_start, b_end))
+            continue
+
+        if (not split and
+                (a_end - a_start) * (b_end - b_start) <= MAX_MATCHER_SIZE):
+            blocks.extend(_get_matcher_blocks(a, a_start, a_end,
+                                              b, b_start, b_end, False))
+            continue
+
+        middle = _get_middle_point(a, a_start, a_end, b, b_start, b_end,
+                                   None if split else MAX_SHORT_SCRIPT_STEPS)
+        if middle is not None:
+            a_middle, b_middle = middle
+            pending.append((a_start, a_middle, b_start, b_middle, True))
+            pending.append((a_middle, a_end, b_middle, b_end, True))
+            continue
+
+        anchors = _get_anchors(a, a_start, a_end, b, b_start, b_end)
+        if anchors:
+            for a_index, b_index in anchors:
+                pending.append((a_start, a_index, b_start, b_index, False))
+                a_start, b_start = a_index + 1, b_index + 1
+            pending.append((a_start, a_end, b_start, b_end, False))
+        else:
+            blocks.extend(_get_matcher_blocks(a, a_start, a_end,
+                                              b, b_start, b_end, True))
+
+    blocks.sort()
+    # Blocks split by ``_get_middle_point`` may be adjacent.
+    merged = blocks[:1]
+    for a_start, a_end, b_start, b_end in blocks[1:]:
+        if (a_start, b_start) == merged[-1][1::2]:
+            merged[-1] = (merged[-1][0], a_end, merged[-1][2], b_end)
+        else:
+            merged.append((a_start, a_end, b_start, b_end))
+    return merged
+
+
 @generate_eq("_file", "modified", "rename", "delete")
 class Diff:
     """
     A Diff result represents a difference for one file.
+
+    The changes are kept in two arrays sorted by line number, one holding the
+    numbers of the changed lines and one the ``LineDiff`` objects. Those
+    objects are never modified in place, so diffs derived from each other can
+    share them. The modified file is calculated only once and recalculated
+    when the diff changes, the original file must not be modified while the
+    diff is in use.
     """
 
     def __init__(self, file_list, rename=False, delete=False):
@@ -21,11 +291,34 @@ class Diff:
         :param rename:    False or str containing new name of file.
         :param delete:    True if file is set to be deleted.
         """
-        self._changes = {}
+        self._line_numbers = array("l")
+        self._line_diffs = []
+        self._clear_cache()
         self._file = file_list
         self.rename = rename
         self.delete = delete
 
+    def _clear_cache(self):
+        self._modified = None
+        self._stats = None
+        self._line_offsets = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_modified=None, _stats=None, _line_offsets=None)
+        return state
+
+    def __setstate__(self, state):
+        # Diffs pickled by older versions store the changes in a dict.
+        changes = state.pop("_changes", None)
+        if changes is not None:
+            line_numbers = sorted(changes)
+            state["_line_numbers"] = array("l", line_numbers)
+            state["_line_diffs"] = [changes[line_nr]
+                                    for line_nr in line_numbers]
+        state.update(_modified=None, _stats=None, _line_offsets=None)
+        self.__dict__.update(state)
+
     @classmethod
     def from_string_arrays(cls, file_array_1, file_array_2, rename=False):
         """
@@ -40,30 +333,31 @@ class Diff:
         """
         result = cls(file_array_1, rename=rename)
 
-        matcher = difflib.SequenceMatcher(None, file_array_1, file_array_2)
-        # We use this because its faster (generator) and doesnt yield as much
-        # useless information as get_opcodes.
-        for change_group in matcher.get_grouped_opcodes(1):
-            for (tag,
-                 a_index_1,
-                 a_index_2,
-                 b_index_1,
-                 b_index_2) in change_group:
-                if tag == "delete":
-                    for index in range(a_index_1+1, a_index_2+1):
-                        result.delete_line(index)
-                elif tag == "insert":
-                    # We add after line, they add before, so dont add 1 here
-                    result.add_lines(a_index_1,
-                                     file_array_2[b_index_1:b_index_2])
-                elif tag == "replace":
-                    result.change_line(a_index_1+1,
-                                       file_array_1[a_index_1],
-                                       file_array_2[b_index_1])
-                    result.add_lines(a_index_1+1,
-                                     file_array_2[b_index_1+1:b_index_2])
-                    for index in range(a_index_1+2, a_index_2+1):
-                        result.delete_line(index)
+        # The changes are known not to conflict and are found in order, so
+        # they are appended directly instead of going through
+        # ``change_line`` and friends.
+        line_numbers = result._line_numbers
+        line_diffs = result._line_diffs
+        for a_start, a_end, b_start, b_end in _get_changed_blocks(
+                file_array_1, file_array_2):
+            if a_start == a_end:
+                # We add after line, the block is before, so dont add 1 here
+                line_numbers.append(a_start)
+                line_diffs.append(LineDiff(
+                    add_after=file_array_2[b_start:b_end]))
+                continue
+
+            if b_start == b_end:
+                first_deleted = a_start + 1
+            else:
+                line_numbers.append(a_start+1)
+                line_diffs.append(LineDiff(
+                    change=(file_array_1[a_start], file_array_2[b_start]),
+                    add_after=file_array_2[b_start+1:b_end]))
+                first_deleted = a_start + 2
+
+            line_numbers.extend(range(first_deleted, a_end+1))
+            line_diffs.extend([_DELETED_LINE] * (a_end+1 - first_deleted))
 
         return result
 
@@ -73,10 +367,10 @@ class Diff:
         Creates a Diff object from a given clang fixit and the file contents.
 
         :param fixit: A cindex.Fixit object.
-        :param file:  A list of lines in the file to apply the fixit to.
+        :param file:  A sequence of lines in the file to apply the fixit to.
         :return:      The corresponding Diff object.
         """
-        assert isinstance(file, (list, tuple))
+        assert isinstance(file, Sequence) and not isinstance(file, str)
 
         oldvalue = '\n'.join(file[fixit.range.start.line-1:
                                   fixit.range.end.line])
@@ -85,9 +379,9 @@ class Diff:
         newvalue = (oldvalue[:fixit.range.start.column-1] +
                     fixit.value +
                     oldvalue[endindex:])
-        new_file = (file[:fixit.range.start.line-1] +
-                    type(file)(newvalue.splitlines(True)) +
-                    file[fixit.range.end.line:])
+        new_file = (list(file[:fixit.range.start.line-1]) +
+                    newvalue.splitlines(True) +
+                    list(file[fixit.range.end.line:]))
 
         return cls.from_string_arrays(file, new_file)
 
@@ -97,23 +391,42 @@ class Diff:
         if line_nr < min_line:
             raise ValueError("The given line number is not allowed.")
 
-        return self._changes.get(line_nr, LineDiff())
+        index = bisect_left(self._line_numbers, line_nr)
+        if (index < len(self._line_numbers) and
+                self._line_numbers[index] == line_nr):
+            return self._line_diffs[index].copy()
+
+        return LineDiff()
+
+    def _set_change(self, line_nr, linediff):
+        index = bisect_left(self._line_numbers, line_nr)
+        if (index < len(self._line_numbers) and
+                self._line_numbers[index] == line_nr):
+            self._line_diffs[index] = linediff
+        else:
+            self._line_numbers.insert(index, line_nr)
+            self._line_diffs.insert(index, linediff)
+
+        self._clear_cache()
 
     def stats(self):
         """
         Returns tuple containing number of additions and deletions in the diff.
         """
-        additions = 0
-        deletions = 0
-        for line_diff in self._changes.values():
-            if line_diff.change:
-                additions += 1
-                deletions += 1
-            elif line_diff.delete:
-                deletions += 1
-            if line_diff.add_after:
-                additions += len(line_diff.add_after)
-        return additions, deletions
+        if self._stats is None:
+            additions = 0
+            deletions = 0
+            for line_diff in self._line_diffs:
+                if line_diff.change:
+                    additions += 1
+                    deletions += 1
+                elif line_diff.delete:
+                    deletions += 1
+                if line_diff.add_after:
+                    additions += len(line_diff.add_after)
+            self._stats = additions, deletions
+
+        return self._stats
 
     def __len__(self):
         """
@@ -151,6 +464,56 @@ class Diff:
         """
         self._delete = delete
 
+    def map_lines(self, start_line, end_line=None):
+        """
+        Calculates where lines of the original file are in the modified file.
+
+        >>> diff = Diff(["1", "2", "3", "4"])
+        >>> diff.add_lines(0, ["0"])
+        >>> diff.delete_line(2)
+        >>> diff.map_lines(1)
+        (2, 2)
+        >>> diff.map_lines(1, 3)
+        (2, 3)
+        >>> print(diff.map_lines(2, 4))
+        None
+
+        :param start_line: The number of the first line in the original file.
+        :param end_line:   The number of the last line in the original file,
+                           the same as the first one if it is not given.
+        :return:           A tuple with the numbers of the first and the last
+                           line in the modified file or None if any of the
+                           lines was changed or lines were added between
+                           them. Deleted lines in between are left out.
+        """
+        if self.delete:
+            return None
+
+        if self._line_offsets is None:
+            # The number of lines added before each change.
+            self._line_offsets = array("l", accumulate(chain(
+                (0,),
+                (len(linediff.add_after or ()) - linediff.delete
+                 for linediff in self._line_diffs))))
+
+        end_line = start_line if end_line is None else end_line
+        start_index = bisect_left(self._line_numbers, start_line)
+        end_index = bisect_left(self._line_numbers, end_line)
+        for index in range(start_index, end_index):
+            linediff = self._line_diffs[index]
+            if (linediff.change or linediff.add_after or
+                    (linediff.delete and
+                     self._line_numbers[index] == start_line)):
+                return None
+        if (end_index < len(self._line_numbers) and
+                self._line_numbers[end_index] == end_line):
+            linediff = self._line_diffs[end_index]
+            if linediff.delete or linediff.change:
+                return None
+
+        return (start_line + self._line_offsets[start_index],
+                end_line + self._line_offsets[end_index])
+
     @property
     def original(self):
         """
@@ -158,36 +521,49 @@ class Diff:
         """
         return self._file
 
+    @original.setter
+    def original(self, file_list):
+        """
+        Replaces the original file with another sequence of the same lines,
+        like a copy of it that stays usable longer.
+
+        :param file_list: The lines of the original file.
+        """
+        assert len(file_list) == len(self._file)
+        self._file = file_list
+
     @property
     def modified(self):
         """
         Calculates the modified file, after applying the Diff to the original.
         """
-        result = []
-
         if self.delete:
-            return result
+            return []
 
-        current_line = 0
+        if self._modified is None:
+            result = []
+            current_line = 0
 
-        # Note that line_nr counts from _1_ although 0 is possible when
-        # inserting lines before everything
-        for line_nr in sorted(self._changes):
-            result.extend(self._file[current_line:max(line_nr-1, 0)])
-            linediff = self._changes[line_nr]
-            if not linediff.delete and not linediff.change and line_nr > 0:
-                result.append(self._file[line_nr-1])
-            elif linediff.change:
-                result.append(linediff.change[1])
+            # Note that line_nr counts from _1_ although 0 is possible when
+            # inserting lines before everything
+            for line_nr, linediff in zip(self._line_numbers,
+                                         self._line_diffs):
+                result.extend(self._file[current_line:max(line_nr-1, 0)])
+                if (not linediff.delete and not linediff.change and
+                        line_nr > 0):
+                    result.append(self._file[line_nr-1])
+                elif linediff.change:
+                    result.append(linediff.change[1])
 
-            if linediff.add_after:
-                result.extend(linediff.add_after)
+                if linediff.add_after:
+                    result.extend(linediff.add_after)
 
-            current_line = line_nr
+                current_line = line_nr
 
-        result.extend(self._file[current_line:])
+            result.extend(self._file[current_line:])
+            self._modified = tuple(result)
 
-        return result
+        return list(self._modified)
 
     @property
     def unified_diff(self):
@@ -262,14 +638,16 @@ class Diff:
 
         last_line = -1
         this_diff = Diff(self._file, rename=self.rename, delete=self.delete)
-        for line in sorted(self._changes.keys()):
-            if line > last_line + distance + 1 and len(this_diff._changes) > 0:
+        for line, linediff in zip(self._line_numbers, self._line_diffs):
+            if (line > last_line + distance + 1 and
+                    len(this_diff._line_numbers) > 0):
                 yield this_diff
                 this_diff = Diff(self._file, rename=self.rename,
                                  delete=self.delete)
 
             last_line = line
-            this_diff._changes[line] = self._changes[line]
+            this_diff._line_numbers.append(line)
+            this_diff._line_diffs.append(linediff)
 
         # If the diff contains no line changes, the loop above will not be run
         # else, this_diff will never be empty and thus this has to be yielded
@@ -293,11 +671,11 @@ class Diff:
         :param filename: The filename to associate the SourceRange with.
         :return:         A SourceRange object.
         """
-        if len(self._changes) == 0:
+        if len(self._line_numbers) == 0:
             return SourceRange.from_values(filename)
 
-        start = min(self._changes.keys())
-        end = max(self._changes.keys())
+        start = self._line_numbers[0]
+        end = self._line_numbers[-1]
         return SourceRange.from_values(filename,
                                        start_line=max(1, start),
                                        end_line=max(1, end))
@@ -310,25 +688,75 @@ class Diff:
         if not isinstance(other, Diff):
             raise TypeError("Only diffs can be added to a diff.")
 
-        if self.rename != other.rename and False not in (self.rename,
-                                                         other.rename):
+        if self._renames_conflict(other):
             raise ConflictError("Diffs contain conflicting renamings.")
 
-        result = copy.deepcopy(self)
-        result.rename = self.rename or other.rename
-        result.delete = self.delete or other.delete
+        result = Diff(self._file,
+                      rename=self.rename or other.rename,
+                      delete=self.delete or other.delete)
+        line_numbers = result._line_numbers
+        line_diffs = result._line_diffs
+
+        # Both diffs are sorted by line number, so they are merged in one go.
+        index = 0
+        for line_nr, change in zip(other._line_numbers, other._line_diffs):
+            while (index < len(self._line_numbers) and
+                   self._line_numbers[index] < line_nr):
+                line_numbers.append(self._line_numbers[index])
+                line_diffs.append(self._line_diffs[index])
+                index += 1
+
+            if (index < len(self._line_numbers) and
+                    self._line_numbers[index] == line_nr):
+                change = _add_line_diffs(self._line_diffs[index], change)
+                index += 1
 
-        for line_nr in other._changes:
-            change = other._changes[line_nr]
-            if change.delete is True:
-                result.delete_line(line_nr)
-            if change.add_after is not False:
-                result.add_lines(line_nr, change.add_after)
-            if change.change is not False:
-                result.change_line(line_nr, change.change[0], change.change[1])
+            line_numbers.append(line_nr)
+            line_diffs.append(change)
+
+        line_numbers.extend(self._line_numbers[index:])
+        line_diffs.extend(self._line_diffs[index:])
 
         return result
 
+    def _renames_conflict(self, other):
+        return (self.rename != other.rename and
+                False not in (self.rename, other.rename))
+
+    def conflicts_with(self, other):
+        """
+        Checks if the given diff can be added to this one without creating
+        the sum of both. Only the lines changed by the given diff are looked
+        up, so this is cheap even if this diff changes a lot of lines.
+
+        >>> diff = Diff(["1", "2"])
+        >>> diff.change_line(1, "1", "3")
+        >>> other = Diff(["1", "2"])
+        >>> other.delete_line(2)
+        >>> diff.conflicts_with(other)
+        False
+        >>> other.delete_line(1)
+        >>> diff.conflicts_with(other)
+        True
+
+        :param other: The diff to check.
+        :return:      True if adding the diffs would raise a ``ConflictError``.
+        """
+        if self._renames_conflict(other):
+            return True
+
+        try:
+            for line_nr, change in zip(other._line_numbers,
+                                       other._line_diffs):
+                index = bisect_left(self._line_numbers, line_nr)
+                if (index < len(self._line_numbers) and
+                        self._line_numbers[index] == line_nr):
+                    _add_line_diffs(self._line_diffs[index], change)
+        except ConflictError:
+            return True
+
+        return False
+
     def __bool__(self):
         """
         >>> bool(Diff([]))
@@ -344,7 +772,7 @@ class Diff:
         """
         return (self.rename is not False or
                 self.delete is True or
-                len(self._changes) > 0)
+                len(self._line_numbers) > 0)
 
     def delete_line(self, line_nr):
         """
@@ -352,7 +780,7 @@ class Diff:
         """
         linediff = self._get_change(line_nr)
         linediff.delete = True
-        self._changes[line_nr] = linediff
+        self._set_change(line_nr, linediff)
 
     def add_lines(self, line_nr_before, lines):
         """
@@ -371,7 +799,7 @@ class Diff:
                                 "there are already lines.")
 
         linediff.add_after = lines
-        self._changes[line_nr_before] = linediff
+        self._set_change(line_nr_before, linediff)
 
     def change_line(self, line_nr, original_line, replacement):
         """
@@ -383,4 +811,4 @@ class Diff:
             raise ConflictError("An already changed line cannot be changed.")
 
         linediff.change = (original_line, replacement)
-        self._changes[line_nr] = linediff
+        self._set_change(line_nr, linediff)
@@ -13,6 +13,8 @@ class LineDiff:
     A LineDiff holds the difference between two strings.
     """
 
+    __slots__ = ('_change', '_delete', '_add_after')
+
     def __init__(self, change=False, delete=False, add_after=False):
         """
         Creates a new LineDiff object. Note that a line cannot be
@@ -29,6 +31,17 @@ class LineDiff:
         self.delete = delete
         self.add_after = add_after
 
+    def copy(self):
+        """
+        :return: A new LineDiff holding the same changes.
+        """
+        result = LineDiff.__new__(LineDiff)
+        result._change = self._change
+        result._delete = self._delete
+        result._add_after = (list(self._add_after) if self._add_after
+                             else False)
+        return result
+
     def __eq__(self, other):
         return (self.change == other.change and
                 self.delete == other.delete and
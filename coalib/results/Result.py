@@ -53,6 +53,29 @@ class Result:
                                 sequence of ``Diff`` objects associated with
                                 them as values.
         """
+        # Sorting is important for tuple comparison
+        self._init(origin,
+                   message,
+                   tuple(sorted(affected_code)),
+                   severity,
+                   additional_info,
+                   debug_msg,
+                   diffs)
+
+    def _init(self,
+              origin,
+              message,
+              affected_code,
+              severity,
+              additional_info,
+              debug_msg,
+              diffs):
+        """
+        Sets the members of the result like ``__init__`` without checking the
+        types of the arguments. ``affected_code`` has to be a sorted tuple.
+
+        :raises ValueError: Raised when the severity is invalid.
+        """
         origin = origin or ""
         if not isinstance(origin, str):
             origin = origin.__class__.__name__
@@ -63,8 +86,7 @@ class Result:
         self.message = message
         self.debug_msg = debug_msg
         self.additional_info = additional_info
-        # Sorting is important for tuple comparison
-        self.affected_code = tuple(sorted(affected_code))
+        self.affected_code = affected_code
         self.severity = severity
         self.diffs = diffs
         self.id = uuid.uuid4().int
@@ -121,6 +143,44 @@ class Result:
                    debug_msg=debug_msg,
                    diffs=diffs)
 
+    @classmethod
+    def from_values_unchecked(cls,
+                              origin,
+                              message,
+                              file,
+                              line=None,
+                              column=None,
+                              end_line=None,
+                              end_column=None,
+                              severity=RESULT_SEVERITY.NORMAL,
+                              additional_info="",
+                              debug_msg=""):
+        """
+        Does the same as ``from_values``, but doesn't check the types of the
+        arguments, which is a lot faster when creating many results from
+        values known to be valid, like the ones parsed from the output of a
+        tool. ``file`` has to be an absolute path.
+
+        >>> from os.path import abspath
+        >>> result = Result.from_values_unchecked("Bear", "msg",
+        ...                                       abspath("a.py"), 2, 1)
+        >>> result == Result.from_values("Bear", "msg", "a.py", 2, 1)
+        True
+
+        :raises ValueError: Raised when a position or the severity is
+                            invalid.
+        """
+        result = cls.__new__(cls)
+        result._init(origin,
+                     message,
+                     (SourceRange.from_values_unchecked(
+                         file, line, column, end_line, end_column),),
+                     severity,
+                     additional_info,
+                     debug_msg,
+                     None)
+        return result
+
     def to_string_dict(self):
         """
         Makes a dictionary which has all keys and values as strings and
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+from collections import Counter
+
+from coalib.results.RESULT_SEVERITY import RESULT_SEVERITY
+
+
+def normalize_line(line):
+    """
+    Normalizes a line of code for fingerprints, so changes of the indentation
+    or of other whitespace don't change the fingerprint.
+
+    >>> normalize_line("    a  =  1\\n")
+    'a = 1'
+
+    :param line: The line to normalize.
+    :return:     The line with all runs of whitespace replaced by one space
+                 and no whitespace at its start and end.
+    """
+    return " ".join(line.split())
+
+
+def _get_path(filename):
+    try:
+        filename = os.path.relpath(filename)
+    except ValueError:  # pragma: no cover
+        # Files on another drive than the working directory on Windows.
+        pass
+    return filename.replace(os.sep, "/")
+
+
+def get_fingerprint(result, file_dict, context_lines=2):
+    """
+    Creates a fingerprint that identifies the result across runs of coala.
+    It doesn't contain the line numbers of the affected code, so the
+    fingerprint doesn't change if code before the result is added or
+    removed. Instead the affected lines and the lines around them are part
+    of it, normalized with ``normalize_line`` and without empty lines:
+
+    >>> from coalib.results.Result import Result
+    >>> result = Result.from_values("Bear", "msg", "a.py", 2)
+    >>> filename = result.affected_code[0].file
+    >>> fingerprint = get_fingerprint(
+    ...     result, {filename: ["import os\\n", "x  = 1\\n"]})
+    >>> moved_result = Result.from_values("Bear", "msg", "a.py", 3)
+    >>> fingerprint == get_fingerprint(
+    ...     moved_result, {filename: ["\\n", "import os\\n", "x = 1\\n"]})
+    True
+    >>> fingerprint == get_fingerprint(
+    ...     moved_result, {filename: ["\\n", "import re\\n", "x = 1\\n"]})
+    False
+
+    :param result:        The result to create the fingerprint of.
+    :param file_dict:     A dict containing the contents of the affected
+                          files with the file names as keys. Files that are
+                          not in it contribute only their names.
+    :param context_lines: The number of lines before and after the affected
+                          code that are part of the fingerprint.
+    :return:              The fingerprint as a string of hexadecimal digits.
+    """
+    parts = [result.origin,
+             result.message,
+             RESULT_SEVERITY.reverse.get(result.severity, result.severity)]
+    for source_range in sorted(result.affected_code):
+        parts.append(_get_path(source_range.file))
+        file = file_dict.get(source_range.file)
+        if file is None or source_range.start.line is None:
+            continue
+
+        start_line = source_range.start.line
+        end_line = (start_line if source_range.end.line is None
+                    else source_range.end.line)
+        lines = map(normalize_line,
+                    file[max(0, start_line-1-context_lines):
+                         end_line+context_lines])
+        parts.append([line for line in lines if line])
+
+    return hashlib.sha1(
+        json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultBaseline:
+    """
+    Holds the fingerprints of the results of a run of coala, e.g. on the main
+    branch of a project, so that later runs only report results that are not
+    in it. The fingerprints are counted, so if a result occurs more often
+    than in the baseline the additional ones are reported:
+
+    >>> from coalib.results.Result import Result
+    >>> file_dict = {}
+    >>> result = Result("Bear", "msg")
+    >>> baseline = ResultBaseline()
+    >>> len(baseline.check([result], file_dict))
+    1
+    >>> baseline = ResultBaseline(baseline.recorded)
+    >>> len(baseline.check([result, result], file_dict))
+    1
+
+    All results checked are recorded, so a new baseline can be written with
+    ``write()``. It is stored as a JSON file and read with ``load()``.
+    """
+
+    def __init__(self, fingerprints=(), context_lines=2):
+        """
+        :param fingerprints:  An iterable or a mapping with counts of the
+                              fingerprints of the results that are not
+                              reported, see ``get_fingerprint``.
+        :param context_lines: The number of lines around the affected code
+                              that are part of the fingerprints.
+        """
+        self.fingerprints = Counter(fingerprints)
+        self.context_lines = context_lines
+        self.recorded = Counter()
+        self._files = {}
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Reads a baseline written by ``write()``.
+
+        :param filename:    The name of the file to read.
+        :return:            The ``ResultBaseline``.
+        :raises OSError:    If the file can't be read.
+        :raises ValueError: If the file doesn't contain a baseline.
+        """
+        with open(filename, encoding="utf-8") as file:
+            data = json.load(file)
+
+        if (not isinstance(data, dict) or
+                not isinstance(data.get("fingerprints"), dict)):
+            raise ValueError("{!r} does not contain a baseline.".format(
+                filename))
+
+        return cls(data["fingerprints"],
+                   data.get("context_lines", 2))
+
+    def write(self, filename):
+        """
+        Writes the fingerprints of all results checked with this baseline.
+
+        :param filename: The name of the file to write.
+        """
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump({"context_lines": self.context_lines,
+                       "fingerprints": dict(self.recorded)},
+                      file,
+                      indent=1,
+                      sort_keys=True)
+
+    def _get_file(self, filename, file_dict):
+        if filename in file_dict:
+            return file_dict[filename]
+
+        # Global bears may yield results for files that were not loaded in
+        # this section.
+        if filename not in self._files:
+            try:
+                with open(filename, encoding="utf-8",
+                          errors="surrogateescape") as file:
+                    self._files[filename] = file.readlines()
+            except OSError:
+                self._files[filename] = None
+
+        return self._files[filename]
+
+    def check(self, results, file_dict):
+        """
+        Records the given results and filters out the ones in the baseline.
+
+        :param results:   The results to check.
+        :param file_dict: A dict containing the contents of the files with
+                          the file names as keys. Affected files that are not
+                          in it are read from disk.
+        :return:          A list of the results that are not in the baseline.
+        """
+        new_results = []
+        for result in results:
+            files = {code.file: self._get_file(code.file, file_dict)
+                     for code in result.affected_code}
+            fingerprint = get_fingerprint(result, files, self.context_lines)
+            self.recorded[fingerprint] += 1
+            if self.fingerprints[fingerprint] > 0:
+                self.fingerprints[fingerprint] -= 1
+            else:
+                new_results.append(result)
+
+        return new_results
@@ -1,16 +1,51 @@
-import copy
-from difflib import SequenceMatcher
+from collections import Counter
+from hashlib import sha1, sha512
+from struct import Struct
 
 from coalib.results.Diff import ConflictError, Diff
 from coalib.results.SourceRange import SourceRange
 
 
+#: The share of the contents a removed and an added file need to have in
+#: common to be considered a renamed file.
+RENAME_THRESHOLD = 0.5
+
+#: The maximal number of pairs of removed and added files that are compared
+#: to detect renamed files. If there are more pairs, only files with similar
+#: MinHash sketches are compared.
+MAX_RENAME_PAIRS = 400
+
+#: The number of MinHash values in the sketch of a file. The sketches of two
+#: files share the value of one hash function with a probability of their
+#: Jaccard index, the share of their distinct lines they have in common. So
+#: the sketches of files of the same size sharing half of their lines
+#: (Jaccard index 1/3) share a value with a probability of 1 - (2/3)**16,
+#: about 99.8%, and of files sharing 60% of their lines about 99.99%.
+MINHASH_SKETCH_SIZE = 16
+
+#: The values of the hash functions of the MinHash sketches of a line are
+#: the parts of the SHA-512 hash of the line.
+_SKETCH_STRUCT = Struct("<{}I".format(MINHASH_SKETCH_SIZE))
+
+#: Sketch values that are in the sketches of more removed files than this
+#: are too common to find similar files with. They are ignored, which makes
+#: missing renamed files sharing mostly common lines more likely.
+MAX_SKETCH_BUCKET_SIZE = 100
+
+
 def filter_results(original_file_dict,
                    modified_file_dict,
                    original_results,
                    modified_results):
     """
-    Filters results for such ones that are unique across file changes
+    Filters results for such ones that are unique across file changes.
+
+    The original results are grouped by their origin, message, severity and
+    debug message and their affected code is mapped to the modified files
+    once. A modified result is unique if no original result of its group
+    affects the same code, which takes about linear time. Code in lines that
+    were altered or got lines added in between is never matched. Only the
+    files affected by the original results are compared.
 
     :param original_file_dict: Dict of lists of file contents before  changes
     :param modified_file_dict: Dict of lists of file contents after changes
@@ -19,43 +54,71 @@ def filter_results(original_file_dict,
     :return:                   List of results from new files that are unique
                                from all those that existed in the old changes
     """
-
     renamed_files = ensure_files_present(original_file_dict,
                                          modified_file_dict)
-    # diffs_dict[file] is a diff between the original and modified file
+    # diffs_dict[file] is a diff between the original and modified file, it
+    # is only created when a result affects the file.
     diffs_dict = {}
-    for file in original_file_dict:
-        diffs_dict[file] = Diff.from_string_arrays(
-            original_file_dict[file],
-            modified_file_dict[renamed_files.get(file, file)])
-
-    orig_result_diff_dict_dict = remove_result_ranges_diffs(original_results,
-                                                            original_file_dict)
 
-    mod_result_diff_dict_dict = remove_result_ranges_diffs(modified_results,
-                                                           modified_file_dict)
-
-    unique_results = []
-
-    for m_r in reversed(modified_results):
-        unique = True
-
-        for o_r in original_results:
-
-            if basics_match(o_r, m_r):
-                if source_ranges_match(original_file_dict,
-                                       diffs_dict,
-                                       orig_result_diff_dict_dict[o_r],
-                                       mod_result_diff_dict_dict[m_r],
-                                       renamed_files):
-
-                    # at least one original result matches completely
-                    unique = False
-                    break
-        if unique:
-            unique_results.append(m_r)
-
-    return unique_results
+    def map_range(source_range):
+        file_name = source_range.file
+        if file_name not in original_file_dict:
+            return None
+        if file_name not in diffs_dict:
+            diffs_dict[file_name] = Diff.from_string_arrays(
+                original_file_dict[file_name],
+                modified_file_dict[renamed_files.get(file_name, file_name)])
+
+        start = source_range.start
+        end = source_range.end
+        lines = diffs_dict[file_name].map_lines(
+            1 if start.line is None else start.line,
+            len(original_file_dict[file_name]) if end.line is None
+            else end.line)
+        if lines is None:
+            return None
+
+        return (renamed_files.get(file_name, file_name),
+                None if start.line is None else lines[0],
+                start.column,
+                None if end.line is None else lines[1],
+                end.column)
+
+    original_code = {}
+    for o_r in original_results:
+        affected_code = _get_affected_code(o_r, map_range)
+        if affected_code is not None:
+            original_code.setdefault(_get_basics(o_r), set()).add(
+                affected_code)
+
+    return [m_r
+            for m_r in reversed(modified_results)
+            if _get_affected_code(m_r, _get_range_key) not in
+            original_code.get(_get_basics(m_r), ())]
+
+
+def _get_basics(result):
+    return result.origin, result.message, result.severity, result.debug_msg
+
+
+def _get_range_key(source_range):
+    return (source_range.file,
+            source_range.start.line,
+            source_range.start.column,
+            source_range.end.line,
+            source_range.end.column)
+
+
+def _get_affected_code(result, get_key):
+    """
+    :param result:  The result.
+    :param get_key: A function returning a hashable key for a SourceRange or
+                    None if the range can't be matched.
+    :return:        A frozenset with the keys of the code affected by the
+                    result or None if any of it can't be matched.
+    """
+    keys = frozenset(map(get_key, result.affected_code))
+    return None if None in keys else keys
 
 
 def basics_match(original_result,
@@ -173,7 +236,9 @@ def remove_result_ranges_diffs(result_list, file_dict):
     """
     result_diff_dict_dict = {}
     for original_result in result_list:
-        mod_file_dict = copy.deepcopy(file_dict)
+        # Only the files affected by the result are changed, remove_range
+        # copies them before.
+        mod_file_dict = {}
 
         # gather all source ranges from this result
         source_ranges = []
@@ -200,24 +265,155 @@ def remove_result_ranges_diffs(result_list, file_dict):
 
         for source_range in source_ranges:
             file_name = source_range.file
-            new_file = remove_range(mod_file_dict[file_name],
+            new_file = remove_range(mod_file_dict.get(file_name,
+                                                      file_dict[file_name]),
                                     source_range)
             mod_file_dict[file_name] = new_file
 
         diff_dict = {}
         for file_name in file_dict:
-            diff_dict[file_name] = Diff.from_string_arrays(
-                file_dict[file_name],
-                mod_file_dict[file_name])
+            if file_name in mod_file_dict:
+                diff_dict[file_name] = Diff.from_string_arrays(
+                    file_dict[file_name],
+                    mod_file_dict[file_name])
+            else:
+                diff_dict[file_name] = Diff(file_dict[file_name])
 
         result_diff_dict_dict[original_result] = diff_dict
 
     return result_diff_dict_dict
 
 
+def _encode(text):
+    return text.encode("utf-8", "surrogateescape")
+
+
+def _get_sketch(lines):
+    """
+    :return: The MinHash sketch of the set of the given lines that aren't
+             blank: a list of tuples with the index of every hash function
+             and the smallest hash of a line it gives.
+    """
+    line_hashes = {sha512(_encode(line)).digest()
+                   for line in lines
+                   if line and not line.isspace()}
+    return list(enumerate(map(min, zip(*map(_SKETCH_STRUCT.unpack_from,
+                                            line_hashes)))))
+
+
+def _get_similarity(lines_a, size_a, lines_b, size_b):
+    """
+    :return: The share of the characters of the larger file that are in
+             lines both files contain, like git calculates it.
+    """
+    if len(lines_a) > len(lines_b):
+        lines_a, lines_b = lines_b, lines_a
+
+    shared = sum(len(line) * min(count, lines_b[line])
+                 for line, count in lines_a.items()
+                 if line in lines_b)
+    return shared / max(size_a, size_b, 1)
+
+
+def get_renamed_files(removed_file_dict, added_file_dict):
+    """
+    Detects which of the removed files were renamed to which added files,
+    similar to how git does it. Files with the same contents are paired
+    first. The other files are renamed if more than ``RENAME_THRESHOLD`` of
+    their characters are in lines both files contain, the most similar files
+    are paired first. If there are many files, only files that share a value
+    of their MinHash sketches are compared, so no pairwise comparison of all
+    files is needed:
+
+    >>> renamed_files = get_renamed_files(
+    ...     {"a": ["1\\n", "2\\n", "3\\n"], "b": ["4\\n", "5\\n"]},
+    ...     {"c": ["4\\n", "5\\n"], "d": ["1\\n", "2\\n", "6\\n"]})
+    >>> sorted(renamed_files.items())
+    [('a', 'd'), ('b', 'c')]
+
+    :param removed_file_dict: A dict with the names of the files that only
+                              exist before the changes as keys and their
+                              contents as values.
+    :param added_file_dict:   A dict with the names and contents of the files
+                              that only exist after the changes.
+    :return:                  A dict mapping the names of the renamed files
+                              to their new names.
+    """
+    renamed_files = {}
+    removed_by_content = {}
+    for file in sorted(removed_file_dict):
+        key = sha1(_encode("".join(removed_file_dict[file]))).digest()
+        removed_by_content.setdefault(key, []).append(file)
+
+    added_files = []
+    for file in sorted(added_file_dict):
+        key = sha1(_encode("".join(added_file_dict[file]))).digest()
+        if removed_by_content.get(key):
+            renamed_files[removed_by_content[key].pop(0)] = file
+        else:
+            added_files.append(file)
+
+    removed_files = [file
+                     for file in sorted(removed_file_dict)
+                     if file not in renamed_files]
+    if not added_files or not removed_files:
+        return renamed_files
+
+    if len(added_files) * len(removed_files) <= MAX_RENAME_PAIRS:
+        candidates = [(added, removed)
+                      for added in added_files
+                      for removed in removed_files]
+    else:
+        buckets = {}
+        for removed in removed_files:
+            for value in _get_sketch(removed_file_dict[removed]):
+                buckets.setdefault(value, []).append(removed)
+
+        candidates = []
+        for added in added_files:
+            similar_files = set()
+            for value in _get_sketch(added_file_dict[added]):
+                bucket = buckets.get(value, ())
+                if len(bucket) <= MAX_SKETCH_BUCKET_SIZE:
+                    similar_files.update(bucket)
+            candidates.extend((added, removed)
+                              for removed in sorted(similar_files))
+
+    contents = {}
+
+    def get_contents(file, file_dict):
+        if file not in contents:
+            contents[file] = (Counter(file_dict[file]),
+                              sum(map(len, file_dict[file])))
+        return contents[file]
+
+    scores = []
+    for added, removed in candidates:
+        added_lines, added_size = get_contents(added, added_file_dict)
+        removed_lines, removed_size = get_contents(removed, removed_file_dict)
+        # Files can't share more characters than the smaller one has.
+        if (min(added_size, removed_size) <=
+                RENAME_THRESHOLD * max(added_size, removed_size)):
+            continue
+
+        score = _get_similarity(added_lines, added_size,
+                                removed_lines, removed_size)
+        if score > RENAME_THRESHOLD:
+            scores.append((-score, added, removed))
+
+    renamed_targets = set(renamed_files.values())
+    for score, added, removed in sorted(scores):
+        if added not in renamed_targets and removed not in renamed_files:
+            renamed_files[removed] = added
+            renamed_targets.add(added)
+
+    return renamed_files
+
+
 def ensure_files_present(original_file_dict, modified_file_dict):
     """
-    Ensures that all files are available as keys in both dicts.
+    Ensures that all files are available as keys in both dicts. Renamed files
+    are detected with ``get_renamed_files``.
 
     :param original_file_dict: Dict of lists of file contents before  changes
     :param modified_file_dict: Dict of lists of file contents after changes
@@ -225,24 +421,15 @@ def ensure_files_present(original_file_dict, modified_file_dict):
     """
     original_files = set(original_file_dict.keys())
     modified_files = set(modified_file_dict.keys())
-    affected_files = original_files | modified_files
-    original_unique_files = affected_files - modified_files
-    renamed_files_dict = {}
-    for file in filter(
-            lambda filter_file: filter_file not in original_files,
-            affected_files):
-        for comparable_file in original_unique_files:
-            s = SequenceMatcher(
-                None,
-                ''.join(modified_file_dict[file]),
-                ''.join(original_file_dict[comparable_file]))
-            if s.real_quick_ratio() >= 0.5 and s.ratio() > 0.5:
-                renamed_files_dict[comparable_file] = file
-                break
-        else:
-            original_file_dict[file] = []
-    for file in filter(
-            lambda filter_file: filter_file not in modified_files,
-            affected_files):
+    renamed_files_dict = get_renamed_files(
+        {file: original_file_dict[file]
+         for file in original_files - modified_files},
+        {file: modified_file_dict[file]
+         for file in modified_files - original_files})
+
+    renamed_targets = set(renamed_files_dict.values())
+    for file in modified_files - original_files - renamed_targets:
+        original_file_dict[file] = []
+    for file in original_files - modified_files:
         modified_file_dict[file] = []
     return renamed_files_dict
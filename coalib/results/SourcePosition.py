@@ -27,6 +27,28 @@ class SourcePosition(TextPosition):
 
         self._file = abspath(file)
 
+    @classmethod
+    def from_values_unchecked(cls, file, line=None, column=None):
+        """
+        Creates a new ``SourcePosition`` without checking the types of the
+        arguments, which is a lot faster when creating many positions from
+        values known to be valid.
+
+        :param file:        The absolute path of the file.
+        :param line:        The line in file or None, the first line is 1.
+        :param column:      The column indicating the character. The first one
+                            in a line is 1.
+        :raises ValueError: Raised when a column is set but line is None.
+        """
+        if line is None and column is not None:
+            raise ValueError("A column can only be set if a line is set.")
+
+        position = cls.__new__(cls)
+        position._file = file
+        position._line = line
+        position._column = column
+        return position
+
     @property
     def file(self):
         return self._file
@@ -6,6 +6,15 @@ from coalib.results.TextRange import TextRange
 from coalib.results.AbsolutePosition import AbsolutePosition
 
 
+_MINIMUM = float("-inf")
+
+
+def _position_key(position):
+    # None is smaller than any other value, like in the ordering of positions.
+    return (_MINIMUM if position.line is None else position.line,
+            _MINIMUM if position.column is None else position.column)
+
+
 class SourceRange(TextRange):
 
     @enforce_signature
@@ -46,6 +55,41 @@ class SourceRange(TextRange):
 
         return cls(start, end)
 
+    @classmethod
+    def from_values_unchecked(cls,
+                              file,
+                              start_line=None,
+                              start_column=None,
+                              end_line=None,
+                              end_column=None):
+        """
+        Does the same as ``from_values``, but doesn't check the types of the
+        arguments, which is a lot faster when creating many ranges from values
+        known to be valid, like the ones parsed from the output of a tool.
+
+        :param file:        The absolute path of the file.
+        :raises ValueError: Raised when a position is invalid or when the end
+                            position is smaller than the start position.
+        """
+        start = SourcePosition.from_values_unchecked(file,
+                                                     start_line,
+                                                     start_column)
+        if end_line or (end_column and end_column > start_column):
+            end = SourcePosition.from_values_unchecked(
+                file, end_line if end_line else start_line, end_column)
+            if _position_key(end) < _position_key(start):
+                raise ValueError("End position can't be less than start "
+                                 "position.")
+        else:
+            end = SourcePosition.from_values_unchecked(file,
+                                                       start_line,
+                                                       start_column)
+
+        range = cls.__new__(cls)
+        range._start = start
+        range._end = end
+        return range
+
     @classmethod
     def from_clang_range(cls, range):
         """
@@ -1,8 +1,9 @@
 import shutil
+from contextlib import contextmanager
 from os.path import isfile
 from os import remove
 
-from coalib.results.Diff import ConflictError
+from coalib.misc.MappedFile import MappedFile
 from coalib.results.result_actions.ResultAction import ResultAction
 
 
@@ -10,20 +11,91 @@ class ApplyPatchAction(ResultAction):
 
     SUCCESS_MESSAGE = "Patch applied successfully."
 
+    #: The files patched in the current batch, with the name they had on disk
+    #: before and the dict holding their diff. ``None`` if no batch is active.
+    _pending_files = None
+
     @staticmethod
     def is_applicable(result, original_file_dict, file_diff_dict):
         if not result.diffs:
             return False
 
+        return not any(file_diff_dict[filename].conflicts_with(
+                           result.diffs[filename])
+                       for filename in result.diffs
+                       if filename in file_diff_dict)
+
+    @classmethod
+    @contextmanager
+    def batch(cls):
+        """
+        Collects the patches applied within this context and writes every
+        patched file only once when leaving it, instead of rewriting the
+        whole file for every single patch. The diffs are still added to the
+        ``file_diff_dict`` right away. Nested batches are written together
+        with the outermost one.
+        """
+        if cls._pending_files is not None:
+            yield
+            return
+
+        cls._pending_files = {}
         try:
-            for filename in result.diffs:
-                if filename in file_diff_dict:
-                    result.diffs[filename].__add__(
-                        file_diff_dict[filename])
+            yield
+        finally:
+            try:
+                cls.write_pending_files()
+            finally:
+                cls._pending_files = None
 
-            return True
-        except ConflictError:
-            return False
+    @classmethod
+    def write_pending_files(cls, filenames=None):
+        """
+        Writes files patched in the current batch right away, e.g. because
+        they are going to be read from disk.
+
+        :param filenames: The names of the files to write, as used in the
+                          ``file_diff_dict``. All files of the batch are
+                          written if this is ``None``.
+        """
+        if not cls._pending_files:
+            return
+
+        if filenames is None:
+            filenames = list(cls._pending_files)
+
+        for filename in filenames:
+            if filename in cls._pending_files:
+                pre_patch_filename, file_diff_dict = cls._pending_files.pop(
+                    filename)
+                cls._write_file(filename,
+                                pre_patch_filename,
+                                file_diff_dict[filename])
+
+    @classmethod
+    def is_pending(cls, filename):
+        """
+        :param filename: The name of a file as used in the
+                         ``file_diff_dict``.
+        :return:         True if the file was patched in the current batch
+                         and was not written yet.
+        """
+        return bool(cls._pending_files) and filename in cls._pending_files
+
+    @staticmethod
+    def _write_file(filename, pre_patch_filename, diff):
+        # The file may be mapped by other diffs or file dicts than this diff.
+        MappedFile.release_all(pre_patch_filename)
+        if diff.delete or diff.rename:
+            if isfile(pre_patch_filename):
+                remove(pre_patch_filename)
+        if not diff.delete:
+            new_filename = (diff.rename
+                            if diff.rename is not False
+                            else filename)
+            MappedFile.release_all(new_filename)
+            with open(new_filename, mode='w', encoding='utf-8') as file:
+                file.writelines(diff.modified)
 
     def apply(self,
               result,
@@ -52,15 +124,14 @@ class ApplyPatchAction(ResultAction):
                     shutil.copy2(pre_patch_filename,
                                  pre_patch_filename + ".orig")
 
-            diff = file_diff_dict[filename]
-            if diff.delete or diff.rename:
-                if isfile(pre_patch_filename):
-                    remove(pre_patch_filename)
-            if not diff.delete:
-                new_filename = (diff.rename
-                                if diff.rename is not False
-                                else filename)
-                with open(new_filename, mode='w', encoding='utf-8') as file:
-                    file.writelines(diff.modified)
+            if self._pending_files is None:
+                self._write_file(filename,
+                                 pre_patch_filename,
+                                 file_diff_dict[filename])
+            else:
+                # The file on disk is still the one before the first patch of
+                # the batch.
+                self._pending_files.setdefault(
+                    filename, (pre_patch_filename, file_diff_dict))
 
         return file_diff_dict
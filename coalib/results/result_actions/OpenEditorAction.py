@@ -1,8 +1,10 @@
 import subprocess
 from os.path import exists
 
+from coalib.misc.MappedFile import MappedFile
 from coalib.results.Diff import Diff
 from coalib.results.Result import Result
+from coalib.results.result_actions.ApplyPatchAction import ApplyPatchAction
 from coalib.results.result_actions.ResultAction import ResultAction
 
 EDITOR_ARGS = {
@@ -28,9 +30,12 @@ class OpenEditorAction(ResultAction):
         if not isinstance(result, Result) or not len(result.affected_code) > 0:
             return False
 
-        filenames = set(src.renamed_file(file_diff_dict)
-                        for src in result.affected_code)
-        return all(exists(filename) for filename in filenames)
+        # Files patched in the current batch are written by apply() before
+        # the editor is opened, so they exist unless they are deleted.
+        return all(not file_diff_dict[src.file].delete
+                   if ApplyPatchAction.is_pending(src.file)
+                   else exists(src.renamed_file(file_diff_dict))
+                   for src in result.affected_code)
 
     def apply(self, result, original_file_dict, file_diff_dict, editor: str):
         '''
@@ -41,6 +46,9 @@ class OpenEditorAction(ResultAction):
         # Use set to remove duplicates
         filenames = {src.file: src.renamed_file(file_diff_dict)
                      for src in result.affected_code}
+        ApplyPatchAction.write_pending_files(filenames)
+        for filename in filenames.values():
+            MappedFile.release_all(filename)
 
         editor_args = [editor] + list(filenames.values())
         arg = EDITOR_ARGS.get(editor.strip(), None)
@@ -1,15 +1,21 @@
+import json
+import multiprocessing
 import os
+from pathlib import Path
 import re
 import sys
 import unittest
-from unittest.mock import ANY, Mock
+from unittest.mock import ANY, Mock, patch
 
-from coalib.bearlib.abstractions.Linter import linter
+from coalib.bearlib.abstractions.Linter import (
+    _persistent_processes, _remove_config_files, _stop_persistent_processes,
+    linter)
 from coalib.results.Diff import Diff
 from coalib.results.Result import Result
 from coalib.results.RESULT_SEVERITY import RESULT_SEVERITY
 from coalib.results.SourceRange import SourceRange
 from coalib.settings.Section import Section
+from coalib.settings.Setting import Setting
 
 
 def get_testfile_name(name):
@@ -78,6 +84,26 @@ class LinterComponentTest(unittest.TestCase):
                          "Invalid keyword arguments provided: "
                          "'prerequisite_check_fail_message'")
 
+        with self.assertRaises(ValueError) as cm:
+            linter("some-executable",
+                   output_format="sarif",
+                   json_mapping={})
+        self.assertEqual(str(cm.exception),
+                         "Invalid keyword arguments provided: 'json_mapping'")
+
+        with self.assertRaises(ValueError) as cm:
+            linter("some-executable",
+                   output_format="json",
+                   json_mapping={"lines": "line"})
+        self.assertEqual(str(cm.exception),
+                         "Invalid key 'lines' inside given json-mapping.")
+
+        with self.assertRaises(ValueError) as cm:
+            linter("some-executable", persistent_delimiter="--END--")
+        self.assertEqual(str(cm.exception),
+                         "Invalid keyword arguments provided: "
+                         "'persistent_delimiter'")
+
     def test_decorator_invalid_states(self):
         with self.assertRaises(ValueError) as cm:
             linter("some-executable", use_stdout=False, use_stderr=False)
@@ -120,6 +146,43 @@ class LinterComponentTest(unittest.TestCase):
             "'ManualProcessingTestLinter', but 'regex' output-format is "
             "specified.")
 
+        with self.assertRaises(ValueError) as cm:
+            linter("some-executable", persistent=True)
+        self.assertEqual(str(cm.exception),
+                         "`persistent_delimiter` needed when the executable "
+                         "is run persistently.")
+
+        with self.assertRaises(ValueError) as cm:
+            linter("some-executable",
+                   persistent=True,
+                   persistent_delimiter="--END--",
+                   use_stderr=True)
+        self.assertEqual(str(cm.exception),
+                         "Only stdout can be used when the executable is run "
+                         "persistently.")
+
+        with self.assertRaises(ValueError) as cm:
+            linter("some-executable", concurrency=0)
+        self.assertEqual(str(cm.exception),
+                         "`concurrency` needs to be at least 1.")
+
+        with self.assertRaises(ValueError) as cm:
+            linter("some-executable",
+                   persistent=True,
+                   persistent_delimiter="--END--",
+                   concurrency=2)
+        self.assertEqual(str(cm.exception),
+                         "`concurrency` can't be used when the executable is "
+                         "run persistently.")
+
+        with self.assertRaises(ValueError) as cm:
+            linter("some-executable",
+                   persistent=True,
+                   persistent_delimiter="--END--",
+                   persistent_timeout=0)
+        self.assertEqual(str(cm.exception),
+                         "`persistent_timeout` needs to be positive.")
+
     def test_decorator_generated_default_interface(self):
         uut = linter("some-executable")(self.ManualProcessingTestLinter)
         with self.assertRaises(NotImplementedError):
@@ -182,6 +245,33 @@ class LinterComponentTest(unittest.TestCase):
                    prerequisite_check_command=("command",),
                    prerequisite_check_fail_message=382983)
 
+        with self.assertRaises(TypeError):
+            linter("some-executable",
+                   output_format="json",
+                   json_mapping={"line": 1})
+
+        with self.assertRaises(TypeError):
+            linter("some-executable",
+                   output_format="json",
+                   json_results_path="issues")
+
+        with self.assertRaises(TypeError):
+            linter("some-executable",
+                   output_format="sarif",
+                   severity_map={"note": "invalid"})
+
+        with self.assertRaises(TypeError):
+            linter("some-executable",
+                   persistent=True,
+                   persistent_delimiter="--END--",
+                   persistent_arguments=["--server"])
+
+        with self.assertRaises(TypeError):
+            linter("some-executable",
+                   persistent=True,
+                   persistent_delimiter="--END--",
+                   persistent_timeout="60")
+
     def test_get_executable(self):
         uut = linter("some-executable")(self.ManualProcessingTestLinter)
         self.assertEqual(uut.get_executable(), "some-executable")
@@ -384,6 +474,116 @@ class LinterComponentTest(unittest.TestCase):
 
         self.assertEqual(results, expected)
 
+    def test_process_output_json(self):
+        test_output = (
+            '[{"line": 12, "column": 4, "end_line": 14, "end_column": 1,'
+            '  "message": "Serious issue ", "severity": "ERROR",'
+            '  "origin": "X", "additional_info": "D"},'
+            ' {"line": "3", "message": "Unknown sev", "severity": "???"},'
+            ' {"message": "Other file", "file": "other-file.xtx"},'
+            ' "no issue"]\n'
+            '[{"message": "Same file", "file": "some-file.xtx"}]\n')
+
+        uut = (linter(sys.executable, output_format="json")
+               (self.EmptyTestLinter)
+               (self.section, None))
+        uut.warn = Mock()
+
+        sample_file = "some-file.xtx"
+        results = list(uut.process_output(test_output, sample_file, [""]))
+        expected = [Result.from_values("EmptyTestLinter (X)",
+                                       "Serious issue",
+                                       sample_file,
+                                       12, 4, 14, 1,
+                                       RESULT_SEVERITY.MAJOR,
+                                       additional_info="D"),
+                    Result.from_values("EmptyTestLinter",
+                                       "Unknown sev",
+                                       sample_file,
+                                       3),
+                    Result.from_values("EmptyTestLinter",
+                                       "Same file",
+                                       sample_file)]
+
+        self.assertEqual(results, expected)
+        uut.warn.assert_called_once_with(
+            "'???' not found in severity-map. Assuming "
+            "`RESULT_SEVERITY.NORMAL`.")
+
+        # Invalid output is reported.
+        results = list(uut.process_output(['[]', '[{"line": 1'],
+                                          sample_file,
+                                          [""]))
+        self.assertEqual(results, [])
+        self.assertEqual(uut.warn.call_count, 2)
+        self.assertIn("could not be decoded as JSON",
+                      uut.warn.call_args[0][0])
+
+        # Test with a mapping and a path to the issues.
+        test_output = ('{"files": [{"issues": [{"pos": {"row": 2}, '
+                       '"text": "Issue", "level": "info"}]}]}')
+        uut = (linter(sys.executable,
+                      output_format="json",
+                      json_mapping={"line": ("pos", "row"),
+                                    "message": "text",
+                                    "severity": "level"},
+                      json_results_path=("files", 0, "issues"),
+                      severity_map={"INFO": RESULT_SEVERITY.MAJOR},
+                      result_message="Hello world")
+               (self.EmptyTestLinter)
+               (self.section, None))
+
+        results = list(uut.process_output(test_output, sample_file, [""]))
+        self.assertEqual(results,
+                         [Result.from_values("EmptyTestLinter",
+                                             "Hello world",
+                                             sample_file,
+                                             2,
+                                             severity=RESULT_SEVERITY.MAJOR)])
+
+    def test_process_output_sarif(self):
+        sample_file = "some-file.xtx"
+        test_output = json.dumps({"version": "2.1.0", "runs": [{"results": [
+            {"ruleId": "X",
+             "level": "error",
+             "message": {"text": "Serious issue"},
+             "locations": [{"physicalLocation": {
+                 "artifactLocation": {"uri": sample_file},
+                 "region": {"startLine": 12, "startColumn": 4,
+                            "endLine": 14, "endColumn": 2}}}]},
+            {"message": {"text": "No location"}},
+            {"level": "note",
+             "message": {"text": "Empty region"},
+             "locations": [{"physicalLocation": {
+                 "artifactLocation": {"uri": Path(
+                     os.path.abspath(sample_file)).as_uri()},
+                 "region": {"startLine": 3, "startColumn": 4,
+                            "endColumn": 4}}}]},
+            {"message": {"text": "Other file"},
+             "locations": [{"physicalLocation": {
+                 "artifactLocation": {"uri": "other-file.xtx"}}}]}]}]})
+
+        uut = (linter(sys.executable, output_format="sarif")
+               (self.EmptyTestLinter)
+               (self.section, None))
+
+        results = list(uut.process_output(test_output, sample_file, [""]))
+        expected = [Result.from_values("EmptyTestLinter (X)",
+                                       "Serious issue",
+                                       sample_file,
+                                       12, 4, 14, 1,
+                                       RESULT_SEVERITY.MAJOR),
+                    Result.from_values("EmptyTestLinter",
+                                       "No location",
+                                       sample_file),
+                    Result.from_values("EmptyTestLinter",
+                                       "Empty region",
+                                       sample_file,
+                                       3, 4, 3, 4,
+                                       RESULT_SEVERITY.INFO)]
+
+        self.assertEqual(results, expected)
+
     def test_minimal_regex(self):
         uut = (linter(sys.executable,
                       output_format="regex",
@@ -398,6 +598,31 @@ class LinterComponentTest(unittest.TestCase):
         self.assertEqual(results, [Result.from_values("EmptyTestLinter", "",
                                                       file="file")])
 
+    def test_convert_output_regex_match_to_result_override(self):
+        class Handler(self.EmptyTestLinter):
+
+            def _convert_output_regex_match_to_result(self,
+                                                      match,
+                                                      filename,
+                                                      severity_map,
+                                                      result_message):
+                result = super()._convert_output_regex_match_to_result(
+                    match, filename, severity_map, result_message)
+                result.message += "!"
+                return result
+
+        uut = (linter(sys.executable,
+                      output_format="regex",
+                      output_regex=r"(?P<line>\d+): (?P<message>.*)")
+               (Handler)
+               (self.section, None))
+
+        results = list(uut.process_output(["3: an issue"], "file", [""]))
+        self.assertEqual(results, [Result.from_values("Handler",
+                                                      "an issue!",
+                                                      file="file",
+                                                      line=3)])
+
     def test_get_non_optional_settings(self):
         class Handler(self.ManualProcessingTestLinter):
 
@@ -552,7 +777,25 @@ class LinterComponentTest(unittest.TestCase):
             self.assertEqual(config_file[-4:], ".xml")
             with open(config_file, mode="r") as fl:
                 self.assertEqual(fl.read(), "config_value = 88")
+
+        # Config files with the same content are reused.
+        with uut._create_config("other", [], val=88) as other_config_file:
+            self.assertEqual(other_config_file, config_file)
+        with uut._create_config("filename", [], val=89) as other_config_file:
+            self.assertNotEqual(other_config_file, config_file)
+        uut = linter("", config_suffix=".cfg")(ConfigurationTestLinter)
+        with uut._create_config("filename", [], val=88) as other_config_file:
+            self.assertNotEqual(other_config_file, config_file)
+            self.assertEqual(other_config_file[-4:], ".cfg")
+
+        self.assertTrue(os.path.isfile(config_file))
+        _remove_config_files()
         self.assertFalse(os.path.isfile(config_file))
+        self.assertFalse(os.path.isfile(other_config_file))
+
+        with uut._create_config("filename", [], val=88) as config_file:
+            self.assertTrue(os.path.isfile(config_file))
+        _remove_config_files()
 
     def test_metaclass_repr(self):
         uut = linter("my-tool")(self.ManualProcessingTestLinter)
@@ -577,12 +820,37 @@ class LinterComponentTest(unittest.TestCase):
             re.escape(repr(sys.executable)) + "\\) at 0x[a-fA-F0-9]+>")
 
 
+def run_persistent_linter(program_path, filename, pids):
+    """
+    Runs a persistent linter on the given file and puts the pid of the
+    persistently running process into the given queue.
+    """
+    class Handler:
+
+        @staticmethod
+        def create_arguments(filename, file, config_file):
+            return (filename,)
+
+    uut = (linter(sys.executable,
+                  persistent=True,
+                  persistent_delimiter="^--END--$",
+                  persistent_arguments=(program_path,),
+                  output_format="regex",
+                  output_regex="(?P<message>.*)")
+           (Handler)
+           (Section("PERSISTENT_TEST_SECTION"), None))
+    list(uut.run(filename, ()))
+    pids.put(_persistent_processes[(sys.executable, program_path)][0].pid)
+
+
 class LinterReallifeTest(unittest.TestCase):
 
     def setUp(self):
         self.section = Section("REALLIFE_TEST_SECTION")
 
         self.test_program_path = get_testfile_name("test_linter.py")
+        self.persistent_program_path = get_testfile_name(
+            "test_persistent_linter.py")
         self.test_program_regex = (
             r"L(?P<line>\d+)C(?P<column>\d+)-"
             r"L(?P<end_line>\d+)C(?P<end_column>\d+):"
@@ -829,3 +1097,227 @@ class LinterReallifeTest(unittest.TestCase):
         self.assertEqual(create_arguments_mock.call_args[0][2][-5:], ".conf")
         generate_config_mock.assert_called_once_with(
             self.testfile2_path, self.testfile2_content, 124)
+
+    def test_persistent(self):
+        create_arguments_mock = Mock()
+
+        class Handler:
+
+            @staticmethod
+            def create_arguments(filename, file, config_file):
+                create_arguments_mock(filename, file, config_file)
+                return (filename,)
+
+        uut = (linter(sys.executable,
+                      persistent=True,
+                      persistent_delimiter="^--END--$",
+                      persistent_arguments=(self.persistent_program_path,),
+                      output_format="regex",
+                      output_regex=self.test_program_regex,
+                      severity_map=self.test_program_severity_map)
+               (Handler)
+               (self.section, None))
+
+        results = list(uut.run(self.testfile_path, self.testfile_content))
+        self.assertEqual([result.message for result in results],
+                         ["Invalid char ('0')",
+                          "Invalid char ('.')",
+                          "Invalid char ('p')"])
+        process, lines = _persistent_processes[
+            (sys.executable, self.persistent_program_path)]
+
+        results = list(uut.run(self.testfile2_path, self.testfile2_content))
+        self.assertEqual(results,
+                         [Result.from_values(uut,
+                                             "Invalid char ('X')",
+                                             self.testfile2_path,
+                                             0, 0, 0, 1,
+                                             RESULT_SEVERITY.MAJOR),
+                          Result.from_values(uut,
+                                             "Invalid char ('i')",
+                                             self.testfile2_path,
+                                             4, 0, 4, 1,
+                                             RESULT_SEVERITY.MAJOR)])
+        # The files are checked by the same process.
+        self.assertIs(_persistent_processes[
+            (sys.executable, self.persistent_program_path)][0], process)
+        self.assertIsNone(process.poll())
+
+        _stop_persistent_processes()
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(_persistent_processes, {})
+
+    def test_persistent_stdin(self):
+        class Handler:
+
+            @staticmethod
+            def create_arguments(filename, file, config_file):
+                return "--use_stdin", str(len(file))
+
+        uut = (linter(sys.executable,
+                      use_stdin=True,
+                      persistent=True,
+                      persistent_delimiter="^--END--$",
+                      persistent_arguments=(self.persistent_program_path,),
+                      output_format="regex",
+                      output_regex=self.test_program_regex,
+                      severity_map=self.test_program_severity_map)
+               (Handler)
+               (self.section, None))
+
+        for i in range(2):
+            results = list(uut.run(self.testfile2_path,
+                                   self.testfile2_content))
+            self.assertEqual([result.message for result in results],
+                             ["Invalid char ('X')", "Invalid char ('i')"])
+
+        _stop_persistent_processes()
+
+    def test_persistent_exited(self):
+        class Handler:
+
+            @staticmethod
+            def create_arguments(filename, file, config_file):
+                return (filename,)
+
+        uut = (linter(sys.executable,
+                      persistent=True,
+                      persistent_delimiter="^--END--$",
+                      persistent_arguments=("-c", "pass"),
+                      output_format="regex",
+                      output_regex=self.test_program_regex)
+               (Handler)
+               (self.section, None))
+        uut.err = Mock()
+
+        self.assertIsNone(uut.run(self.testfile_path, self.testfile_content))
+        uut.err.assert_called_once_with(
+            "The persistently running executable {!r} exited "
+            "unexpectedly.".format(sys.executable))
+        self.assertEqual(_persistent_processes, {})
+
+    def test_persistent_timeout(self):
+        class Handler:
+
+            @staticmethod
+            def create_arguments(filename, file, config_file):
+                return (filename,)
+
+        uut = (linter(sys.executable,
+                      persistent=True,
+                      persistent_delimiter="^--END--$",
+                      persistent_arguments=(
+                          "-c", "import time; print('L0C0'); time.sleep(60)"),
+                      persistent_timeout=0.5,
+                      output_format="regex",
+                      output_regex=self.test_program_regex)
+               (Handler)
+               (self.section, None))
+        uut.err = Mock()
+
+        self.assertIsNone(uut.run(self.testfile_path, self.testfile_content))
+        uut.err.assert_called_once_with(
+            "The persistently running executable {!r} did not finish the "
+            "output for the file within 0.5 seconds.".format(sys.executable))
+        self.assertEqual(_persistent_processes, {})
+
+    def test_persistent_stopped_in_subprocess(self):
+        # Processes running bears stop the persistent processes they started
+        # when they exit, the main process doesn't need to do that.
+        pids = multiprocessing.Queue()
+        subprocess = multiprocessing.Process(
+            target=run_persistent_linter,
+            args=(self.persistent_program_path, self.testfile_path, pids))
+        subprocess.start()
+        pid = pids.get(timeout=30)
+        subprocess.join()
+
+        self.assertEqual(subprocess.exitcode, 0)
+        self.assertEqual(_persistent_processes, {})
+        with self.assertRaises(ProcessLookupError):
+            os.kill(pid, 0)
+
+    def test_concurrency(self):
+        create_arguments_mock = Mock()
+
+        class Handler:
+
+            @staticmethod
+            def generate_config(filename, file, some_val: int):
+                return "use_stdin"
+
+            @staticmethod
+            def create_arguments(filename, file, config_file, some_val: int):
+                create_arguments_mock(filename, some_val)
+                return self.test_program_path, "--config", config_file
+
+        self.section.append(Setting("some_val", "33"))
+        uut = (linter(sys.executable,
+                      use_stdin=True,
+                      concurrency=2,
+                      output_format="regex",
+                      output_regex=self.test_program_regex,
+                      severity_map=self.test_program_severity_map)
+               (Handler)
+               (self.section, None))
+
+        uut.prepare_files({self.testfile_path: self.testfile_content,
+                           self.testfile2_path: self.testfile2_content})
+        self.assertEqual(create_arguments_mock.call_count, 2)
+        create_arguments_mock.assert_any_call(self.testfile_path, 33)
+        create_arguments_mock.assert_any_call(self.testfile2_path, 33)
+
+        with patch("coalib.bearlib.abstractions.Linter.run_shell_command"
+                   ) as run_shell_command:
+            results = list(uut.run(self.testfile2_path,
+                                   self.testfile2_content,
+                                   some_val=33))
+            self.assertEqual(results,
+                             [Result.from_values(uut,
+                                                 "Invalid char ('X')",
+                                                 self.testfile2_path,
+                                                 0, 0, 0, 1,
+                                                 RESULT_SEVERITY.MAJOR),
+                              Result.from_values(uut,
+                                                 "Invalid char ('i')",
+                                                 self.testfile2_path,
+                                                 4, 0, 4, 1,
+                                                 RESULT_SEVERITY.MAJOR)])
+            results = list(uut.run(self.testfile_path,
+                                   self.testfile_content,
+                                   some_val=33))
+            self.assertEqual([result.message for result in results],
+                             ["Invalid char ('0')",
+                              "Invalid char ('.')",
+                              "Invalid char ('p')"])
+            self.assertFalse(run_shell_command.called)
+
+        # Prepared outputs are used only once.
+        self.assertEqual(uut._prepared_outputs, {})
+        results = list(uut.run(self.testfile_path,
+                               self.testfile_content,
+                               some_val=33))
+        self.assertEqual(len(results), 3)
+        self.assertEqual(create_arguments_mock.call_count, 3)
+
+    def test_concurrency_missing_executable(self):
+        class Handler:
+
+            @classmethod
+            def check_prerequisites(cls):
+                return True
+
+            @staticmethod
+            def create_arguments(filename, file, config_file):
+                return (filename,)
+
+        uut = (linter("some-missing-executable",
+                      concurrency=2,
+                      output_format="regex",
+                      output_regex=self.test_program_regex)
+               (Handler)
+               (self.section, None))
+
+        uut.prepare_files({self.testfile_path: self.testfile_content,
+                           self.testfile2_path: self.testfile2_content})
+        self.assertEqual(uut._prepared_outputs, {})
@@ -0,0 +1,37 @@
+# This little program does the same checks as ``test_linter.py``, but keeps
+# running and lints one file after another.
+#
+# Invocation
+# ==========
+#
+# python3 test_persistent_linter.py
+#
+# Protocol
+# ========
+#
+# For every file either its name or ``--use_stdin`` followed by the number of
+# lines and the lines of the file are read from stdin, each on its own line.
+# The issues found are written to stdout like by ``test_linter.py`` followed
+# by a line containing ``--END--``. The program exits when stdin is closed.
+
+import sys
+
+
+if __name__ == "__main__":
+    for request in iter(sys.stdin.readline, ""):
+        request = request.rstrip("\n")
+        if request == "--use_stdin":
+            line_count = int(sys.stdin.readline())
+            content = "".join(sys.stdin.readline()
+                              for i in range(line_count))
+        else:
+            with open(request, mode="r") as fl:
+                content = fl.read()
+
+        for i, line in enumerate(content.splitlines()):
+            if line[0] not in ("+", "-", "*", "/"):
+                print("L{}C{}-L{}C{}: Invalid char ('{}') | "
+                      "MAJOR SEVERITY".format(i, 0, i, 1, line[0]))
+
+        print("--END--")
+        sys.stdout.flush()
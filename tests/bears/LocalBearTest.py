@@ -12,6 +12,7 @@ class LocalBearTest(unittest.TestCase):
                           test_object.run,
                           "filename",
                           ["file\n"])
+        self.assertIsNone(test_object.prepare_files({"filename": ["file\n"]}))
 
     def test_kind(self):
         self.assertEqual(LocalBear.kind(), BEAR_KIND.LOCAL)
@@ -4,7 +4,7 @@ import sys
 import unittest
 
 from coalib import coala_ci
-from coalib.misc.ContextManagers import prepare_file
+from coalib.misc.ContextManagers import make_temp, prepare_file
 from tests.TestUtilities import bear_test_module, execute_coala
 
 
@@ -50,6 +50,31 @@ class coalaCITest(unittest.TestCase):
             self.assertNotEqual(retval, 0,
                                 "coala-ci was expected to return non-zero")
 
+    def test_baseline(self):
+        with bear_test_module(), \
+                prepare_file(["#fixme"], None) as (lines, filename), \
+                make_temp() as baseline:
+            os.remove(baseline)
+            retval, output = execute_coala(coala_ci.main, "coala-ci",
+                                           "-c", os.devnull,
+                                           "-b", "LineCountTestBear",
+                                           "-f", re.escape(filename),
+                                           "--baseline", baseline,
+                                           "--save-baseline", baseline)
+            self.assertIn("could not be read", output)
+            self.assertIn("This file has 1 lines.", output)
+            self.assertNotEqual(retval, 0)
+
+            retval, output = execute_coala(coala_ci.main, "coala-ci",
+                                           "-c", os.devnull,
+                                           "-b", "LineCountTestBear",
+                                           "-f", re.escape(filename),
+                                           "--baseline", baseline)
+            self.assertNotIn("This file has 1 lines.", output)
+            self.assertEqual(retval, 0,
+                             "coala-ci must return zero when all results "
+                             "are in the baseline")
+
     def test_fix_patchable_issues(self):
         with bear_test_module(), \
                 prepare_file(["\t#include <a>"], None) as (lines, filename):
@@ -39,6 +39,30 @@ class coalaJSONTest(unittest.TestCase):
                                 "coala-json must return nonzero when "
                                 "results found")
 
+    def test_find_issues_with_diffs(self):
+        # The diffs are output after the processes running the bears, which
+        # share the contents of the files with them, are done.
+        with bear_test_module(), \
+                prepare_file(["a = 1  \n", "b = 2\n"],
+                             None) as (lines, filename):
+            retval, output = execute_coala(coala_json.main, "coala-json",
+                                           "-c", os.devnull,
+                                           "-b", "SpaceConsistencyTestBear",
+                                           "-S", "use_spaces=yes",
+                                           "-f", re.escape(filename))
+            output = json.loads(output)
+            result = output["results"]["default"][0]
+            self.assertEqual(result["message"], "Line contains following "
+                                                "spacing inconsistencies:\n"
+                                                "- Trailing whitespaces.")
+            self.assertEqual(result["diffs"][filename],
+                             "--- \n"
+                             "+++ \n"
+                             "@@ -1,2 +1,2 @@\n"
+                             "-a = 1  \n"
+                             "+a = 1\n"
+                             " b = 2\n")
+
     def test_fail_acquire_settings(self):
         with bear_test_module():
             retval, output = execute_coala(coala_json.main, 'coala-json',
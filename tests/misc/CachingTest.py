@@ -5,9 +5,16 @@ from unittest.mock import patch
 
 from pyprint.NullPrinter import NullPrinter
 
-from coalib.misc.Caching import FileCache
+from coalib.misc import Constants
+from coalib.misc.Caching import (
+    BearCostCache, FileCache, ResultCache, get_bear_version)
 from coalib.misc.CachingUtilities import pickle_load, pickle_dump
 from coalib.output.printers.LogPrinter import LogPrinter
+from coalib.processes.SharedFileStore import SharedFileStore
+from coalib.results.Diff import Diff
+from coalib.results.Result import Result
+from coalib.settings.Section import Section
+from coalib.settings.Setting import Setting
 from coalib import coala
 from coalib.misc.ContextManagers import prepare_file
 from coalib.misc.ContextManagers import simulate_console_inputs
@@ -132,3 +139,162 @@ class CachingTest(unittest.TestCase):
                 "-f", re.escape(filename),
                 "-b", "LineCountTestBear")
             self.assertIn("This file has", output)
+
+    def test_replaying_results(self):
+        """
+        Results of unchanged files are replayed from the result cache without
+        running the bear again.
+        """
+        with bear_test_module(), \
+                prepare_file(["a=(5,6)"], None) as (lines, filename):
+            args = ("coala", "-c", os.devnull, "--changed-files",
+                    "-f", re.escape(filename), "-b", "LineCountTestBear",
+                    "-L", "DEBUG")
+            with simulate_console_inputs("0"):
+                retval, output = execute_coala(coala.main, *args)
+            self.assertIn("This file has", output)
+
+            with simulate_console_inputs("0"):
+                retval, output = execute_coala(coala.main, *args)
+            self.assertIn("This file has", output)
+            self.assertNotIn("Running bear LineCountTestBear", output)
+
+    def test_bear_costs_only_with_caching(self):
+        with bear_test_module(), \
+                prepare_file(["a=(5,6)"], None) as (lines, filename), \
+                patch("coalib.coala_main.BearCostCache") as bear_costs:
+            args = ("coala", "-c", os.devnull, "-f", re.escape(filename),
+                    "-b", "LineCountTestBear")
+            with simulate_console_inputs("0"):
+                execute_coala(coala.main, *args)
+            self.assertFalse(bear_costs.called)
+
+            with simulate_console_inputs("0"):
+                retval, output = execute_coala(
+                    coala.main, *(args + ("--changed-files",)))
+            self.assertIn("This file has", output)
+            self.assertTrue(bear_costs.called)
+            self.assertTrue(bear_costs.return_value.write.called)
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.log_printer = LogPrinter(NullPrinter())
+        self.cache = ResultCache(self.log_printer,
+                                 "coala_test",
+                                 flush_cache=True)
+
+    def test_get_key(self):
+        class TestBear:
+            section = Section("default")
+
+        bear = TestBear()
+        key = ResultCache.get_key(bear, "a.py", ["a\n", "b\n"])
+        self.assertEqual(key,
+                         ResultCache.get_key(bear, "a.py", ("a\n", "b\n")))
+        self.assertNotEqual(key, ResultCache.get_key(bear, "a.py", ["a\n"]))
+        # Results of files with the same contents refer to different files
+        self.assertNotEqual(key,
+                            ResultCache.get_key(bear, "b.py", ["a\n", "b\n"]))
+
+        bear.section = Section("default")
+        bear.section.append(Setting("key", "value"))
+        self.assertNotEqual(key,
+                            ResultCache.get_key(bear, "a.py", ["a\n", "b\n"]))
+
+    def test_get_bear_version(self):
+        class TestBear:
+            pass
+
+        version = get_bear_version(TestBear)
+        self.assertTrue(version.startswith(Constants.VERSION + " "))
+        self.assertEqual(version, get_bear_version(TestBear))
+
+        # The source of the bear is part of the version
+        with patch("inspect.getsourcefile",
+                   return_value=__file__ + ".non_existent"):
+            get_bear_version.cache_clear()
+            self.assertEqual(get_bear_version(TestBear),
+                             Constants.VERSION + " ")
+        get_bear_version.cache_clear()
+        self.assertEqual(get_bear_version(TestBear), version)
+
+    def test_diffs_of_other_runs(self):
+        with ResultCache(self.log_printer, "test4", flush_cache=True) as cache:
+            with SharedFileStore() as store:
+                diff = Diff.from_string_arrays(store.add(("a\n", "b\n")),
+                                               ["a\n", "c\n"])
+                cache.add("key", [Result("origin", "message",
+                                         diffs={"file": diff})])
+
+        # Another run with another store
+        with SharedFileStore():
+            cache = ResultCache(self.log_printer, "test4")
+            diff = cache.get("key")[0].diffs["file"]
+            self.assertEqual(diff.original, ("a\n", "b\n"))
+            self.assertEqual(diff.modified, ["a\n", "c\n"])
+
+        ResultCache(self.log_printer, "test4", flush_cache=True)
+
+    def test_lru(self):
+        cache = ResultCache(self.log_printer, "coala_test", max_entries=2)
+        cache.add("a", [1])
+        cache.add("b", [2])
+        self.assertEqual(cache.get("a"), [1])
+        cache.add("c", [3])
+
+        # "b" was used least recently
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), [1])
+        self.assertEqual(cache.get("c"), [3])
+
+    def test_persistence(self):
+        with ResultCache(self.log_printer, "test3", flush_cache=True) as cache:
+            cache.add("key", [1])
+
+        with ResultCache(self.log_printer, "test3") as cache:
+            self.assertEqual(cache.get("key"), [1])
+
+        # Entries exceeding a smaller limit are dropped when loading
+        cache.add("other key", [2])
+        cache.write()
+        cache = ResultCache(self.log_printer, "test3", max_entries=1)
+        self.assertEqual(list(cache.data), ["other key"])
+
+        cache = ResultCache(self.log_printer, "test3", flush_cache=True)
+        self.assertEqual(len(cache.data), 0)
+
+
+class BearCostCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.log_printer = LogPrinter(NullPrinter())
+        self.cache = BearCostCache(self.log_printer,
+                                   "coala_test",
+                                   flush_cache=True)
+
+    def test_add(self):
+        self.assertEqual(self.cache.get("ABear"), BearCostCache.default_cost)
+        self.cache.add("ABear", 1, 10)
+        self.assertEqual(self.cache.get("ABear"), 0.1)
+        # Runs on no lines at all count as one line
+        self.cache.add("ABear", 0.3, 0)
+        self.assertAlmostEqual(self.cache.get("ABear"), 0.2)
+
+    def test_estimate(self):
+        self.cache.add("ABear", 1, 10)
+        self.cache.add("BBear", 2, 10)
+        self.assertAlmostEqual(self.cache.estimate(["ABear", "BBear"], 5),
+                               1.5)
+        self.assertEqual(self.cache.estimate([], 5), 0)
+
+    def test_persistence(self):
+        with BearCostCache(self.log_printer, "test4", True) as cache:
+            cache.add("ABear", 1, 10)
+
+        cache = BearCostCache(self.log_printer, "test4")
+        self.assertEqual(cache.get("ABear"), 0.1)
+
+        cache = BearCostCache(self.log_printer, "test4", flush_cache=True)
+        self.assertEqual(cache.data, {})
@@ -0,0 +1,121 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from coalib.misc.MappedFile import MappedFile
+
+
+class MappedFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.files = []
+
+    def tearDown(self):
+        for filename in self.files:
+            os.remove(filename)
+
+    def create_file(self, content):
+        fd, filename = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as file:
+            file.write(content.encode("utf-8"))
+        self.files.append(filename)
+        return filename
+
+    def assertLines(self, content):
+        filename = self.create_file(content)
+        with open(filename, encoding="utf-8") as file:
+            lines = tuple(file.readlines())
+
+        uut = MappedFile(filename)
+        self.assertEqual(uut, lines)
+        self.assertEqual(tuple(uut), lines)
+        self.assertEqual(len(uut), len(lines))
+        return uut
+
+    def test_lines(self):
+        self.assertLines("first line\nsecond line\nthird")
+        self.assertLines("ünïcödé\n\n")
+        self.assertLines("windows\r\nold mac\rmixed\r\n\r\r\n")
+        self.assertLines("\r")
+        self.assertLines("")
+
+    def test_sequence(self):
+        uut = self.assertLines("first line\nsecond line\r\nthird")
+        self.assertEqual(uut[0], "first line\n")
+        self.assertEqual(uut[-1], "third")
+        self.assertEqual(uut[1:], ("second line\n", "third"))
+        self.assertEqual(uut[::-2], ("third", "first line\n"))
+        self.assertEqual(uut.index("third"), 2)
+        self.assertIn("second line\n", uut)
+        with self.assertRaises(IndexError):
+            uut[3]
+        with self.assertRaises(IndexError):
+            uut[-4]
+
+    def test_concatenation(self):
+        uut = self.assertLines("a\nb")
+        self.assertEqual(uut + ("c",), ("a\n", "b", "c"))
+        self.assertEqual(("c",) + uut, ("c", "a\n", "b"))
+        self.assertEqual(uut + uut, ("a\n", "b", "a\n", "b"))
+        with self.assertRaises(TypeError):
+            uut + ["c"]
+
+    def test_comparison(self):
+        lines = ("a\n", "b")
+        uut = self.assertLines("a\nb")
+        self.assertEqual(lines, uut)
+        self.assertEqual(uut, MappedFile(uut.filename))
+        self.assertNotEqual(uut, ("a\n",))
+        self.assertNotEqual(uut, list(lines))
+        self.assertEqual(hash(uut), hash(lines))
+        self.assertEqual(repr(uut), repr(lines))
+
+    def test_invalid_encoding(self):
+        filename = self.create_file("")
+        with open(filename, "wb") as file:
+            file.write(b"valid\n\xff\n")
+
+        with self.assertRaises(UnicodeDecodeError):
+            MappedFile(filename)
+
+        with self.assertRaises(OSError):
+            MappedFile(filename + ".non_existent")
+
+    def test_release(self):
+        uut = self.assertLines("a\nb\n")
+        uut.release()
+        with open(uut.filename, "w", encoding="utf-8") as file:
+            file.write("c\n")
+
+        self.assertEqual(uut, ("a\n", "b\n"))
+        # Releasing twice passes silently
+        uut.release()
+
+    def test_release_all(self):
+        uut = self.assertLines("a\nb\n")
+        other = MappedFile(uut.filename)
+        unrelated = self.assertLines("c\n")
+        MappedFile.release_all(os.path.join(
+            os.path.dirname(uut.filename),
+            ".",
+            os.path.basename(uut.filename)))
+        os.remove(uut.filename)
+        self.files.remove(uut.filename)
+
+        self.assertEqual(uut, ("a\n", "b\n"))
+        self.assertEqual(other, ("a\n", "b\n"))
+        self.assertNotIn(id(other), MappedFile._mapped_files)
+        self.assertIn(id(unrelated), MappedFile._mapped_files)
+
+    def test_pickling(self):
+        uut = self.assertLines("a\nb\n")
+        data = pickle.dumps(uut)
+        self.assertNotIn(b"a\n", data)
+        self.assertEqual(pickle.loads(data), ("a\n", "b\n"))
+
+        uut.release()
+        data = pickle.dumps(uut)
+        os.remove(uut.filename)
+        self.files.remove(uut.filename)
+        self.assertEqual(pickle.loads(data), ("a\n", "b\n"))
@@ -4,7 +4,8 @@ import sys
 from tempfile import NamedTemporaryFile
 import unittest
 
-from coalib.misc.Shell import run_interactive_shell_command, run_shell_command
+from coalib.misc.Shell import (
+    run_interactive_shell_command, run_shell_command, run_shell_commands)
 
 
 class RunShellCommandTest(unittest.TestCase):
@@ -91,3 +92,20 @@ class RunShellCommandTest(unittest.TestCase):
     def test_run_shell_command_kwargs_delegation(self):
         with self.assertRaises(TypeError):
             run_shell_command("super-cool-command", weird_parameter2="abc")
+
+    def test_run_shell_commands(self):
+        command = RunShellCommandTest.construct_testscript_command(
+            "test_input_program.py")
+
+        outputs = run_shell_commands(
+            [(command, "1  4  10  22"),
+             (command, "1 p 5"),
+             (("some-missing-command",), None),
+             (" ".join(command), "3 4")],
+            max_concurrency=2)
+
+        self.assertEqual(outputs[0], ("37\n", ""))
+        self.assertEqual(outputs[1], ("", "INVALID INPUT\n"))
+        self.assertIsInstance(outputs[2], OSError)
+        self.assertEqual(outputs[3], ("7\n", ""))
+        self.assertEqual(run_shell_commands([]), [])
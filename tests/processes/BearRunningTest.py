@@ -1,12 +1,17 @@
 import multiprocessing
+import pickle
 import queue
+import threading
 import unittest
 
 from coalib.bears.GlobalBear import GlobalBear
 from coalib.bears.LocalBear import LocalBear
 from coalib.processes.BearRunning import (
-    LOG_LEVEL, LogMessage, run, send_msg, task_done)
+    LOG_LEVEL, LogMessage, count_busy_process, prepare_local_bears,
+    put_control_element, run, run_global_bears, run_local_bears_on_file,
+    run_worker, send_msg, task_done)
 from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
+from coalib.processes.ControlQueue import ControlQueue
 from coalib.results.Result import RESULT_SEVERITY, Result
 from coalib.settings.Section import Section
 
@@ -56,6 +61,17 @@ class DependentBear(LocalBear):
         return [SimpleBear]
 
 
+class PreparingBear(LocalBear):
+
+    def prepare_files(self, files):
+        if "evil" in files:
+            raise ValueError("Can't prepare evil files.")
+        self.prepared = sorted(files)
+
+    def run(self, filename, file):
+        return []
+
+
 class SimpleGlobalBear(GlobalBear):
 
     def run(self,
@@ -122,9 +138,6 @@ class BearRunningUnitTest(unittest.TestCase):
         self.global_bear_list = []
         self.global_bear_queue = queue.Queue()
         self.file_dict = {}
-        manager = multiprocessing.Manager()
-        self.local_result_dict = manager.dict()
-        self.global_result_dict = manager.dict()
         self.message_queue = queue.Queue()
         self.control_queue = queue.Queue()
 
@@ -158,18 +171,18 @@ class BearRunningUnitTest(unittest.TestCase):
         self.global_bear_list.append(DependentGlobalBear({},
                                                          self.settings,
                                                          self.message_queue))
-        self.global_bear_queue.put(1)
-        self.global_bear_queue.put(0)
-        self.file_name_queue.put("t")
-        self.file_dict["t"] = []
+        # The results of dependencies are passed along with the bears
+        self.global_bear_queue.put((self.global_bear_list[0], None))
+        self.global_bear_queue.put(
+            (self.global_bear_list[1],
+             {"SimpleGlobalBear": self.global_bear_list[0].run()}))
+        self.global_bear_queue.put(None)
+        self.file_name_queue.put([("t", [], None)])
+        self.file_name_queue.put(None)
 
         run(self.file_name_queue,
             self.local_bear_list,
-            self.global_bear_list,
             self.global_bear_queue,
-            self.file_dict,
-            self.local_result_dict,
-            self.global_result_dict,
             self.message_queue,
             self.control_queue)
 
@@ -180,19 +193,162 @@ class BearRunningUnitTest(unittest.TestCase):
         except queue.Empty:
             pass
 
+    def test_unmet_global_dependencies(self):
+        self.global_bear_queue.put((DependentGlobalBear({},
+                                                        self.settings,
+                                                        self.message_queue),
+                                    False))
+        self.global_bear_queue.put(None)
+        self.file_name_queue.put(None)
+
+        run(self.file_name_queue,
+            self.local_bear_list,
+            self.global_bear_queue,
+            self.message_queue,
+            self.control_queue)
+
+        self.assertEqual(self.message_queue.get(timeout=0).log_level,
+                         LOG_LEVEL.WARNING)
+        self.assertEqual(self.control_queue.get(timeout=0)[0],
+                         CONTROL_ELEMENT.LOCAL_FINISHED)
+        self.assertEqual(self.control_queue.get(timeout=0),
+                         (CONTROL_ELEMENT.GLOBAL, "DependentGlobalBear", None))
+
+    def test_run_worker(self):
+        self.local_bear_list.append(SimpleBear(self.settings, None))
+        job = pickle.dumps({"local_bear_list": self.local_bear_list})
+        job_queue = queue.Queue()
+        # Two sections and the end of work
+        job_queue.put(job)
+        job_queue.put(job)
+        job_queue.put(None)
+        self.file_name_queue.put([("t", ["a\n"], None),
+                                  ("u", ["b\n", "c\n"], None)])
+        for section in range(2):
+            self.file_name_queue.put(None)
+            self.global_bear_queue.put(None)
+
+        run_worker(job_queue,
+                   self.file_name_queue,
+                   self.global_bear_queue,
+                   self.message_queue,
+                   self.control_queue)
+
+        # The results of a batch are reported together
+        control_elem, index, results = self.control_queue.get(timeout=0)
+        self.assertEqual((control_elem, index), (CONTROL_ELEMENT.LOCAL, None))
+        self.assertEqual([filename for filename, _, _ in results], ["t", "u"])
+        for filename, file_results, file_index in results:
+            # The ignore ranges of files with results are collected
+            self.assertEqual(file_index, ([], [], []))
+            self.assertEqual(len(file_results), 1)
+            self.assertEqual(file_results[0][0], "SimpleBear")
+            self.assertEqual(len(file_results[0][1]), 3)
+        # The time the bears needed is reported per section
+        control_elem, _, bear_times = self.control_queue.get(timeout=0)
+        self.assertEqual(control_elem, CONTROL_ELEMENT.LOCAL_FINISHED)
+        self.assertEqual(list(bear_times), ["SimpleBear"])
+        self.assertEqual(bear_times["SimpleBear"][1], 3)
+        self.assertEqual(self.control_queue.get(timeout=0)[0],
+                         CONTROL_ELEMENT.GLOBAL_FINISHED)
+        # No files were checked in the second section
+        self.assertEqual(self.control_queue.get(timeout=0),
+                         (CONTROL_ELEMENT.LOCAL_FINISHED, None, {}))
+        self.assertEqual(self.control_queue.get(timeout=0)[0],
+                         CONTROL_ELEMENT.GLOBAL_FINISHED)
+        self.assertRaises(queue.Empty, self.control_queue.get, timeout=0)
+
+        # The bears get the message queue of the worker attached
+        for filename in ("t", "u"):
+            self.assertEqual(self.message_queue.get(timeout=0).message,
+                             "Running bear SimpleBear...")
+
+    def test_cached_results(self):
+        self.local_bear_list.append(SimpleBear(self.settings,
+                                               self.message_queue))
+        self.local_bear_list.append(DependentBear(self.settings,
+                                                  self.message_queue))
+        cached = [Result.from_values("SimpleBear", "cached", "t"),
+                  Result.from_values("SimpleBear", "cached", "t")]
+        self.file_name_queue.put([("t", [], {"SimpleBear": cached})])
+        self.file_name_queue.put(None)
+        self.global_bear_queue.put(None)
+
+        run(self.file_name_queue,
+            self.local_bear_list,
+            self.global_bear_queue,
+            self.message_queue,
+            self.control_queue)
+
+        # The cached results are replayed and passed to dependent bears
+        self.assertEqual(self.control_queue.get(timeout=0),
+                         (CONTROL_ELEMENT.LOCAL,
+                          None,
+                          [("t",
+                            [("SimpleBear", cached), ("DependentBear", [])],
+                            ([], [], []))]))
+        # Only the DependentBear was run
+        self.assertEqual(self.message_queue.get(timeout=0).message,
+                         "Running bear DependentBear...")
+        self.assertRaises(queue.Empty, self.message_queue.get, timeout=0)
+
+    def test_prepare_local_bears(self):
+        bear = PreparingBear(self.settings, self.message_queue)
+        bear_times = {}
+        batch = [("a", [], None),
+                 ("b", [], {"PreparingBear": []}),
+                 ("c", [], {"OtherBear": []})]
+        prepare_local_bears(self.message_queue,
+                            0,
+                            [bear, "not a bear"],
+                            batch,
+                            bear_times)
+
+        # Files with cached results of the bear are left out.
+        self.assertEqual(bear.prepared, ["a", "c"])
+        self.assertEqual(list(bear_times), ["PreparingBear"])
+        self.assertRaises(queue.Empty, self.message_queue.get, timeout=0)
+
+        # Files with cached results only are not prepared at all.
+        bear.prepared = None
+        prepare_local_bears(self.message_queue,
+                            0,
+                            [bear],
+                            [("b", [], {"PreparingBear": []})])
+        self.assertIsNone(bear.prepared)
+
+        # Errors are only logged.
+        prepare_local_bears(self.message_queue,
+                            0,
+                            [bear],
+                            [("evil", [], None)])
+        message = self.message_queue.get(timeout=0)
+        self.assertEqual(message.log_level, LOG_LEVEL.DEBUG)
+        self.assertIn("Can't prepare evil files.", message.message)
+
+    def test_missing_file(self):
+        self.assertIsNone(run_local_bears_on_file(self.message_queue,
+                                                  0,
+                                                  self.file_dict,
+                                                  self.local_bear_list,
+                                                  "invalid file"))
+
+        self.assertEqual(self.message_queue.get(timeout=0).log_level,
+                         LOG_LEVEL.ERROR)
+        self.assertEqual(self.message_queue.get(timeout=0).log_level,
+                         LOG_LEVEL.DEBUG)
+        self.assertRaises(queue.Empty, self.control_queue.get, timeout=0)
+
     def test_evil_bear(self):
         self.local_bear_list.append(EvilBear(self.settings,
                                              self.message_queue))
-        self.file_name_queue.put("t")
-        self.file_dict["t"] = []
+        self.file_name_queue.put([("t", [], None)])
+        self.file_name_queue.put(None)
+        self.global_bear_queue.put(None)
 
         run(self.file_name_queue,
             self.local_bear_list,
-            self.global_bear_list,
             self.global_bear_queue,
-            self.file_dict,
-            self.local_result_dict,
-            self.global_result_dict,
             self.message_queue,
             self.control_queue)
 
@@ -201,16 +357,13 @@ class BearRunningUnitTest(unittest.TestCase):
                                                     self.message_queue))
         self.local_bear_list.append(UnexpectedBear2(self.settings,
                                                     self.message_queue))
-        self.file_name_queue.put("t")
-        self.file_dict["t"] = []
+        self.file_name_queue.put([("t", [], None)])
+        self.file_name_queue.put(None)
+        self.global_bear_queue.put(None)
 
         run(self.file_name_queue,
             self.local_bear_list,
-            self.global_bear_list,
             self.global_bear_queue,
-            self.file_dict,
-            self.local_result_dict,
-            self.global_result_dict,
             self.message_queue,
             self.control_queue)
 
@@ -239,65 +392,48 @@ d
         self.global_bear_list = []
         self.global_bear_queue = queue.Queue()
         self.file_dict = {}
-        manager = multiprocessing.Manager()
-        self.local_result_dict = manager.dict()
-        self.global_result_dict = manager.dict()
         self.message_queue = queue.Queue()
         self.control_queue = queue.Queue()
 
         self.file1 = "file1"
         self.file2 = "arbitrary"
 
-        self.file_name_queue.put(self.file1)
-        self.file_name_queue.put(self.file2)
-        self.file_name_queue.put("invalid file")
         self.local_bear_list.append(LocalTestBear(self.settings,
                                                   self.message_queue))
         self.local_bear_list.append("not a valid bear")
         self.file_dict[self.file1] = self.example_file
         self.file_dict[self.file2] = self.example_file
+        # One batch with one file, then one with the other one
+        for filename, file in self.file_dict.items():
+            self.file_name_queue.put([(filename, file, None)])
+        self.file_name_queue.put(None)
         self.global_bear_list.append(GlobalTestBear(self.file_dict,
                                                     self.settings,
                                                     self.message_queue))
         self.global_bear_list.append("not a valid bear")
-        self.global_bear_queue.put(0)
-        self.global_bear_queue.put(1)
+        self.global_bear_queue.put((self.global_bear_list[0], None))
+        self.global_bear_queue.put((self.global_bear_list[1], None))
+        self.global_bear_queue.put(None)
 
     def test_run(self):
         run(self.file_name_queue,
             self.local_bear_list,
-            self.global_bear_list,
             self.global_bear_queue,
-            self.file_dict,
-            self.local_result_dict,
-            self.global_result_dict,
             self.message_queue,
             self.control_queue)
 
+        # The available global bears are run before the local ones
         expected_messages = [LOG_LEVEL.DEBUG,
                              LOG_LEVEL.WARNING,
                              LOG_LEVEL.DEBUG,
                              LOG_LEVEL.WARNING,
                              LOG_LEVEL.DEBUG,
                              LOG_LEVEL.WARNING,
-                             LOG_LEVEL.ERROR,
-                             LOG_LEVEL.DEBUG,
                              LOG_LEVEL.DEBUG,
                              LOG_LEVEL.WARNING]
         for msg in expected_messages:
             self.assertEqual(msg, self.message_queue.get(timeout=0).log_level)
 
-        local_result_expected = [[],
-                                 [Result.from_values("LocalTestBear",
-                                                     "something went wrong",
-                                                     'arbitrary')]
-                                 ]
-        for expected in local_result_expected:
-            control_elem, index = self.control_queue.get()
-            self.assertEqual(control_elem, CONTROL_ELEMENT.LOCAL)
-            real = self.local_result_dict[index]
-            self.assertEqual(real, expected)
-
         global_results_expected = [Result.from_values(
                                        "GlobalTestBear",
                                        "Files are bad in general!",
@@ -309,20 +445,117 @@ d
                                        "arbitrary",
                                        severity=RESULT_SEVERITY.INFO)]
 
-        control_elem, index = self.control_queue.get()
-        self.assertEqual(control_elem, CONTROL_ELEMENT.LOCAL_FINISHED)
-        control_elem, index = self.control_queue.get()
+        control_elem, index, real = self.control_queue.get()
         self.assertEqual(control_elem, CONTROL_ELEMENT.GLOBAL)
-        real = self.global_result_dict[index]
+        self.assertEqual(index, "GlobalTestBear")
         self.assertEqual(sorted(global_results_expected), sorted(real))
+        # Invalid bears are reported without results
+        self.assertEqual(self.control_queue.get(),
+                         (CONTROL_ELEMENT.GLOBAL, "str", None))
 
-        control_elem, none = self.control_queue.get(timeout=0)
-        self.assertEqual(control_elem, CONTROL_ELEMENT.GLOBAL_FINISHED)
-        self.assertEqual(none, None)
-
-        # The invalid bear gets a None in that dict for dependency resolution
-        self.assertEqual(len(self.global_result_dict), 2)
-        self.assertEqual(len(self.local_result_dict),
-                         len(local_result_expected))
+        # The bear fails on the first file
+        local_result_expected = [None,
+                                 [Result.from_values("LocalTestBear",
+                                                     "something went wrong",
+                                                     'arbitrary')]
+                                 ]
+        # Ignore ranges are only collected for files with results
+        file_index_expected = [None, ([], [], [])]
+        for filename, expected, file_index in zip((self.file1, self.file2),
+                                                  local_result_expected,
+                                                  file_index_expected):
+            self.assertEqual(self.control_queue.get(),
+                             (CONTROL_ELEMENT.LOCAL,
+                              None,
+                              [(filename,
+                                [("LocalTestBear", expected), (None, None)],
+                                file_index)]))
+
+        control_elem, _, bear_times = self.control_queue.get()
+        self.assertEqual(control_elem, CONTROL_ELEMENT.LOCAL_FINISHED)
+        # Both files have a length of 8, invalid bears aren't timed
+        self.assertEqual(list(bear_times), ["LocalTestBear"])
+        self.assertEqual(bear_times["LocalTestBear"][1], 16)
+        self.assertEqual(self.control_queue.get(timeout=0),
+                         (CONTROL_ELEMENT.GLOBAL_FINISHED, None, None))
         self.assertRaises(queue.Empty, self.message_queue.get, timeout=0)
         self.assertRaises(queue.Empty, self.control_queue.get, timeout=0)
+
+
+class ControlElementTest(unittest.TestCase):
+
+    def setUp(self):
+        self.message_queue = queue.Queue()
+        self.result = Result("Bear", "message")
+        self.unpicklable_result = Result("Bear", "message")
+        self.unpicklable_result.lock = threading.Lock()
+
+    def put(self, element, control_queue_type=ControlQueue):
+        control_queue = control_queue_type()
+        put_control_element(self.message_queue, 0, control_queue, element)
+        return control_queue.get(timeout=5)
+
+    def test_picklable(self):
+        element = (CONTROL_ELEMENT.GLOBAL, "Bear", [self.result])
+        self.assertEqual(self.put(element), element)
+        self.assertEqual(self.put(element, multiprocessing.Queue), element)
+
+        control_queue = queue.Queue()
+        put_control_element(self.message_queue, 0, control_queue, element)
+        self.assertIs(control_queue.get(timeout=0), element)
+        self.assertRaises(queue.Empty, self.message_queue.get, timeout=0)
+
+    def test_unpicklable_global_results(self):
+        self.assertEqual(
+            self.put((CONTROL_ELEMENT.GLOBAL,
+                      "Bear",
+                      [self.unpicklable_result])),
+            (CONTROL_ELEMENT.GLOBAL, "Bear", None))
+        self.assertEqual(self.message_queue.get(timeout=0).message,
+                         "The results of the bear Bear could not be sent to "
+                         "the main process. Skipping bear...")
+        self.assertEqual(self.message_queue.get(timeout=0).log_level,
+                         LOG_LEVEL.DEBUG)
+
+    def test_unpicklable_local_results(self):
+        element = (CONTROL_ELEMENT.LOCAL,
+                   None,
+                   [("a", [("Bear", [self.unpicklable_result]),
+                           ("OtherBear", [self.result])], None),
+                    ("b", None, None)])
+        self.assertEqual(self.put(element),
+                         (CONTROL_ELEMENT.LOCAL,
+                          None,
+                          [("a", [("Bear", None),
+                                  ("OtherBear", [self.result])], None),
+                           ("b", None, None)]))
+        self.assertEqual(self.message_queue.get(timeout=0).log_level,
+                         LOG_LEVEL.ERROR)
+
+    def test_pickled_global_bear(self):
+        global_bear_queue = queue.Queue()
+        control_queue = queue.Queue()
+        global_bear_queue.put(pickle.dumps(("not a bear", None)))
+        global_bear_queue.put(None)
+        busy_processes = multiprocessing.Value("i", 0)
+        self.assertTrue(run_global_bears(self.message_queue,
+                                         0,
+                                         global_bear_queue,
+                                         control_queue,
+                                         busy_processes=busy_processes))
+        self.assertEqual(control_queue.get(timeout=0),
+                         (CONTROL_ELEMENT.GLOBAL, "str", None))
+        self.assertEqual(busy_processes.value, 0)
+
+    def test_count_busy_process(self):
+        busy_processes = multiprocessing.Value("i", 0)
+        with count_busy_process(busy_processes):
+            self.assertEqual(busy_processes.value, 1)
+            with self.assertRaises(ValueError):
+                with count_busy_process(busy_processes):
+                    self.assertEqual(busy_processes.value, 2)
+                    raise ValueError
+        self.assertEqual(busy_processes.value, 0)
+
+        with count_busy_process(None):
+            pass
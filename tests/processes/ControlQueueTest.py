@@ -0,0 +1,53 @@
+import multiprocessing
+import multiprocessing.connection
+import queue
+import threading
+import unittest
+
+from coalib.processes.ControlQueue import ControlQueue
+
+
+def put_elements(control_queue, process_index, count):
+    for index in range(count):
+        control_queue.put((process_index, index, "x" * 1000))
+
+
+class ControlQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.uut = ControlQueue()
+
+    def test_put_get(self):
+        self.assertTrue(self.uut.empty())
+        self.uut.put((1, None, [2]))
+        self.assertEqual(self.uut.get(timeout=5), (1, None, [2]))
+        with self.assertRaises(queue.Empty):
+            self.uut.get(timeout=0)
+
+    def test_unpicklable(self):
+        with self.assertRaises(TypeError):
+            self.uut.put(threading.Lock())
+        self.assertTrue(self.uut.empty())
+
+    def test_processes(self):
+        # Every element is sent before the processes exit, even if that's
+        # more than the pipe holds.
+        processes = [multiprocessing.Process(target=put_elements,
+                                             args=(self.uut, i, 200))
+                     for i in range(3)]
+        for process in processes:
+            process.start()
+
+        self.assertEqual(
+            multiprocessing.connection.wait([self.uut.reader], timeout=5),
+            [self.uut.reader])
+        elements = [self.uut.get(timeout=5) for i in range(3 * 200)]
+        for process in processes:
+            process.join()
+
+        self.assertTrue(self.uut.empty())
+        for process_index in range(3):
+            self.assertEqual([element[1]
+                              for element in elements
+                              if element[0] == process_index],
+                             list(range(200)))
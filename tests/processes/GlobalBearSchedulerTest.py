@@ -0,0 +1,158 @@
+import unittest
+
+from coalib.bears.GlobalBear import GlobalBear
+from coalib.output.printers.ListLogPrinter import ListLogPrinter
+from coalib.processes.GlobalBearScheduler import GlobalBearScheduler
+from coalib.settings.Section import Section
+
+
+class TestPool:
+
+    def __init__(self):
+        self.submitted = []
+        self.finished = False
+
+    def submit_global_bear(self, bear, dependency_results=None):
+        if isinstance(bear, UnpicklableBear):
+            raise TypeError("can't pickle _thread.lock objects")
+        self.submitted.append((bear.__class__.__name__, dependency_results))
+
+    def finish_global_bears(self):
+        self.finished = True
+
+
+class SimpleBear(GlobalBear):
+    pass
+
+
+class OtherBear(GlobalBear):
+    pass
+
+
+class DependentBear(GlobalBear):
+
+    @staticmethod
+    def get_dependencies():
+        return [SimpleBear, OtherBear]
+
+
+class UnpicklableBear(GlobalBear):
+    pass
+
+
+class DependingOnUnpicklableBear(GlobalBear):
+
+    @staticmethod
+    def get_dependencies():
+        return [UnpicklableBear]
+
+
+class MissingDependencyBear(GlobalBear):
+
+    @staticmethod
+    def get_dependencies():
+        return [DependentBear]
+
+
+class GlobalBearSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.section = Section("name")
+        self.pool = TestPool()
+
+    def create_scheduler(self, *bear_classes):
+        return GlobalBearScheduler([bear_class({}, self.section, None)
+                                    for bear_class in bear_classes],
+                                   self.pool)
+
+    def test_no_bears(self):
+        self.create_scheduler().start()
+        self.assertEqual(self.pool.submitted, [])
+        self.assertTrue(self.pool.finished)
+
+    def test_dependencies(self):
+        uut = self.create_scheduler(SimpleBear, OtherBear, DependentBear)
+        uut.start()
+        # Independent bears are submitted right away
+        self.assertEqual(self.pool.submitted,
+                         [("SimpleBear", None), ("OtherBear", None)])
+
+        uut.mark_done("OtherBear", [])
+        self.assertEqual(len(self.pool.submitted), 2)
+        uut.mark_done("SimpleBear", ["result"])
+        self.assertEqual(self.pool.submitted[2],
+                         ("DependentBear",
+                          {"SimpleBear": ["result"], "OtherBear": None}))
+        self.assertFalse(self.pool.finished)
+
+        uut.mark_done("DependentBear", None)
+        self.assertTrue(self.pool.finished)
+        self.assertEqual(uut.results, {"SimpleBear": ["result"],
+                                       "OtherBear": None,
+                                       "DependentBear": None})
+
+        # Unknown bears are ignored
+        uut.mark_done("UnknownBear", ["result"])
+        self.assertNotIn("UnknownBear", uut.results)
+
+    def test_missing_dependency(self):
+        uut = self.create_scheduler(MissingDependencyBear)
+        uut.start()
+        # The process running the bear reports the unmet dependency
+        self.assertEqual(self.pool.submitted,
+                         [("MissingDependencyBear", False)])
+
+        uut.mark_done("MissingDependencyBear", None)
+        self.assertTrue(self.pool.finished)
+
+    def test_invalid_bear(self):
+        uut = GlobalBearScheduler(["not a valid bear"], self.pool)
+        uut.start()
+        self.assertEqual(self.pool.submitted, [("str", None)])
+        uut.mark_done("str", None)
+        self.assertTrue(self.pool.finished)
+
+    def test_unpicklable_bear(self):
+        log_printer = ListLogPrinter()
+        uut = GlobalBearScheduler(
+            [UnpicklableBear({}, self.section, None),
+             DependingOnUnpicklableBear({}, self.section, None)],
+            self.pool,
+            log_printer)
+        uut.start()
+
+        # The bear counts as failed
+        self.assertEqual(log_printer.logs[0].message,
+                         "The bear UnpicklableBear could not be sent to the "
+                         "processes running bears. Skipping bear...")
+        self.assertEqual(uut.results, {"UnpicklableBear": None})
+        self.assertEqual(self.pool.submitted,
+                         [("DependingOnUnpicklableBear",
+                           {"UnpicklableBear": None})])
+        self.assertFalse(self.pool.finished)
+
+        uut.mark_done("DependingOnUnpicklableBear", [])
+        self.assertTrue(self.pool.finished)
+
+    def test_unpicklable_bears_only(self):
+        uut = self.create_scheduler(UnpicklableBear)
+        uut.start()
+        self.assertEqual(self.pool.submitted, [])
+        self.assertTrue(self.pool.finished)
+
+    def test_abort(self):
+        uut = self.create_scheduler(SimpleBear, OtherBear, DependentBear)
+        uut.start()
+        uut.mark_done("SimpleBear", ["result"])
+        uut.abort()
+
+        self.assertTrue(self.pool.finished)
+        self.assertEqual(uut.unfinished, set())
+        self.assertEqual(uut.results, {"SimpleBear": ["result"],
+                                       "OtherBear": None,
+                                       "DependentBear": None})
+        # Aborted bears are not run anymore
+        self.assertEqual(self.pool.submitted, [("SimpleBear", None),
+                                               ("OtherBear", None)])
+        uut.mark_done("OtherBear", ["result"])
+        self.assertIsNone(uut.results["OtherBear"])
@@ -0,0 +1,78 @@
+import unittest
+
+from coalib.processes.IgnoreRangeIndex import (
+    IgnoreRangeIndex, yield_ignore_ranges)
+from coalib.results.Result import Result
+from coalib.results.SourceRange import SourceRange
+
+
+def result_at(origin, line, end_line=None, file="f"):
+    return Result.from_values(origin,
+                              "message",
+                              file=file,
+                              line=line,
+                              column=1 if line else None,
+                              end_line=end_line,
+                              end_column=1 if end_line else None)
+
+
+class IgnoreRangeIndexTest(unittest.TestCase):
+
+    def test_empty(self):
+        uut = IgnoreRangeIndex()
+        self.assertFalse(uut.ignores(result_at("ABear", 1)))
+
+    def test_overlapping_ranges(self):
+        uut = IgnoreRangeIndex([
+            # A long range is followed by short ones starting within it
+            (["abear"], SourceRange.from_values("f", 1, 1, 50, 1)),
+            (["bbear"], SourceRange.from_values("f", 10, 1, 10, 5)),
+            (["cbear"], SourceRange.from_values("f", 20, 1, 21, 1)),
+            (["bbear"], SourceRange.from_values("f", 60, 1, 70, 1))])
+
+        self.assertTrue(uut.ignores(result_at("ABear", 40)))
+        self.assertTrue(uut.ignores(result_at("BBear", 10)))
+        self.assertFalse(uut.ignores(result_at("BBear", 11)))
+        self.assertTrue(uut.ignores(result_at("CBear", 21)))
+        self.assertFalse(uut.ignores(result_at("CBear", 22)))
+        self.assertFalse(uut.ignores(result_at("ABear", 51)))
+        # Results spanning several lines overlap at their ends
+        self.assertTrue(uut.ignores(result_at("BBear", 55, 60)))
+        self.assertTrue(uut.ignores(result_at("BBear", 70, 80)))
+        self.assertFalse(uut.ignores(result_at("BBear", 71, 80)))
+
+    def test_bear_globs(self):
+        uut = IgnoreRangeIndex([
+            (["(line*|space*)", "py*"],
+             SourceRange.from_values("f", 1, 1, 2, 2))])
+
+        for _ in range(2):
+            # Matches are cached per bear, they give the same answers again
+            self.assertTrue(uut.ignores(result_at("LineLengthBear", 1)))
+            self.assertTrue(uut.ignores(result_at("PyLintBear", 1)))
+            self.assertFalse(uut.ignores(result_at("XMLBear", 1)))
+
+    def test_files(self):
+        uut = IgnoreRangeIndex([([],
+                                 SourceRange.from_values("f", 1, 1, 1, 5))])
+
+        self.assertTrue(uut.ignores(result_at("ABear", 1)))
+        self.assertFalse(uut.ignores(result_at("ABear", 1, file="g")))
+        # Results affecting no code or whole files aren't ignored
+        self.assertFalse(uut.ignores(Result("ABear", "message")))
+        self.assertFalse(uut.ignores(result_at("ABear", None)))
+
+    def test_files_added_later(self):
+        file_dict = {"f": ("# Start ignoring ABear\n",
+                           "x\n",
+                           "# Stop ignoring\n"),
+                     "g": ("# Ignore BBear\n", "x\n")}
+        uut = IgnoreRangeIndex(file_dict=file_dict)
+        # Indexes of files replace what would be collected from the file dict
+        uut.add_file("g", IgnoreRangeIndex.index_file(
+            yield_ignore_ranges({"g": ("# Ignore ABear\n", "x\n")})))
+
+        self.assertTrue(uut.ignores(result_at("ABear", 2)))
+        self.assertFalse(uut.ignores(result_at("BBear", 2)))
+        self.assertTrue(uut.ignores(result_at("ABear", 2, file="g")))
+        self.assertFalse(uut.ignores(result_at("BBear", 2, file="g")))
@@ -27,9 +27,7 @@ class LogPrinterThreadTest(unittest.TestCase):
         self.assertEqual(self.uut.message_queue.qsize(), 3)
         with retrieve_stdout() as stdout:
             self.uut.start()
-            while self.uut.message_queue.qsize() > 0:
-                continue
-            self.uut.running = False
+            self.uut.stop()
             self.uut.join()
             self.assertEqual(stdout.getvalue(),
                              "Sample message 1\nSample message 2\nSample "
@@ -5,17 +5,34 @@ import queue
 import re
 import subprocess
 import sys
+import tempfile
+import threading
 import unittest
+import unittest.mock
 
 from pyprint.ConsolePrinter import ConsolePrinter
 
+from coalib.bears.GlobalBear import GlobalBear
+from coalib.bears.LocalBear import LocalBear
+
+from coalib.misc.MappedFile import MappedFile
 from coalib.output.printers.LogPrinter import LogPrinter
+from coalib.processes import Processing
 from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
+from coalib.processes.ControlQueue import ControlQueue
 from coalib.processes.Processing import (
-    ACTIONS, autoapply_actions, check_result_ignore, create_process_group,
-    execute_section, filter_raising_callables, get_default_actions,
-    get_file_dict, print_result, process_queues, simplify_section_result,
-    yield_ignore_ranges)
+    ACTIONS, autoapply_actions, check_lost_global_bears, check_result_ignore,
+    create_process_group,
+    execute_section, filter_raising_callables, get_control_element,
+    get_cached_results, get_default_actions, get_file_dict,
+    get_max_file_size, get_skip_reason, is_generated_file, load_files,
+    print_result, process_queues, rebase_diffs, simplify_section_result,
+    sort_by_size)
+from coalib.processes.GlobalBearScheduler import GlobalBearScheduler
+from coalib.processes.IgnoreRangeIndex import yield_ignore_ranges
+from coalib.processes.SharedFileStore import SharedFileStore
+from coalib.processes.WorkerPool import WorkerPool
+from coalib.results.Diff import Diff
 from coalib.results.HiddenResult import HiddenResult
 from coalib.results.Result import RESULT_SEVERITY, Result
 from coalib.results.result_actions.ApplyPatchAction import ApplyPatchAction
@@ -26,7 +43,7 @@ from coalib.results.SourceRange import SourceRange
 from coalib.settings.ConfigurationGathering import gather_configuration
 from coalib.settings.Section import Section
 from coalib.settings.Setting import Setting
-from coalib.misc.Caching import FileCache
+from coalib.misc.Caching import BearCostCache, FileCache, ResultCache
 
 
 process_group_test_code = """
@@ -51,6 +68,34 @@ class DummyProcess(multiprocessing.Process):
         return not self.control_queue.empty() and not self.starts_dead
 
 
+class UnpicklableGlobalBear(GlobalBear):
+
+    def __init__(self, *args, **kwargs):
+        GlobalBear.__init__(self, *args, **kwargs)
+        self.lock = threading.Lock()
+
+    def run(self):
+        return []
+
+
+class UnpicklableLocalBear(LocalBear):
+
+    def __init__(self, *args, **kwargs):
+        LocalBear.__init__(self, *args, **kwargs)
+        self.lock = threading.Lock()
+
+    def run(self, filename, file):
+        return []
+
+
+class UnpicklableResultsBear(GlobalBear):
+
+    def run(self):
+        result = Result("UnpicklableResultsBear", "message")
+        result.lock = threading.Lock()
+        return [result]
+
+
 class ProcessingTestLogPrinter(LogPrinter):
 
     def __init__(self, log_queue):
@@ -128,6 +173,80 @@ class ProcessingTest(unittest.TestCase):
                          "message='test message'\\) at "
                          "0x[0-9a-fA-F]+>".format(hex(global_result.id)))
 
+    def test_run_with_pool(self):
+        self.sections['default'].append(Setting('jobs', "2"))
+        with WorkerPool(2) as pool:
+            for i in range(2):
+                results = execute_section(self.sections["default"],
+                                          self.global_bears["default"],
+                                          self.local_bears["default"],
+                                          lambda *args: None,
+                                          None,
+                                          self.log_printer,
+                                          pool=pool)
+                self.assertTrue(results[0])
+                self.assertEqual(len(results[1]), 1)
+                self.assertEqual(len(results[2]), 1)
+
+                if i == 0:
+                    processes = pool.processes
+                # The processes of the pool are reused for every section
+                self.assertIs(pool.processes, processes)
+                self.assertTrue(all(process.is_alive()
+                                    for process in processes))
+
+        self.assertFalse(any(process.is_alive() for process in processes))
+
+    def test_run_with_result_cache(self):
+        self.sections['default'].append(Setting('jobs', "1"))
+        self.sections['default'].append(Setting('changed_files', True))
+        cache = FileCache(self.log_printer, "coala_test", flush_cache=True)
+        result_cache = ResultCache(self.log_printer,
+                                   "coala_test",
+                                   flush_cache=True)
+
+        def run_section():
+            return execute_section(self.sections["default"],
+                                   self.global_bears["default"],
+                                   self.local_bears["default"],
+                                   lambda *args: None,
+                                   cache,
+                                   self.log_printer,
+                                   result_cache=result_cache)
+
+        results = run_section()
+        self.assertEqual(len(results[1]), 1)
+        local_results = next(iter(results[1].values()))
+        self.assertEqual(len(local_results), 1)
+        # The local bear was run on one file
+        self.assertEqual(len(result_cache.data), 1)
+
+        # The cached results are replayed instead of running the bear
+        key = next(iter(result_cache.data))
+        result_cache.add(key, [])
+        results = run_section()
+        self.assertEqual(list(results[1].values()), [[]])
+        self.assertEqual(result_cache.data, {key: []})
+
+    def test_get_cached_results(self):
+        result_cache = ResultCache(self.log_printer,
+                                   "coala_test",
+                                   flush_cache=True)
+        bear = self.local_bears["default"][0](self.sections["default"],
+                                              self.queue)
+        cached_results, keys = get_cached_results(
+            result_cache, [bear], "a.py", ("\n",))
+        self.assertEqual(cached_results, {})
+        result_cache.add(keys[bear.name], ["result"])
+
+        self.assertEqual(
+            get_cached_results(result_cache, [bear], "a.py", ("\n",))[0],
+            {bear.name: ["result"]})
+        # The results of a file with the same contents are not replayed
+        self.assertEqual(
+            get_cached_results(result_cache, [bear], "b.py", ("\n",))[0],
+            {})
+
     def test_empty_run(self):
         self.sections['default'].append(Setting('jobs', "bogus!"))
         results = execute_section(self.sections["default"],
@@ -146,24 +265,6 @@ class ProcessingTest(unittest.TestCase):
     def test_process_queues(self):
         ctrlq = queue.Queue()
 
-        # Append custom controlling sequences.
-
-        # Simulated process 1
-        ctrlq.put((CONTROL_ELEMENT.LOCAL, 1))
-        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, None))
-        ctrlq.put((CONTROL_ELEMENT.GLOBAL, 1))
-
-        # Simulated process 2
-        ctrlq.put((CONTROL_ELEMENT.LOCAL, 2))
-
-        # Simulated process 1
-        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
-
-        # Simulated process 2
-        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, None))
-        ctrlq.put((CONTROL_ELEMENT.GLOBAL, 1))
-        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
-
         first_local = Result.from_values("o", "The first result.", file="f")
         second_local = Result.from_values("ABear",
                                           "The second result.",
@@ -178,24 +279,56 @@ class ProcessingTest(unittest.TestCase):
                                           file="f",
                                           line=7)
         first_global = Result("o", "The one and only global result.")
+
+        # Append custom controlling sequences.
+
+        # Simulated process 1
+        ctrlq.put((CONTROL_ELEMENT.LOCAL, None, [(1, [
+            ("o", [first_local]),
+            ("ABear", [second_local,
+                       third_local,
+                       # The following are to be ignored
+                       Result('o', 'm', severity=RESULT_SEVERITY.INFO),
+                       Result.from_values("ABear", "u", "f", 2, 1),
+                       Result.from_values("ABear", "u", "f", 3, 1)]),
+            # Failing bears yield no results
+            ("BBear", None)],
+            # The ignore ranges are collected from the file dict
+            None)]))
+        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, None, None))
+        ctrlq.put((CONTROL_ELEMENT.GLOBAL, 1, [first_global]))
+
+        # Simulated process 2
+        ctrlq.put((CONTROL_ELEMENT.LOCAL, None, [
+            (2, [("ABear", [fourth_local,
+                            # The following are to be ignored
+                            HiddenResult("t", "c"),
+                            Result.from_values("ABear", "u", "f", 5, 1),
+                            Result.from_values("ABear", "u", "f", 6, 1)])],
+             None),
+            # Files that could not be checked
+            (3, None, None)]))
+
+        # Simulated process 1
+        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None, None))
+
+        # Simulated process 2
+        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED,
+                   None,
+                   {"ABear": [0.5, 10]}))
+        ctrlq.put((CONTROL_ELEMENT.GLOBAL, 1, [first_global]))
+        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None, None))
+
+        local_result_dict = {}
+        global_result_dict = {}
+        bear_costs = BearCostCache(self.log_printer, "coala_test", True)
         section = Section("")
         section.append(Setting('min_severity', "normal"))
         process_queues(
             [DummyProcess(control_queue=ctrlq) for i in range(3)],
             ctrlq,
-            {1: [first_local,
-                 second_local,
-                 third_local,
-                 # The following are to be ignored
-                 Result('o', 'm', severity=RESULT_SEVERITY.INFO),
-                 Result.from_values("ABear", "u", "f", 2, 1),
-                 Result.from_values("ABear", "u", "f", 3, 1)],
-             2: [fourth_local,
-                 # The following are to be ignored
-                 HiddenResult("t", "c"),
-                 Result.from_values("ABear", "u", "f", 5, 1),
-                 Result.from_values("ABear", "u", "f", 6, 1)]},
-            {1: [first_global]},
+            local_result_dict,
+            global_result_dict,
             {"f": ["first line  # stop ignoring, invalid ignore range\n",
                    "second line  # ignore all\n",
                    "third line\n",
@@ -206,7 +339,8 @@ class ProcessingTest(unittest.TestCase):
             lambda *args: self.queue.put(args[2]),
             section,
             None,
-            self.log_printer)
+            self.log_printer,
+            bear_costs=bear_costs)
 
         self.assertEqual(self.queue.get(timeout=0), ([first_local,
                                                       second_local,
@@ -215,12 +349,21 @@ class ProcessingTest(unittest.TestCase):
         self.assertEqual(self.queue.get(timeout=0), ([first_global]))
         self.assertEqual(self.queue.get(timeout=0), ([first_global]))
 
+        # The received results are stored in the given dicts
+        self.assertEqual(local_result_dict, {1: [first_local,
+                                                 second_local,
+                                                 third_local],
+                                             2: [fourth_local]})
+        self.assertEqual(global_result_dict, {1: [first_global]})
+        # The time the bears needed is recorded
+        self.assertEqual(bear_costs.data, {"ABear": 0.05})
+
     def test_dead_processes(self):
         ctrlq = queue.Queue()
         # Not enough FINISH elements in the queue, processes start already dead
         # Also queue elements are reversed
-        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
-        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, None))
+        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None, None))
+        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, None, None))
 
         process_queues(
             [DummyProcess(ctrlq, starts_dead=True) for i in range(3)],
@@ -233,8 +376,8 @@ class ProcessingTest(unittest.TestCase):
             self.queue.get(timeout=0)
 
         # Not enough FINISH elements in the queue, processes start already dead
-        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, None))
-        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
+        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, None, None))
+        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None, None))
 
         process_queues(
             [DummyProcess(ctrlq, starts_dead=True) for i in range(3)],
@@ -246,6 +389,114 @@ class ProcessingTest(unittest.TestCase):
         with self.assertRaises(queue.Empty):
             self.queue.get(timeout=0)
 
+    def test_unpicklable_local_bears(self):
+        self.sections['default'].append(Setting('jobs', "1"))
+        results = execute_section(
+            self.sections["default"],
+            [],
+            [UnpicklableLocalBear] + self.local_bears["default"],
+            lambda *args: None,
+            None,
+            self.log_printer)
+
+        # Only the unpicklable bear is skipped
+        self.assertTrue(results[0])
+        self.assertEqual([result.origin
+                          for file_results in results[1].values()
+                          for result in file_results],
+                         ["LocalTestBear"])
+        messages = []
+        while not self.log_queue.empty():
+            messages.append(self.log_queue.get().message)
+        self.assertIn("The bear UnpicklableLocalBear could not be sent to "
+                      "the processes running bears. Skipping bear...",
+                      messages)
+
+    def test_unpicklable_global_bears(self):
+        self.sections['default'].append(Setting('jobs', "1"))
+        results = execute_section(
+            self.sections["default"],
+            [UnpicklableGlobalBear, UnpicklableResultsBear],
+            [],
+            lambda *args: None,
+            None,
+            self.log_printer)
+
+        # Both bears count as failed instead of the section getting stuck
+        self.assertEqual(results[2], {})
+        messages = []
+        while not self.log_queue.empty():
+            messages.append(self.log_queue.get().message)
+        self.assertIn("The bear UnpicklableGlobalBear could not be sent to "
+                      "the processes running bears. Skipping bear...",
+                      messages)
+        self.assertIn("The results of the bear UnpicklableResultsBear could "
+                      "not be sent to the main process. Skipping bear...",
+                      messages)
+
+    def test_check_lost_global_bears(self):
+        busy_processes = multiprocessing.Value("i", 1)
+        pool = WorkerPool(1)
+        pool.finish_global_bears = lambda: None
+        scheduler = GlobalBearScheduler(
+            [UnpicklableResultsBear({}, self.sections["default"], None)],
+            pool)
+
+        def check(idle_timeouts):
+            return check_lost_global_bears(busy_processes,
+                                           scheduler,
+                                           idle_timeouts,
+                                           self.log_printer)
+
+        # Busy processes may still send results
+        self.assertEqual(check(1), 0)
+        busy_processes.value = 0
+        self.assertEqual(check(0), 1)
+        self.assertEqual(scheduler.unfinished, {"UnpicklableResultsBear"})
+
+        # No results arrived during a whole timeout
+        self.assertEqual(check(1), 0)
+        self.assertEqual(scheduler.unfinished, set())
+        self.assertEqual(scheduler.results, {"UnpicklableResultsBear": None})
+        self.assertEqual(self.log_queue.get(timeout=0).message,
+                         "The results of the global bears "
+                         "UnpicklableResultsBear were lost. Skipping them...")
+
+        # Nothing is left to abort
+        self.assertEqual(check(1), 0)
+        self.assertEqual(check_lost_global_bears(None, None, 1, None), 0)
+
+    def test_get_control_element(self):
+        ctrlq = ControlQueue()
+        element = (CONTROL_ELEMENT.LOCAL_FINISHED, None, None)
+        process = multiprocessing.Process(target=ctrlq.put, args=(element,))
+        process.start()
+        self.assertEqual(get_control_element(ctrlq, [process]), element)
+
+        # The wait ends when the process ends without putting anything
+        process.join()
+        process = multiprocessing.Process(target=int)
+        process.start()
+        with self.assertRaises(queue.Empty):
+            get_control_element(ctrlq, [process])
+        process.join()
+        with self.assertRaises(queue.Empty):
+            get_control_element(ctrlq, [process])
+
+        # The wait for running processes can time out
+        process = multiprocessing.Process(target=ctrlq.get)
+        process.start()
+        with self.assertRaises(queue.Empty):
+            get_control_element(ctrlq, [process], timeout=0.1)
+        ctrlq.put(None)
+        process.join()
+
+        # Other queues are polled
+        with self.assertRaises(queue.Empty):
+            get_control_element(queue.Queue(), [])
+        with self.assertRaises(queue.Empty):
+            get_control_element(multiprocessing.Queue(), [])
+
     def test_create_process_group(self):
         p = create_process_group([sys.executable,
                                   "-c",
@@ -315,6 +566,123 @@ class ProcessingTest(unittest.TestCase):
                        "an unknown error."),
                       self.log_printer.log_queue.get().message)
 
+    def test_load_files(self):
+        filenames = [self.testcode_c_path, "non_existent_file", __file__]
+        files = list(load_files(filenames, self.log_printer))
+        # The order is kept, unreadable files are left out
+        self.assertEqual([filename for filename, file in files],
+                         [self.testcode_c_path, __file__])
+        self.assertEqual(files[1][1][0], "import multiprocessing\n")
+
+    def test_load_files_skipped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            binary_file = os.path.join(directory, "binary")
+            with open(binary_file, "wb") as file:
+                file.write(b"\x89PNG\r\n\x1a\n\0\0")
+            generated_file = os.path.join(directory, "generated.py")
+            with open(generated_file, "w") as file:
+                file.write("# @generated\n")
+
+            filenames = [binary_file, generated_file, __file__]
+            files = dict(load_files(filenames, self.log_printer))
+            self.assertEqual(list(files), [generated_file, __file__])
+            self.assertEqual(self.log_printer.log_queue.get().message,
+                             "Leaving out file '{}' because it seems to be "
+                             "a binary file.".format(binary_file))
+
+            files = dict(load_files(filenames,
+                                    self.log_printer,
+                                    max_file_size=100,
+                                    skip_generated=True))
+            self.assertEqual(files, {})
+            self.log_printer.log_queue.get()
+            self.assertEqual(self.log_printer.log_queue.get().message,
+                             "Leaving out file '{}' because it seems to be "
+                             "generated.".format(generated_file))
+            self.assertEqual(self.log_printer.log_queue.get().message,
+                             "Leaving out file '{}' because it is larger "
+                             "than 100 bytes.".format(__file__))
+
+    def test_is_generated_file(self):
+        self.assertTrue(is_generated_file(b"// Code generated by x.\n"))
+        self.assertTrue(is_generated_file(
+            b"/*\n * Copyright\n *\n * @generated\n */\nint x;\n"))
+        self.assertTrue(is_generated_file(
+            b"<!-- DO NOT EDIT -->\n<html></html>\n"))
+        self.assertFalse(is_generated_file(b""))
+        self.assertFalse(is_generated_file(b"# A comment.\nx = 1\n"))
+        self.assertFalse(is_generated_file(b"x = 1\n# DO NOT EDIT\n"))
+        # These files contain the markers only in their code.
+        for filename in (__file__, Processing.__file__):
+            with open(filename, "rb") as file:
+                self.assertFalse(is_generated_file(file.read()))
+
+    def test_get_max_file_size(self):
+        section = Section("")
+        self.assertEqual(get_max_file_size(section, self.log_printer), 0)
+        section.append(Setting("max_file_size", "1000"))
+        self.assertEqual(get_max_file_size(section, self.log_printer), 1000)
+        section.append(Setting("max_file_size", "0"))
+        self.assertEqual(get_max_file_size(section, self.log_printer), 0)
+        self.assertTrue(self.log_queue.empty())
+
+        for value in ("10MB", "-1"):
+            section.append(Setting("max_file_size", value))
+            self.assertEqual(get_max_file_size(section, self.log_printer), 0)
+            self.assertEqual(
+                self.log_queue.get().message,
+                "Unable to convert setting 'max_file_size' into a number of "
+                "bytes. Checking files of any size.")
+
+    def test_rebase_diffs(self):
+        file_dict = {"a": ("a\n",)}
+        with SharedFileStore() as store:
+            view_a = store.add(("a\n",))
+            view_b = store.add(("b\n",))
+            diff_a = Diff.from_string_arrays(view_a, ["x\n"])
+            diff_b = Diff.from_string_arrays(view_b, ["y\n"])
+            results = [Result("origin", "message",
+                              diffs={"a": diff_a, "b": diff_b}),
+                       Result("origin", "message")]
+            rebase_diffs(results, file_dict)
+
+        # The diffs are usable after the store is closed.
+        self.assertIs(diff_a.original, file_dict["a"])
+        self.assertEqual(diff_a.modified, ["x\n"])
+        self.assertEqual(diff_b.original, ("b\n",))
+        self.assertEqual(diff_b.modified, ["y\n"])
+
+    def test_get_skip_reason(self):
+        self.assertIsNone(get_skip_reason(__file__))
+        self.assertIsNone(get_skip_reason(__file__, 0, True))
+        size = os.path.getsize(__file__)
+        self.assertIsNone(get_skip_reason(__file__, size))
+        self.assertEqual(get_skip_reason(__file__, size - 1),
+                         "it is larger than {} bytes".format(size - 1))
+        with self.assertRaises(OSError):
+            get_skip_reason("non_existent_file")
+
+    def test_load_files_mapped(self):
+        with unittest.mock.patch("coalib.processes.Processing."
+                                 "MAPPED_FILE_SIZE", 1):
+            files = dict(load_files([__file__], self.log_printer))
+
+        self.assertIsInstance(files[__file__], MappedFile)
+        with open(__file__, encoding="utf-8") as file:
+            self.assertEqual(files[__file__], tuple(file.readlines()))
+
+    def test_sort_by_size(self):
+        small_file = os.path.join(os.path.dirname(__file__),
+                                  "__init__.py")
+        self.assertEqual(sort_by_size([small_file,
+                                       "non_existent_file",
+                                       __file__,
+                                       "other_non_existent_file"]),
+                         [__file__,
+                          small_file,
+                          "non_existent_file",
+                          "other_non_existent_file"])
+
     def test_simplify_section_result(self):
         results = (True,
                    {"file1": [Result("a", "b")], "file2": None},
@@ -0,0 +1,90 @@
+import os
+import pickle
+import unittest
+
+from coalib.processes.SharedFileStore import SharedFileStore, SharedFileView
+
+
+class SharedFileStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.uut = SharedFileStore()
+        self.files = {"a": ("first line\n", "second line\n", "third"),
+                      "b": ("ünïcödé\n", "\n"),
+                      "empty": ()}
+        self.file_dict = self.uut.create_file_dict(self.files)
+
+    def tearDown(self):
+        self.uut.close()
+
+    def test_create_file_dict(self):
+        self.assertEqual(self.file_dict.keys(), self.files.keys())
+        for filename, lines in self.files.items():
+            view = self.file_dict[filename]
+            self.assertIsInstance(view, SharedFileView)
+            self.assertEqual(view, lines)
+            self.assertEqual(tuple(view), lines)
+            self.assertEqual(len(view), len(lines))
+
+        # Files can be added later on
+        file_dict = self.uut.create_file_dict({"c": ("c\n",)})
+        self.assertEqual(file_dict["c"], ("c\n",))
+        self.assertEqual(self.file_dict["a"], self.files["a"])
+
+    def test_view(self):
+        view = self.file_dict["a"]
+        self.assertEqual(view[0], "first line\n")
+        self.assertEqual(view[-1], "third")
+        self.assertEqual(view[1:], ("second line\n", "third"))
+        self.assertEqual(view[::-2], ("third", "first line\n"))
+        self.assertEqual(view.index("third"), 2)
+        self.assertIn("second line\n", view)
+        self.assertEqual("".join(view), "first line\nsecond line\nthird")
+        with self.assertRaises(IndexError):
+            view[3]
+        with self.assertRaises(IndexError):
+            view[-4]
+
+    def test_concatenation(self):
+        view = self.file_dict["a"]
+        self.assertEqual(view + ("x\n",), self.files["a"] + ("x\n",))
+        self.assertEqual(("x\n",) + view, ("x\n",) + self.files["a"])
+        self.assertEqual(view + self.file_dict["b"],
+                         self.files["a"] + self.files["b"])
+        self.assertIsInstance(view + (), tuple)
+        with self.assertRaises(TypeError):
+            view + ["x\n"]
+        with self.assertRaises(TypeError):
+            ["x\n"] + view
+
+    def test_comparison(self):
+        view = self.file_dict["a"]
+        self.assertEqual(view, self.files["a"])
+        self.assertEqual(self.files["a"], view)
+        self.assertEqual(view, self.uut.create_file_dict(self.files)["a"])
+        self.assertNotEqual(view, self.files["b"])
+        self.assertNotEqual(view, list(self.files["a"]))
+        self.assertEqual(hash(view), hash(self.files["a"]))
+        self.assertEqual({view: 1}[self.files["a"]], 1)
+        self.assertEqual(repr(view), repr(self.files["a"]))
+
+    def test_pickling(self):
+        # Only the path of the store is pickled along with the views
+        data = pickle.dumps(self.file_dict)
+        self.assertNotIn(b"second line", data)
+
+        file_dict = pickle.loads(data)
+        self.assertIs(file_dict["a"].store, file_dict["b"].store)
+        self.assertIsNot(file_dict["a"].store, self.uut)
+        self.assertEqual(file_dict, self.files)
+
+    def test_close(self):
+        self.assertTrue(os.path.isfile(self.uut.path))
+        self.file_dict["a"][0]
+
+        with self.uut as store:
+            pass
+
+        self.assertFalse(os.path.exists(store.path))
+        # Closing twice passes silently
+        store.close()
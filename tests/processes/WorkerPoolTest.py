@@ -0,0 +1,104 @@
+import unittest
+
+from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
+from coalib.processes.WorkerPool import WorkerPool
+
+
+class WorkerPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.uut = WorkerPool(2)
+
+    def tearDown(self):
+        self.uut.close()
+
+    def test_start(self):
+        self.assertFalse(self.uut.running)
+        self.uut.start()
+        self.assertTrue(self.uut.running)
+        self.assertEqual(len(self.uut.processes), 2)
+        self.assertTrue(all(process.is_alive()
+                            for process in self.uut.processes))
+
+        # Starting a running pool doesn't spawn new processes
+        processes = self.uut.processes
+        self.uut.start()
+        self.assertIs(self.uut.processes, processes)
+
+    def test_close(self):
+        # Closing a pool that was never started passes silently
+        self.uut.close()
+
+        self.uut.start()
+        processes = self.uut.processes
+        self.uut.close()
+        self.assertFalse(self.uut.running)
+        self.assertFalse(any(process.is_alive() for process in processes))
+
+    def test_section(self):
+        self.uut.start()
+        self.uut.submit_section([])
+        self.uut.submit_file("f", ("line\n",))
+        self.uut.finish_files()
+        # Invalid bears are reported without results
+        self.uut.submit_global_bear("not a bear")
+        self.uut.finish_global_bears()
+
+        control_elements = [self.uut.control_queue.get(timeout=5)
+                            for i in range(6)]
+        self.assertIn((CONTROL_ELEMENT.LOCAL, None, [("f", [], None)]),
+                      control_elements)
+        self.assertIn((CONTROL_ELEMENT.GLOBAL, "str", None),
+                      control_elements)
+        self.assertEqual(
+            control_elements.count(
+                (CONTROL_ELEMENT.LOCAL_FINISHED, None, {})),
+            2)
+        self.assertEqual(
+            control_elements.count(
+                (CONTROL_ELEMENT.GLOBAL_FINISHED, None, None)),
+            2)
+
+    def test_batches(self):
+        self.uut.start()
+        self.uut.submit_section([], file_count=10)
+        # Batches hold a share of the remaining files for every process
+        self.assertEqual(self.uut.get_batch_size(), 3)
+        for i in range(3):
+            self.uut.submit_file(str(i), ())
+        self.assertEqual(self.uut.get_batch_size(), 2)
+        # Batches are sent as well when they hold too many lines
+        self.uut.submit_file("3", ())
+        self.uut.submit_file("large", ("\n",) * self.uut.max_batch_lines)
+        self.uut.submit_file("expensive", (), cost=self.uut.max_batch_cost)
+        # The last files are sent when no more files follow
+        self.uut.submit_file("last", ())
+        self.uut.finish_files()
+        self.uut.finish_global_bears()
+
+        batches = []
+        while len(batches) < 4:
+            control_elem, _, results = self.uut.control_queue.get(timeout=5)
+            if control_elem == CONTROL_ELEMENT.LOCAL:
+                batches.append([filename for filename, _, _ in results])
+        self.assertEqual(sorted(batches), [["0", "1", "2"],
+                                           ["3", "large"],
+                                           ["expensive"],
+                                           ["last"]])
+
+    def test_close_unfinished_section(self):
+        self.uut.start()
+        processes = self.uut.processes
+        self.uut.submit_section([])
+        # The processes are told that no more files and bears follow
+        self.uut.close()
+        self.assertFalse(any(process.is_alive() for process in processes))
+
+    def test_context_manager(self):
+        with self.uut as pool:
+            self.assertIs(pool, self.uut)
+            pool.start()
+            processes = pool.processes
+
+        self.assertFalse(self.uut.running)
+        self.assertFalse(any(process.is_alive() for process in processes))
@@ -1,9 +1,69 @@
+import copy
+import difflib
 import json
+import pickle
+import random
 import unittest
+from types import SimpleNamespace
 from unittest.case import SkipTest
 
 from coalib.output.JSONEncoder import create_json_encoder
-from coalib.results.Diff import ConflictError, Diff, SourceRange
+from coalib.processes.SharedFileStore import SharedFileStore
+from coalib.results.Diff import (ConflictError, Diff, MAX_MATCHER_SIZE,
+                                 SourceRange)
+from coalib.results.LineDiff import LineDiff
+
+
+def get_difflib_diff(file_array_1, file_array_2):
+    """
+    Creates a Diff object from two arrays containing strings line by line
+    from the opcodes of ``difflib``.
+    """
+    result = Diff(file_array_1)
+    matcher = difflib.SequenceMatcher(None, file_array_1, file_array_2)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "delete":
+            for index in range(i1+1, i2+1):
+                result.delete_line(index)
+        elif tag == "insert":
+            result.add_lines(i1, file_array_2[j1:j2])
+        elif tag == "replace":
+            result.change_line(i1+1, file_array_1[i1], file_array_2[j1])
+            result.add_lines(i1+1, file_array_2[j1+1:j2])
+            for index in range(i1+2, i2+1):
+                result.delete_line(index)
+
+    return result
+
+
+def get_changes(diff):
+    """
+    :return: A list with the range and the result of every single change of
+             the given diff.
+    """
+    return [(change.range("file"), change.modified)
+            for change in diff.split_diff(distance=-1)]
+
+
+def get_random_lines(rand, count, different_lines):
+    return ["{}\n".format(rand.randrange(different_lines))
+            for i in range(count)]
+
+
+def get_changed_lines(rand, lines, changes, different_lines):
+    lines = list(lines)
+    for i in range(changes):
+        index = rand.randrange(len(lines) + 1)
+        line = "{}\n".format(rand.randrange(different_lines))
+        choice = rand.randrange(3)
+        if choice == 0:
+            lines.insert(index, line)
+        elif index < len(lines):
+            if choice == 1:
+                del lines[index]
+            else:
+                lines[index] = line
+    return lines
 
 
 class DiffTest(unittest.TestCase):
@@ -126,6 +186,80 @@ class DiffTest(unittest.TestCase):
         # Make sure it didn't happen in place!
         self.assertNotEqual(self.uut.modified, result_file)
 
+    def test_addition_conflicts(self):
+        other = Diff(self.file)
+        other.change_line(2, "2", "3")
+        self.uut.delete_line(2)
+        self.assertRaises(ConflictError, self.uut.__add__, other)
+
+        self.uut = Diff(self.file)
+        self.uut.change_line(2, "2", "4")
+        self.assertRaises(ConflictError, self.uut.__add__, other)
+
+        other = Diff(self.file)
+        other.add_lines(4, ["5"])
+        self.uut.add_lines(4, ["6"])
+        self.assertRaises(ConflictError, self.uut.__add__, other)
+
+    def test_modified_cache(self):
+        modified = self.uut.modified
+        modified.append("5")
+        self.assertEqual(self.uut.modified, self.file)
+
+        self.uut.change_line(1, "1", "1.1")
+        self.assertEqual(self.uut.modified, ["1.1", "2", "3", "4"])
+        self.assertEqual(self.uut.stats(), (1, 1))
+
+        self.uut.add_lines(4, ["5"])
+        self.assertEqual(self.uut.modified, ["1.1", "2", "3", "4", "5"])
+        self.assertEqual(self.uut.stats(), (2, 1))
+
+        self.uut.delete = True
+        self.assertEqual(self.uut.modified, [])
+        self.uut.delete = False
+        self.assertEqual(self.uut.modified, ["1.1", "2", "3", "4", "5"])
+
+    def test_pickle(self):
+        self.uut.add_lines(0, ["0"])
+        self.uut.delete_line(2)
+        self.uut.modified
+        self.assertEqual(pickle.loads(pickle.dumps(self.uut)), self.uut)
+        self.assertEqual(copy.deepcopy(self.uut), self.uut)
+
+        # Diffs stored by older versions hold a dict of changes.
+        state = {"_changes": {2: LineDiff(delete=True),
+                              0: LineDiff(add_after=["0"])},
+                 "_file": self.file,
+                 "_rename": False,
+                 "_delete": False}
+        diff = Diff.__new__(Diff)
+        diff.__setstate__(state)
+        self.assertEqual(diff, self.uut)
+        self.assertEqual(diff.stats(), (1, 1))
+
+    def test_map_lines(self):
+        self.uut.add_lines(1, ["1.1", "1.2"])
+        self.uut.change_line(3, "3", "3.1")
+        self.assertEqual(self.uut.map_lines(1), (1, 1))
+        self.assertEqual(self.uut.map_lines(2), (4, 4))
+        self.assertEqual(self.uut.map_lines(4), (6, 6))
+        self.assertIsNone(self.uut.map_lines(1, 2))
+        self.assertIsNone(self.uut.map_lines(3))
+        self.assertIsNone(self.uut.map_lines(2, 4))
+
+        self.uut.delete_line(4)
+        self.assertIsNone(self.uut.map_lines(4))
+        self.assertEqual(self.uut.map_lines(2), (4, 4))
+
+        self.uut = Diff(self.file)
+        self.uut.delete_line(2)
+        self.uut.delete_line(3)
+        self.assertEqual(self.uut.map_lines(1, 4), (1, 2))
+        self.assertIsNone(self.uut.map_lines(2, 4))
+
+        self.uut.delete = True
+        self.assertIsNone(self.uut.map_lines(1))
+
     def test_addition_rename(self):
         uut = Diff(self.file, rename=False)
         other = Diff(self.file, rename=False)
@@ -166,6 +300,88 @@ class DiffTest(unittest.TestCase):
         self.uut = Diff.from_string_arrays(a, b)
         self.assertEqual(self.uut.modified, b)
 
+    def test_from_string_arrays_changes(self):
+        a = ["a", "b", "c", "d", "e"]
+        b = ["a", "x", "c", "e", "f"]
+        self.uut = Diff.from_string_arrays(a, b)
+        self.assertEqual(self.uut.stats(), (2, 2))
+
+        expected = Diff(a)
+        expected.change_line(2, "b", "x")
+        expected.delete_line(4)
+        expected.add_lines(5, ["f"])
+        self.assertEqual(self.uut, expected)
+
+        self.assertFalse(Diff.from_string_arrays(a, list(a)))
+        self.assertEqual(Diff.from_string_arrays([], b).modified, b)
+        self.assertEqual(Diff.from_string_arrays(a, []).modified, [])
+
+    def test_from_string_arrays_repeated_lines(self):
+        a = ["x"] * 300 + ["y"] * 300 + ["z"]
+        b = ["y"] * 300 + ["x"] * 300 + ["z"]
+        self.assertEqual(Diff.from_string_arrays(a, b).modified, b)
+
+        a = ["{}\n".format(i % 10) for i in range(100)]
+        b = a[:40] + ["new\n"] + a[40:70] + a[75:] + ["end\n"]
+        self.assertEqual(Diff.from_string_arrays(a, b).modified, b)
+
+        # Every line occurs twice.
+        a = ["{}\n".format(i // 2) for i in range(1200)]
+        b = list(a)
+        b[100] = "changed\n"
+        b[900] = "changed too\n"
+        self.uut = Diff.from_string_arrays(a, b)
+        self.assertEqual(self.uut.stats(), (2, 2))
+        self.assertEqual(len(list(self.uut.split_diff())), 2)
+        self.assertEqual(self.uut.modified, b)
+
+    def test_from_string_arrays_same_as_difflib(self):
+        rand = random.Random(42)
+        for i in range(500):
+            different_lines = rand.choice((2, 5, 20, 1000))
+            a = get_random_lines(rand, rand.randrange(60), different_lines)
+            b = get_changed_lines(rand, a, rand.randrange(10),
+                                  different_lines)
+            if rand.randrange(5) == 0:
+                b = get_random_lines(rand, rand.randrange(60),
+                                     different_lines)
+
+            self.assertEqual(get_changes(Diff.from_string_arrays(a, b)),
+                             get_changes(get_difflib_diff(a, b)),
+                             (a, b))
+
+    def test_from_string_arrays_big_random(self):
+        rand = random.Random(42)
+        for i in range(40):
+            different_lines = rand.choice((2, 5, 20, 100, 1000))
+            a = get_random_lines(rand,
+                                 int(MAX_MATCHER_SIZE ** 0.5) +
+                                 rand.randrange(300),
+                                 different_lines)
+            b = get_changed_lines(rand, a, rand.randrange(1, 40),
+                                  different_lines)
+
+            self.uut = Diff.from_string_arrays(a, b)
+            self.assertEqual(self.uut.modified, b)
+            # The edit script is never longer than the one of difflib.
+            matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+            self.assertLessEqual(
+                sum(self.uut.stats()),
+                sum(i2 - i1 + j2 - j1
+                    for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+                    if tag != "equal"))
+
+    def test_from_string_arrays_large(self):
+        a = ["line {}\n".format(i) for i in range(100000)]
+        b = list(a)
+        for i in range(0, len(b), 7):
+            b[i] = "changed {}\n".format(i)
+        del b[5000:6000]
+        b[50000:50000] = ["inserted\n"] * 100
+
+        self.uut = Diff.from_string_arrays(a, b)
+        self.assertEqual(self.uut.modified, b)
+
     def test_from_clang_fixit(self):
         try:
             from clang.cindex import Index, LibclangError
@@ -185,6 +401,28 @@ class DiffTest(unittest.TestCase):
         clang_fixed_file = Diff.from_clang_fixit(fixit, file).modified
         self.assertEqual(fixed_file, clang_fixed_file)
 
+    def test_from_clang_fixit_shared_file(self):
+        # The fixit structure of clang, for views of the shared file store
+        fixit = SimpleNamespace(
+            range=SimpleNamespace(start=SimpleNamespace(line=2, column=7),
+                                  end=SimpleNamespace(line=2, column=11)),
+            value=".f0 = ")
+        with SharedFileStore() as store:
+            file = store.add(['struct { int f0; }\n', 'x = { f0 :1 };\n'])
+            self.assertEqual(Diff.from_clang_fixit(fixit, file).modified,
+                             ['struct { int f0; }\n', 'x = { .f0 = 1 };\n'])
+
+    def test_original(self):
+        self.uut.change_line(2, "2", "2.1")
+        self.assertIs(self.uut.original, self.file)
+
+        copy = tuple(self.file)
+        self.uut.original = copy
+        self.assertIs(self.uut.original, copy)
+        self.assertEqual(self.uut.modified, ["1", "2.1", "3", "4"])
+        with self.assertRaises(AssertionError):
+            self.uut.original = ("1",)
+
     def test_equality(self):
         a = ["first", "second", "third"]
         b = ["first", "third"]
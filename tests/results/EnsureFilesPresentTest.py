@@ -1,7 +1,8 @@
 import unittest
 from os.path import abspath
 
-from coalib.results.ResultFilter import ensure_files_present
+from coalib.results.ResultFilter import (
+    MAX_RENAME_PAIRS, ensure_files_present, get_renamed_files)
 
 
 class EnsureFilesPresentTest(unittest.TestCase):
@@ -114,3 +115,73 @@ class EnsureFilesPresentTest(unittest.TestCase):
                                              modified_file_dict)
 
         self.assertEqual({}, renamed_files)
+
+    def test_file_renaming_same_contents(self):
+        testfile = ['1\n', '2\n']
+        original_file_dict = {'a': testfile, 'b': testfile, 'c': ['3\n']}
+        modified_file_dict = {'c': ['3\n'], 'd': testfile, 'e': testfile}
+
+        renamed_files = ensure_files_present(original_file_dict,
+                                             modified_file_dict)
+
+        self.assertEqual({'a': 'd', 'b': 'e'}, renamed_files)
+        self.assertEqual(set(original_file_dict), {'a', 'b', 'c'})
+        self.assertEqual(modified_file_dict['a'], [])
+        self.assertEqual(modified_file_dict['b'], [])
+
+    def test_file_renaming_most_similar(self):
+        original_file_dict = {'a': ['1\n', '2\n', '3\n', '4\n']}
+        modified_file_dict = {'b': ['1\n', '2\n', '3\n', '5\n'],
+                              'c': ['1\n', '2\n', '3\n', '4\n', '6\n']}
+
+        renamed_files = ensure_files_present(original_file_dict,
+                                             modified_file_dict)
+
+        self.assertEqual({'a': 'c'}, renamed_files)
+        self.assertEqual(original_file_dict['b'], [])
+
+    def test_many_renamed_files(self):
+        original_file_dict = {
+            abspath('old/{}'.format(i)): ['line {} of file {}\n'.format(j, i)
+                                          for j in range(50)]
+            for i in range(40)}
+        modified_file_dict = {}
+        for i in range(40):
+            lines = list(original_file_dict[abspath('old/{}'.format(i))])
+            lines[i] = 'changed\n'
+            lines.append('added\n')
+            modified_file_dict[abspath('new/{}'.format(i))] = lines
+        modified_file_dict[abspath('new/unrelated')] = ['unrelated\n']
+
+        renamed_files = ensure_files_present(original_file_dict,
+                                             modified_file_dict)
+
+        self.assertEqual(
+            {abspath('old/{}'.format(i)): abspath('new/{}'.format(i))
+             for i in range(40)},
+            renamed_files)
+        self.assertEqual(original_file_dict[abspath('new/unrelated')], [])
+
+    def test_many_renamed_files_partly_changed(self):
+        # More pairs than MAX_RENAME_PAIRS, so only files with similar MinHash
+        # sketches are compared.
+        original_file_dict = {
+            'old{}'.format(i): ['line {:02} of file {:02}\n'.format(j, i)
+                                for j in range(40)]
+            for i in range(60)}
+        modified_file_dict = {}
+        for i in range(60):
+            # 55% of the lines are kept.
+            lines = original_file_dict['old{}'.format(i)][:22]
+            lines += ['line {:02} of file {:02}\n'.format(j, i)
+                      for j in range(50, 68)]
+            modified_file_dict['new{}'.format(i)] = lines
+        self.assertGreater(len(original_file_dict) * len(modified_file_dict),
+                           MAX_RENAME_PAIRS)
+
+        renamed_files = get_renamed_files(original_file_dict,
+                                          modified_file_dict)
+
+        self.assertEqual({'old{}'.format(i): 'new{}'.format(i)
+                          for i in range(60)},
+                         renamed_files)
@@ -35,3 +35,13 @@ class LineDiffTest(unittest.TestCase):
         self.assertNotEqual(LineDiff(add_after=['']), LineDiff())
         self.assertNotEqual(LineDiff(add_after=['']), LineDiff(delete=True))
         self.assertNotEqual(LineDiff(change=('', 'a')), LineDiff())
+
+    def test_copy(self):
+        uut = LineDiff(change=("1", "2"), add_after=["3"])
+        copy = uut.copy()
+        self.assertEqual(copy, uut)
+        self.assertIsNot(copy.add_after, uut.add_after)
+
+        copy.add_after.append("4")
+        self.assertEqual(uut.add_after, ["3"])
+        self.assertEqual(LineDiff(delete=True).copy(), LineDiff(delete=True))
@@ -0,0 +1,110 @@
+import json
+import unittest
+from os.path import abspath
+
+from coalib.misc.ContextManagers import make_temp
+from coalib.results.Result import RESULT_SEVERITY, Result
+from coalib.results.ResultBaseline import ResultBaseline, get_fingerprint
+
+
+class ResultBaselineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.filename = abspath("test_file")
+        self.file = ["def f():\n",
+                     "    x = 1\n",
+                     "    return x\n"]
+
+    def test_fingerprint(self):
+        result = Result.from_values("Bear", "msg", self.filename, 2, 5)
+        fingerprint = get_fingerprint(result, {self.filename: self.file})
+        self.assertRegex(fingerprint, "^[0-9a-f]{40}$")
+
+        # Line numbers, columns and whitespace don't matter.
+        moved_file = ["import os\n", "\n"] + [
+            "\t" + line.strip() + "\n" for line in self.file]
+        moved_result = Result.from_values("Bear", "msg", self.filename, 4, 2)
+        self.assertEqual(
+            get_fingerprint(moved_result, {self.filename: moved_file},
+                            context_lines=1),
+            get_fingerprint(result, {self.filename: self.file},
+                            context_lines=1))
+
+        for other in (
+                Result.from_values("Other", "msg", self.filename, 2, 5),
+                Result.from_values("Bear", "other", self.filename, 2, 5),
+                Result.from_values("Bear", "msg", self.filename, 2, 5,
+                                   severity=RESULT_SEVERITY.MAJOR),
+                Result.from_values("Bear", "msg", abspath("other"), 2, 5)):
+            self.assertNotEqual(
+                get_fingerprint(other, {self.filename: self.file}),
+                fingerprint)
+
+        # The same lines around two results make them the same.
+        other_line = Result.from_values("Bear", "msg", self.filename, 3, 5)
+        self.assertEqual(
+            get_fingerprint(other_line, {self.filename: self.file}),
+            fingerprint)
+        self.assertNotEqual(
+            get_fingerprint(other_line, {self.filename: self.file},
+                            context_lines=0),
+            get_fingerprint(result, {self.filename: self.file},
+                            context_lines=0))
+
+        changed_file = ["def f():\n", "    x = 2\n", "    return x\n"]
+        self.assertNotEqual(
+            get_fingerprint(result, {self.filename: changed_file}),
+            fingerprint)
+
+    def test_fingerprint_without_file(self):
+        result = Result("Bear", "msg")
+        self.assertEqual(get_fingerprint(result, {}),
+                         get_fingerprint(Result("Bear", "msg"), {}))
+
+        result = Result.from_values("Bear", "msg", self.filename, 2)
+        self.assertEqual(get_fingerprint(result, {}),
+                         get_fingerprint(result, {"other": self.file}))
+
+    def test_check(self):
+        file_dict = {self.filename: self.file}
+        old = Result.from_values("Bear", "msg", self.filename, 2)
+        new = Result.from_values("Bear", "new", self.filename, 2)
+
+        baseline = ResultBaseline()
+        self.assertEqual(baseline.check([old, old], file_dict), [old, old])
+
+        baseline = ResultBaseline(baseline.recorded)
+        self.assertEqual(baseline.check([new, old], file_dict), [new])
+        self.assertEqual(baseline.check([old, old], file_dict), [old])
+        self.assertEqual(sorted(baseline.recorded.values()), [1, 3])
+
+    def test_check_reads_files(self):
+        with make_temp() as filename:
+            with open(filename, "w") as file:
+                file.writelines(self.file)
+            result = Result.from_values("Bear", "msg", filename, 2)
+
+            baseline = ResultBaseline()
+            baseline.check([result], {})
+            self.assertEqual(
+                list(baseline.recorded),
+                [get_fingerprint(result, {filename: self.file})])
+
+    def test_write_load(self):
+        result = Result.from_values("Bear", "msg", self.filename, 2)
+        baseline = ResultBaseline(context_lines=1)
+        baseline.check([result, result], {self.filename: self.file})
+
+        with make_temp() as filename:
+            baseline.write(filename)
+            loaded = ResultBaseline.load(filename)
+            self.assertEqual(loaded.fingerprints, baseline.recorded)
+            self.assertEqual(loaded.context_lines, 1)
+            self.assertEqual(
+                loaded.check([result], {self.filename: self.file}), [])
+
+            with open(filename, "w") as file:
+                json.dump(["no baseline"], file)
+            self.assertRaises(ValueError, ResultBaseline.load, filename)
+
+        self.assertRaises(OSError, ResultBaseline.load, filename)
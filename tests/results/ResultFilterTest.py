@@ -336,7 +336,7 @@ class ResultFilterTest(unittest.TestCase):
                            res1_pre_addition,     # correctly filtered out
                            res1_addition,         # correctly kept
                            res1_post_addition,    # correctly filtered out
-                           res1_around_addition,  # FALSE POSITIVE (close-line)
+                           res1_around_addition,  # correctly filtered out
                            res1_with_addition,    # correctly kept
                            res1_whole_addition]   # correctly kept
 
@@ -348,7 +348,6 @@ class ResultFilterTest(unittest.TestCase):
                                   res1_whole_change,     # correct
 
                                   res1_addition,         # correct
-                                  res1_around_addition,  # WRONG: line-wise diff
                                   res1_with_addition,    # correct
                                   res1_whole_addition]   # correct
 
@@ -446,6 +445,28 @@ class ResultFilterTest(unittest.TestCase):
                                      [old_result], [new_result])
         self.assertEqual(new_results, [])
 
+    def test_many_results(self):
+        tf1 = abspath('tf1')
+        original_file = ['line {}\n'.format(i) for i in range(2000)]
+        modified_file = ['new\n'] + original_file[:1000] + original_file[1001:]
+        original_results = [
+            Result.from_values('origin', 'message', tf1, line, 1, line, 4)
+            for line in range(1, 2001)]
+        moved_results = [
+            Result.from_values('origin', 'message', tf1, line + 1, 1,
+                               line + 1, 4)
+            for line in range(1, 1001)]
+        new_results = [
+            Result.from_values('origin', 'message', tf1, 1, 1, 1, 4),
+            Result.from_values('origin', 'other', tf1, 2, 1, 2, 4),
+            Result.from_values('origin', 'message', tf1, 5, 1, 5, 3)]
+
+        unique_results = filter_results({tf1: original_file},
+                                        {tf1: modified_file},
+                                        original_results,
+                                        moved_results + new_results)
+        self.assertEqual(unique_results, list(reversed(new_results)))
+
     def test_result_range(self):
         test_file = ["123456789", "123456789", "123456789", "123456789"]
 
@@ -24,6 +24,32 @@ class ResultTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             Result("o", "m", severity=-5)
 
+    def test_from_values_unchecked(self):
+        uut = Result.from_values_unchecked(self,
+                                           "msg",
+                                           abspath("file"),
+                                           2, 3, 4, 5,
+                                           RESULT_SEVERITY.MAJOR,
+                                           "info",
+                                           "debug")
+        self.assertEqual(uut, Result.from_values(self,
+                                                 "msg",
+                                                 "file",
+                                                 2, 3, 4, 5,
+                                                 RESULT_SEVERITY.MAJOR,
+                                                 "info",
+                                                 "debug"))
+        self.assertEqual(uut.origin, "ResultTest")
+        self.assertIsNone(uut.diffs)
+
+        uut = Result.from_values_unchecked(None, "msg", abspath("file"))
+        self.assertEqual(uut.origin, "")
+        self.assertEqual(uut, Result.from_values("", "msg", "file"))
+
+        with self.assertRaises(ValueError):
+            Result.from_values_unchecked("o", "m", abspath("file"),
+                                         severity=-5)
+
     def test_string_dict(self):
         uut = Result(None, "")
         output = uut.to_string_dict()
@@ -1,5 +1,5 @@
 import unittest
-from os.path import relpath
+from os.path import abspath, relpath
 
 from coalib.results.SourcePosition import SourcePosition
 from coalib.misc.ContextManagers import prepare_file
@@ -19,6 +19,17 @@ class SourcePositionTest(unittest.TestCase):
         SourcePosition("file", 4, None)
         SourcePosition("file", 4, 5)
 
+    def test_from_values_unchecked(self):
+        with self.assertRaises(ValueError):
+            SourcePosition.from_values_unchecked(abspath("file"), None, 1)
+
+        for line, column in ((None, None), (4, None), (4, 5)):
+            uut = SourcePosition.from_values_unchecked(abspath("file"),
+                                                       line,
+                                                       column)
+            self.assertEqual(uut, SourcePosition("file", line, column))
+            self.assertEqual(uut.file, abspath("file"))
+
     def test_string_conversion(self):
         uut = SourcePosition("filename", 1)
         self.assertRegex(
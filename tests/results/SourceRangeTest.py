@@ -28,6 +28,22 @@ class SourceRangeTest(unittest.TestCase):
         self.assertEqual(uut.start, self.result_fileB_line2)
         self.assertEqual(uut.end, self.result_fileB_line4)
 
+    def test_from_values_unchecked(self):
+        for values in ((), (2,), (2, 1), (2, 1, 4), (2, 1, None, 5),
+                       (2, None, 2, 5), (2, 3, None, 2), (2, 1, 4, 1)):
+            self.assertEqual(
+                SourceRange.from_values_unchecked(abspath("B"), *values),
+                SourceRange.from_values("B", *values))
+
+        with self.assertRaises(ValueError):
+            SourceRange.from_values_unchecked(abspath("B"), 4, 1, 2, 1)
+
+        with self.assertRaises(ValueError):
+            SourceRange.from_values_unchecked(abspath("B"), 4, 5, 4, 2)
+
+        with self.assertRaises(ValueError):
+            SourceRange.from_values_unchecked(abspath("B"), None, 5)
+
     def test_from_clang_range(self):
         # Simulating a clang SourceRange is easier than setting one up without
         # actually parsing a complete C file.
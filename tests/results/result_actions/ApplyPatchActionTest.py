@@ -3,6 +3,7 @@ import os
 from os.path import isfile
 
 from coalib.misc.ContextManagers import make_temp
+from coalib.misc.MappedFile import MappedFile
 from coalib.results.Diff import Diff
 from coalib.results.Result import Result
 from coalib.results.result_actions.ApplyPatchAction import ApplyPatchAction
@@ -143,6 +144,74 @@ class ApplyPatchActionTest(unittest.TestCase):
             # Recreate file so that context manager make_temp() can delete it
             open(f_a, 'w').close()
 
+    def test_apply_batch(self):
+        uut = ApplyPatchAction()
+        with make_temp() as f_a, make_temp() as f_b:
+            file_dict = {f_a: ["1\n", "2\n", "3\n"],
+                         f_b: ["1\n", "2\n", "3\n"]}
+            for filename in file_dict:
+                with open(filename, "w") as file:
+                    file.writelines(file_dict[filename])
+            file_diff_dict = {}
+
+            with ApplyPatchAction.batch():
+                for line_nr in (1, 2):
+                    diff = Diff(file_dict[f_a])
+                    diff.change_line(line_nr,
+                                     file_dict[f_a][line_nr-1],
+                                     "changed\n")
+                    result = Result("origin", "msg", diffs={f_a: diff})
+                    self.assertTrue(ApplyPatchAction.is_applicable(
+                        result, file_dict, file_diff_dict))
+                    uut.apply(result, file_dict, file_diff_dict)
+                    self.assertFalse(ApplyPatchAction.is_applicable(
+                        result, file_dict, file_diff_dict))
+
+                diff = Diff(file_dict[f_b], rename=f_b+".renamed")
+                diff.delete_line(1)
+                uut.apply(Result("origin", "msg", diffs={f_b: diff}),
+                          file_dict,
+                          file_diff_dict)
+
+                # Nothing is written before the batch is done.
+                with open(f_a) as fa:
+                    self.assertEqual(fa.readlines(), file_dict[f_a])
+                self.assertFalse(isfile(f_b+".renamed"))
+                self.assertTrue(isfile(f_a+".orig"))
+
+            with open(f_a) as fa:
+                self.assertEqual(fa.readlines(),
+                                 ["changed\n", "changed\n", "3\n"])
+            with open(f_b+".renamed") as fb:
+                self.assertEqual(fb.readlines(), ["2\n", "3\n"])
+            self.assertFalse(isfile(f_b))
+            self.assertIsNone(ApplyPatchAction._pending_files)
+
+            os.remove(f_a+".orig")
+            os.remove(f_b+".orig")
+            os.remove(f_b+".renamed")
+            # Recreate file so that context manager make_temp() can delete it
+            open(f_b, 'w').close()
+
+    def test_apply_mapped_file(self):
+        uut = ApplyPatchAction()
+        with make_temp() as f_a:
+            with open(f_a, "w") as file:
+                file.writelines(["1\n", "2\n"])
+            # The diff and the file dict may hold different maps of the file.
+            file_dict = {f_a: MappedFile(f_a)}
+            diff = Diff(MappedFile(f_a))
+            diff.change_line(2, "2\n", "2_changed\n")
+            uut.apply(Result("origin", "msg", diffs={f_a: diff}),
+                      file_dict,
+                      {},
+                      no_orig=True)
+
+            with open(f_a) as fa:
+                self.assertEqual(fa.readlines(), ["1\n", "2_changed\n"])
+            self.assertEqual(file_dict[f_a], ("1\n", "2\n"))
+            self.assertEqual(diff.original, ("1\n", "2\n"))
+
     def test_is_applicable(self):
         diff = Diff(["1\n", "2\n", "3\n"])
         diff.delete_line(2)
@@ -159,6 +228,12 @@ class ApplyPatchActionTest(unittest.TestCase):
         self.assertFalse(
             ApplyPatchAction.is_applicable(conflict_result, {}, {'f': diff}))
 
+    def test_is_applicable_rename_conflict(self):
+        diff = Diff(["1\n"], rename="a")
+        result = Result("", "", diffs={'f': Diff(["1\n"], rename="b")})
+        self.assertFalse(
+            ApplyPatchAction.is_applicable(result, {}, {'f': diff}))
+
     def test_is_applicable_empty_patch(self):
         empty_patch_result = Result("", "", diffs={})
         self.assertFalse(
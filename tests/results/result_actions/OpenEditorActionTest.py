@@ -140,6 +140,65 @@ class OpenEditorActionTest(unittest.TestCase):
 
         self.assertEqual(file_dict, file_dict)
 
+    def test_apply_batched_patch(self):
+        file_dict = {self.fa: ["1\n", "2\n", "3\n"]}
+        diff = Diff(file_dict[self.fa])
+        diff.change_line(3, "3\n", "3_changed\n")
+        subprocess.call = self.fake_edit
+
+        with ApplyPatchAction.batch():
+            diff_dict = ApplyPatchAction().apply(
+                Result("origin", "msg", diffs={self.fa: diff}),
+                file_dict,
+                {},
+                no_orig=True)
+            result = Result.from_values("origin", "msg", self.fa)
+            self.assertTrue(
+                OpenEditorAction.is_applicable(result, file_dict, diff_dict))
+            # Checking the action doesn't write the patched file yet.
+            with open(self.fa) as file:
+                self.assertEqual(file.readlines(), [])
+            diff_dict = OpenEditorAction().apply(result,
+                                                 file_dict,
+                                                 diff_dict,
+                                                 editor="vim")
+
+        # The editor got the patched file.
+        self.assertEqual(diff_dict[self.fa].modified, ["1\n", "3_changed\n"])
+        with open(self.fa) as file:
+            self.assertEqual(file.readlines(), ["1\n", "3_changed\n"])
+
+    def test_is_applicable_batched_rename(self):
+        file_dict = {self.fa: ["1\n"]}
+        diff = Diff(file_dict[self.fa], rename=self.fa + ".renamed")
+        result = Result.from_values("origin", "msg", self.fa)
+
+        with ApplyPatchAction.batch():
+            diff_dict = ApplyPatchAction().apply(
+                Result("origin", "msg", diffs={self.fa: diff}),
+                file_dict,
+                {},
+                no_orig=True)
+            self.assertTrue(
+                OpenEditorAction.is_applicable(result, file_dict, diff_dict))
+            self.assertFalse(os.path.exists(self.fa + ".renamed"))
+
+        os.rename(self.fa + ".renamed", self.fa)
+
+        diff = Diff(file_dict[self.fa], delete=True)
+        with ApplyPatchAction.batch():
+            diff_dict = ApplyPatchAction().apply(
+                Result("origin", "msg", diffs={self.fa: diff}),
+                file_dict,
+                {},
+                no_orig=True)
+            self.assertFalse(
+                OpenEditorAction.is_applicable(result, file_dict, diff_dict))
+            self.assertTrue(os.path.exists(self.fa))
+
+        # tearDown removes the file
+        open(self.fa, "w").close()
+
     def test_is_applicable(self):
         result1 = Result("", "")
         result2 = Result.from_values("", "", "")